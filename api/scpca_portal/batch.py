@@ -1,40 +1,125 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, partial
 from typing import Dict, Iterable, List
 
 from django.conf import settings
 from django.template.defaultfilters import pluralize
 
-import boto3
-from botocore.client import Config
-
 from scpca_portal import utils
 from scpca_portal.config.logging import get_and_configure_logger
 
 logger = get_and_configure_logger(__name__)
-aws_batch = boto3.client(
-    "batch", config=Config(signature_version="s3v4", region_name=settings.AWS_REGION)
-)
 
+THROTTLING_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "Throttling"}
+# Delays between attempts after throttling errors double on every attempt, up to the max
+THROTTLING_BASE_DELAY = 0.5  # in seconds
+THROTTLING_MAX_DELAY = 20  # in seconds
+
+
+class TokenBucket:
+    """
+    Thread safe rate limiter.
+    Tokens are added at `rate` per second, up to `capacity`,
+    and each call to acquire takes a token, waiting until one is available.
+    """
+
+    def __init__(self, rate: float, capacity: int | None = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+@cache
+def get_aws_batch():
+    """
+    Return the Batch client, created on first call and reused afterwards.
+    The pool is sized for concurrent describe/submit requests.
+    """
+    import boto3
+    from botocore.client import Config
+
+    return boto3.client(
+        "batch",
+        config=Config(
+            signature_version="s3v4",
+            region_name=settings.AWS_REGION,
+            max_pool_connections=settings.AWS_BATCH_MAX_POOL_CONNECTIONS,
+        ),
+    )
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Returns whether the passed boto3 error was raised because requests were throttled."""
+    response = getattr(error, "response", None) or {}
+    return response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def get_throttling_delay(attempt: int) -> float:
+    """Returns an exponential delay with jitter for the passed (zero based) attempt."""
+    delay = min(THROTTLING_MAX_DELAY, THROTTLING_BASE_DELAY * 2**attempt)
+    return delay + random.uniform(0, THROTTLING_BASE_DELAY)
 
-def submit_job(job) -> str | None:
+
+def submit_job(
+    job, rate_limiter: TokenBucket | None = None, array_size: int | None = None
+) -> str | None:
     """
     Take a job instance to submit.
-    Submit a job via boto3.
+    Submit a job via boto3, waiting on the rate limiter before each request if one is passed.
+    If an array size is passed, the job is submitted as an array job with that many children.
+    Throttled requests are retried with exponential backoff.
     Return the batch job ID on success, otherwise return None.
     """
-    try:
-        response = aws_batch.submit_job(
-            jobName=job.batch_job_name,
-            jobQueue=job.batch_job_queue,
-            jobDefinition=job.batch_job_definition,
-            containerOverrides=job.batch_container_overrides,
-        )
-    except Exception as error:
-        logger.exception(
-            f"Failed to submit the job due to: \n\t{error}",
-            job_id=job.pk,
-            batch_job_id=job.batch_job_id,
-        )
-        return None
+    array_properties = {"arrayProperties": {"size": array_size}} if array_size else {}
+
+    for attempt in range(settings.AWS_BATCH_SUBMIT_MAX_ATTEMPTS):
+        if rate_limiter:
+            rate_limiter.acquire()
+
+        try:
+            response = get_aws_batch().submit_job(
+                jobName=job.batch_job_name,
+                jobQueue=job.batch_job_queue,
+                jobDefinition=job.batch_job_definition,
+                containerOverrides=job.batch_container_overrides,
+                **array_properties,
+            )
+            break
+        except Exception as error:
+            if is_throttling_error(error) and attempt + 1 < settings.AWS_BATCH_SUBMIT_MAX_ATTEMPTS:
+                delay = get_throttling_delay(attempt)
+                logger.warning(
+                    f"Job submission was throttled, retrying in {delay:.1f}s.", job_id=job.pk
+                )
+                time.sleep(delay)
+                continue
+
+            logger.exception(
+                f"Failed to submit the job due to: \n\t{error}",
+                job_id=job.pk,
+                batch_job_id=job.batch_job_id,
+            )
+            return None
 
     logger.debug(
         "Job submission complete.",
@@ -44,6 +129,20 @@ def submit_job(job) -> str | None:
     return response["jobId"]
 
 
+def submit_jobs(jobs: List) -> List[str | None]:
+    """
+    Take job instances to submit.
+    Submit the jobs concurrently, limited to AWS_BATCH_SUBMIT_RATE_LIMIT requests per second.
+    Return the batch job IDs in the order of the passed jobs, with None for failed submissions.
+    """
+    if not jobs:
+        return []
+
+    rate_limiter = TokenBucket(settings.AWS_BATCH_SUBMIT_RATE_LIMIT)
+    with ThreadPoolExecutor(max_workers=settings.AWS_BATCH_SUBMIT_MAX_WORKERS) as executor:
+        return list(executor.map(partial(submit_job, rate_limiter=rate_limiter), jobs))
+
+
 def terminate_job(job) -> bool:
     """
     Take a job instance to cancel or terminate.
@@ -53,7 +152,7 @@ def terminate_job(job) -> bool:
     Jobs not yet in STARTING are cancelled.
     """
     try:
-        aws_batch.terminate_job(jobId=job.batch_job_id, reason="Terminating job.")
+        get_aws_batch().terminate_job(jobId=job.batch_job_id, reason="Terminating job.")
     except Exception as error:
         logger.exception(
             f"Failed to terminate the job due to: \n\t{error}",
@@ -70,26 +169,46 @@ def terminate_job(job) -> bool:
     return True
 
 
-def get_jobs(batch_jobs: Iterable["Job"]) -> List[Dict] | None:  # noqa: F821
+def describe_jobs(batch_job_ids: List[str]) -> List[Dict] | None:
+    """
+    Fetch the AWS Batch jobs for the passed job IDs, at most 100, in one request.
+    Return the fetched jobs on success, otherwise return None.
+    """
+    try:
+        return get_aws_batch().describe_jobs(jobs=batch_job_ids)["jobs"]
+    except Exception as error:
+        logger.exception(
+            f"Failed to bulk fetch AWS Batch job{pluralize(len(batch_job_ids))} "
+            f"for job IDs: {', '.join(batch_job_ids)} due to: \n\t{error}"
+        )
+        return None
+
+
+def get_jobs(batch_jobs: Iterable["Job"]) -> List[Dict]:  # noqa: F821
     """
     Fetch AWS Batch job(s) for the given one or more job(s) in bulk.
-    Raises Exception on failure.
+    Job IDs are fetched concurrently in chunks of 100, the limit per request.
+    Jobs of chunks which failed to be fetched are left out, so that they don't affect other chunks.
+    Raises Exception if every chunk failed.
     Return a list of fetched jobs on success.
     """
     max_limit = 100  # Limit of job IDs to send per request
     jobs = []
 
-    if batch_job_ids := [job.batch_job_id for job in batch_jobs]:
-        for chunk in utils.get_chunk_list(batch_job_ids, max_limit):
-            try:
-                response = aws_batch.describe_jobs(jobs=chunk)
-                jobs.extend(response["jobs"])
-            except Exception as error:
-                logger.exception(
-                    f"Failed to bulk fetch AWS Batch job{pluralize(len(chunk))} "
-                    f"for job IDs: {', '.join(chunk)} due to: \n\t{error}"
-                )
-                raise
+    # Packed jobs share a batch job, which only needs to be fetched once
+    if batch_job_ids := list(dict.fromkeys(job.batch_job_id for job in batch_jobs)):
+        chunks = list(utils.get_chunk_list(batch_job_ids, max_limit))
+        with ThreadPoolExecutor(max_workers=settings.AWS_BATCH_DESCRIBE_MAX_WORKERS) as executor:
+            chunks_jobs = list(executor.map(describe_jobs, chunks))
+
+        if all(chunk_jobs is None for chunk_jobs in chunks_jobs):
+            raise Exception(f"Failed to fetch all {len(chunks)} chunks of AWS Batch jobs.")
+
+        if failed_chunk_count := chunks_jobs.count(None):
+            logger.warning(f"Failed to fetch {failed_chunk_count} chunks of AWS Batch jobs.")
+
+        for chunk_jobs in chunks_jobs:
+            jobs.extend(chunk_jobs or [])
 
     logger.debug("AWS Job fetch complete.", batch_job_ids=batch_job_ids)
 
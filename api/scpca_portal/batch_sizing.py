@@ -0,0 +1,155 @@
+import math
+from typing import Dict, List, NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+FARGATE = "FARGATE"
+EC2 = "EC2"
+QUEUES = {FARGATE, EC2}
+
+# Memory (in MiB) which Fargate allows per vCPU count
+# https://docs.aws.amazon.com/batch/latest/APIReference/API_ResourceRequirement.html
+FARGATE_MEMORY_IN_MIB = {
+    1: range(2048, 8192 + 1, 1024),
+    2: range(4096, 16384 + 1, 1024),
+    4: range(8192, 30720 + 1, 1024),
+    8: range(16384, 61440 + 1, 4096),
+    16: range(32768, 122880 + 1, 8192),
+}
+
+
+class JobSizing(NamedTuple):
+    queue: str
+    vcpus: int
+    memory_in_mib: int
+    storage_in_bytes: int
+
+    @property
+    def batch_job_queue(self) -> str:
+        if self.queue == FARGATE:
+            return settings.AWS_BATCH_FARGATE_JOB_QUEUE_NAME
+        return settings.AWS_BATCH_EC2_JOB_QUEUE_NAME
+
+    @property
+    def batch_job_definition(self) -> str:
+        if self.queue == FARGATE:
+            return settings.AWS_BATCH_FARGATE_JOB_DEFINITION_NAME
+        return settings.AWS_BATCH_EC2_JOB_DEFINITION_NAME
+
+    @property
+    def resource_requirements(self) -> List[Dict[str, str]]:
+        """Returns the sizing formatted for AWS Batch containerOverrides.resourceRequirements."""
+        return [
+            {"type": "VCPU", "value": str(self.vcpus)},
+            {"type": "MEMORY", "value": str(self.memory_in_mib)},
+        ]
+
+
+def get_memory_multiplier(*, includes_merged: bool, includes_spatial: bool) -> float:
+    """Returns the product of the configured memory multipliers which apply to a dataset."""
+    multipliers = settings.AWS_BATCH_SIZING_MEMORY_MULTIPLIERS
+    multiplier = 1
+    if includes_merged:
+        multiplier *= multipliers.get("merged", 1)
+    if includes_spatial:
+        multiplier *= multipliers.get("spatial", 1)
+
+    return multiplier
+
+
+def get_storage_in_bytes(size_in_bytes: int) -> int:
+    """
+    Returns the local storage a job needs to process a dataset of the passed size.
+    Each job downloads all dataset files and copies them to a zip file before uploading it.
+    """
+    return size_in_bytes * settings.AWS_BATCH_SIZING_STORAGE_MULTIPLIER
+
+
+def get_job_sizing(
+    size_in_bytes: int, file_count: int, *, includes_merged: bool, includes_spatial: bool
+) -> JobSizing:
+    """
+    Returns the queue and container resources for processing a dataset
+    of the passed size, file count and contents.
+    The first tier of AWS_BATCH_SIZING_TIERS whose size and file count limits fit the dataset,
+    and whose queue can store it, is used. Datasets with merged objects or spatial data
+    get their tier's memory multiplied by AWS_BATCH_SIZING_MEMORY_MULTIPLIERS.
+    """
+    storage_in_bytes = get_storage_in_bytes(size_in_bytes)
+    memory_multiplier = get_memory_multiplier(
+        includes_merged=includes_merged, includes_spatial=includes_spatial
+    )
+
+    # The last tier is unbounded (see validate_sizing_tiers)
+    tier = next(
+        tier
+        for tier in settings.AWS_BATCH_SIZING_TIERS
+        if (tier["max_size_in_bytes"] is None or size_in_bytes <= tier["max_size_in_bytes"])
+        and (tier["max_file_count"] is None or file_count <= tier["max_file_count"])
+        and (
+            tier["queue"] != FARGATE
+            or storage_in_bytes <= settings.AWS_BATCH_FARGATE_STORAGE_IN_BYTES
+        )
+    )
+
+    return JobSizing(
+        queue=tier["queue"],
+        vcpus=tier["vcpus"],
+        memory_in_mib=int(tier["memory_in_mib"] * memory_multiplier),
+        storage_in_bytes=storage_in_bytes,
+    )
+
+
+def validate_sizing_tiers(
+    tiers: List[Dict], memory_multipliers: Dict[str, float] | None = None
+) -> None:
+    """
+    Validates a sizing tier table, as configured in AWS_BATCH_SIZING_TIERS:
+    - every tier has a known queue, and positive vCPUs and memory
+    - tier limits increase from one tier to the next
+    - the last tier is unbounded on an EC2 queue, so that every dataset fits a tier
+    - Fargate tiers request resources which Fargate supports,
+      including with the passed memory multipliers applied
+    Raises ImproperlyConfigured for invalid tables.
+    """
+    if not tiers:
+        raise ImproperlyConfigured("At least one sizing tier must be configured.")
+
+    memory_multipliers = memory_multipliers or {}
+    multipliers = {1, *memory_multipliers.values(), math.prod(memory_multipliers.values())}
+
+    for index, tier in enumerate(tiers):
+        if tier["queue"] not in QUEUES:
+            raise ImproperlyConfigured(f"Sizing tier {index} has an unknown queue {tier['queue']}.")
+
+        if tier["vcpus"] < 1 or tier["memory_in_mib"] < 1:
+            raise ImproperlyConfigured(f"Sizing tier {index} must request vCPUs and memory.")
+
+        if tier["queue"] == FARGATE:
+            for multiplier in multipliers:
+                memory_in_mib = int(tier["memory_in_mib"] * multiplier)
+                if memory_in_mib not in FARGATE_MEMORY_IN_MIB.get(tier["vcpus"], []):
+                    raise ImproperlyConfigured(
+                        f"Sizing tier {index} requests {tier['vcpus']} vCPUs "
+                        f"with {memory_in_mib} MiB of memory, which Fargate doesn't support."
+                    )
+
+        if index == 0:
+            continue
+
+        previous_tier = tiers[index - 1]
+        for limit in ["max_size_in_bytes", "max_file_count"]:
+            # Unbounded limits are None
+            if (tier[limit] or math.inf) < (previous_tier[limit] or math.inf):
+                raise ImproperlyConfigured(
+                    f"Sizing tier {index} {limit} must not be less than the previous tier's."
+                )
+
+    last_tier = tiers[-1]
+    if (
+        last_tier["queue"] != EC2
+        or last_tier["max_size_in_bytes"] is not None
+        or last_tier["max_file_count"] is not None
+    ):
+        raise ImproperlyConfigured("The last sizing tier must be unbounded on the EC2 queue.")
@@ -5,6 +5,7 @@ CSV_MULTI_VALUE_DELIMITER = ";"
 TAB = "\t"
 NA = "NA"  # "Not Available"
 
+MB_IN_BYTES = 1000000
 GB_IN_BYTES = 1000000000
 
 IGNORED_INPUT_VALUES = {"", NA, "TBD"}
@@ -62,9 +62,28 @@ class Common(Configuration):
             "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
             "LOCATION": "unique-snowflake",
             "TIMEOUT": None,
-        }
+        },
     }
 
+    # Metadata file contents, keyed by a fingerprint of their rows, are cached in memory
+    # up to this total size per process, evicting the least recently used files first
+    METADATA_FILE_CACHE_MEMORY_IN_BYTES = int(
+        os.getenv("METADATA_FILE_CACHE_MEMORY_IN_BYTES", 32 * 1024 * 1024)
+    )
+    # Metadata files larger than this are not kept in memory,
+    # they are spilled to disk instead if METADATA_FILE_CACHE_DIR is set
+    METADATA_FILE_CACHE_MAX_SIZE_IN_BYTES = int(
+        os.getenv("METADATA_FILE_CACHE_MAX_SIZE_IN_BYTES", 8 * 1024 * 1024)
+    )
+    METADATA_FILE_CACHE_DIR = os.getenv("METADATA_FILE_CACHE_DIR")
+    if METADATA_FILE_CACHE_DIR:
+        CACHES["metadata_files_disk"] = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": METADATA_FILE_CACHE_DIR,
+            "TIMEOUT": None,
+            "OPTIONS": {"MAX_ENTRIES": int(os.getenv("METADATA_FILE_CACHE_MAX_ENTRIES", 64))},
+        }
+
     # General.
     APPEND_SLASH = True
     TIME_ZONE = "UTC"
@@ -115,6 +134,14 @@ class Common(Configuration):
     # Management commands should remove locally downloaded or created data.
     CLEAN_UP_DATA = False
 
+    # Stream dataset archives straight to s3, recording checkpoints that retries resume from
+    DATASET_JOB_CHECKPOINTS = strtobool(os.getenv("DATASET_JOB_CHECKPOINTS", "no"))
+    # Minimum time between saved checkpoints
+    DATASET_JOB_CHECKPOINT_SECONDS = float(os.getenv("DATASET_JOB_CHECKPOINT_SECONDS", 60))
+
+    # Read metadata files directly from the input bucket instead of downloading them first
+    LOAD_METADATA_FROM_S3 = strtobool(os.getenv("LOAD_METADATA_FROM_S3", "no"))
+
     # Enable features before completed.
     # Use this to prevent certain areas from going to production.
     # By default this is enabled for local and tests.
@@ -202,6 +229,76 @@ class Common(Configuration):
 
     # AWS
     AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+    # Connection pool sizes for the boto3 clients (botocore defaults to 10)
+    AWS_S3_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_S3_MAX_POOL_CONNECTIONS", 32))
+    AWS_BATCH_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_BATCH_MAX_POOL_CONNECTIONS", 16))
+    # Size of the parts of multipart uploads, which are buffered in memory
+    AWS_S3_MULTIPART_UPLOAD_PART_SIZE = int(
+        os.getenv("AWS_S3_MULTIPART_UPLOAD_PART_SIZE", 64 * 2**20)
+    )
+    # Concurrency, requests per second and attempts when submitting jobs to AWS Batch in bulk
+    AWS_BATCH_SUBMIT_MAX_WORKERS = int(os.getenv("AWS_BATCH_SUBMIT_MAX_WORKERS", 8))
+    AWS_BATCH_SUBMIT_RATE_LIMIT = float(os.getenv("AWS_BATCH_SUBMIT_RATE_LIMIT", 20))
+    AWS_BATCH_SUBMIT_MAX_ATTEMPTS = int(os.getenv("AWS_BATCH_SUBMIT_MAX_ATTEMPTS", 5))
+    # Concurrency when fetching jobs from AWS Batch in chunks of 100
+    AWS_BATCH_DESCRIBE_MAX_WORKERS = int(os.getenv("AWS_BATCH_DESCRIBE_MAX_WORKERS", 4))
+    # Processing jobs are synced with AWS Batch every fraction of their age
+    # or of their expected duration (based on their dataset's size), whichever is longer,
+    # within the min and max intervals (see Job.get_sync_interval)
+    AWS_BATCH_SYNC_INTERVAL_FRACTION = float(os.getenv("AWS_BATCH_SYNC_INTERVAL_FRACTION", 0.1))
+    AWS_BATCH_SYNC_MIN_INTERVAL_SECONDS = int(os.getenv("AWS_BATCH_SYNC_MIN_INTERVAL_SECONDS", 60))
+    AWS_BATCH_SYNC_MAX_INTERVAL_SECONDS = int(os.getenv("AWS_BATCH_SYNC_MAX_INTERVAL_SECONDS", 900))
+    AWS_BATCH_SYNC_BYTES_PER_SECOND = int(os.getenv("AWS_BATCH_SYNC_BYTES_PER_SECOND", 50 * 10**6))
+    # Jobs with datasets up to this size can be packed together and processed in one container
+    AWS_BATCH_PACK_MAX_SIZE_IN_BYTES = int(os.getenv("AWS_BATCH_PACK_MAX_SIZE_IN_BYTES", 2**30))
+    AWS_BATCH_PACK_MAX_JOBS = int(os.getenv("AWS_BATCH_PACK_MAX_JOBS", 20))
+    # Dataset jobs' queue and container resources (see scpca_portal.batch_sizing)
+    # Jobs run with the first tier whose limits (None is unbounded) fit their dataset
+    AWS_BATCH_SIZING_TIERS = [
+        {
+            "queue": "FARGATE",
+            "max_size_in_bytes": 2**30,
+            "max_file_count": 500,
+            "vcpus": 1,
+            "memory_in_mib": 2048,
+        },
+        {
+            "queue": "FARGATE",
+            "max_size_in_bytes": 10 * 2**30,
+            "max_file_count": 2000,
+            "vcpus": 2,
+            "memory_in_mib": 4096,
+        },
+        {
+            "queue": "FARGATE",
+            "max_size_in_bytes": 100 * 10**9,
+            "max_file_count": None,
+            "vcpus": 4,
+            "memory_in_mib": 8192,
+        },
+        {
+            "queue": "EC2",
+            "max_size_in_bytes": None,
+            "max_file_count": None,
+            "vcpus": 4,
+            "memory_in_mib": 16384,
+        },
+    ]
+    # Memory is multiplied for datasets with merged objects or spatial data
+    AWS_BATCH_SIZING_MEMORY_MULTIPLIERS = {"merged": 2, "spatial": 1.5}
+    # Files are downloaded and then copied into the zip file, so storage is needed for both
+    AWS_BATCH_SIZING_STORAGE_MULTIPLIER = 2
+    # Must match the ephemeral storage of the fargate job definition
+    AWS_BATCH_FARGATE_STORAGE_IN_BYTES = 200 * 10**9
+
+    # Jobs are either submitted to AWS Batch ("BATCH"),
+    # or claimed from the db by local worker processes ("LOCAL", see scpca_portal.local_worker)
+    JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "BATCH")
+    LOCAL_WORKER_PROCESSES = int(os.getenv("LOCAL_WORKER_PROCESSES", 2))
+    LOCAL_WORKER_POLL_SECONDS = float(os.getenv("LOCAL_WORKER_POLL_SECONDS", 5))
+    LOCAL_WORKER_HEARTBEAT_SECONDS = float(os.getenv("LOCAL_WORKER_HEARTBEAT_SECONDS", 30))
+    # Jobs of workers which haven't sent a heartbeat for this long are failed and retried
+    LOCAL_WORKER_STALE_SECONDS = float(os.getenv("LOCAL_WORKER_STALE_SECONDS", 180))
 
     SLACK_NOTIFICATIONS_EMAIL = os.getenv("SLACK_NOTIFICATIONS_EMAIL")
 
@@ -2,5 +2,7 @@ from scpca_portal.enums.ccdl_dataset_names import CCDLDatasetNames
 from scpca_portal.enums.dataset_data_project_config import DatasetDataProjectConfig
 from scpca_portal.enums.dataset_formats import DatasetFormats
 from scpca_portal.enums.file_formats import FileFormats
+from scpca_portal.enums.job_executors import JobExecutors
 from scpca_portal.enums.job_states import JobStates
 from scpca_portal.enums.modalities import Modalities
+from scpca_portal.enums.project_load_states import ProjectLoadStates
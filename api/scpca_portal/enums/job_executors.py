@@ -0,0 +1,6 @@
+from django.db.models import TextChoices
+
+
+class JobExecutors(TextChoices):
+    BATCH = "BATCH"
+    LOCAL = "LOCAL"
@@ -0,0 +1,9 @@
+from django.db.models import TextChoices
+
+
+class ProjectLoadStates(TextChoices):
+    LOADED = "LOADED"
+    RELOADED = "RELOADED"
+    UNCHANGED = "UNCHANGED"
+    SKIPPED = "SKIPPED"
+    FAILED = "FAILED"
@@ -11,6 +11,7 @@ from scpca_portal.exceptions.dataset_data_validation_error import (
     DatasetDataValidationError,
 )
 from scpca_portal.exceptions.dataset_error import (
+    DatasetDownloadFailedError,
     DatasetError,
     DatasetLockedProjectError,
     DatasetMissingLibrariesError,
@@ -34,5 +35,6 @@ from scpca_portal.exceptions.job_processor_error import (
     JobProcessorError,
     JobProcessorHandlerNotImplementedError,
     JobProcessorHandlerStepNotImplementedError,
+    JobProcessorStepDependencyNotImplementedError,
     JobProcessorStepNotImplementedError,
 )
@@ -18,3 +18,9 @@ class DatasetMissingLibrariesError(DatasetError):
     def __init__(self, dataset=None):
         message = "Unable to find libraries for Dataset."
         super().__init__(message, dataset)
+
+
+class DatasetDownloadFailedError(DatasetError):
+    def __init__(self, dataset=None):
+        message = "Unable to download original files for Dataset."
+        super().__init__(message, dataset)
@@ -7,6 +7,10 @@ class JobProcessorStepNotImplementedError(JobProcessorError):
     pass
 
 
+class JobProcessorStepDependencyNotImplementedError(JobProcessorError):
+    pass
+
+
 class JobProcessorHandlerNotImplementedError(JobProcessorError):
     pass
 
@@ -1,15 +1,40 @@
 from __future__ import annotations
 
+import resource
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Callable, Dict, List, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Callable, Dict, List, Set, Tuple
 
+from django.db import connection
+from django.utils.timezone import make_aware
+
+from scpca_portal.config.logging import get_and_configure_logger
 from scpca_portal.enums import JobStates
 from scpca_portal.exceptions import (
     JobProcessorHandlerNotImplementedError,
     JobProcessorHandlerStepNotImplementedError,
+    JobProcessorStepDependencyNotImplementedError,
     JobProcessorStepNotImplementedError,
 )
-from scpca_portal.models import Job
+from scpca_portal.models import Job, JobStepMetric
+
+logger = get_and_configure_logger(__name__)
+
+# How often the memory usage of running steps is sampled
+RSS_SAMPLE_INTERVAL_SECONDS = 0.5
+
+
+def get_current_rss_in_bytes() -> int | None:
+    """Returns the current resident set size of the process, or None if it can't be read."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return None
 
 
 class JobProcessorABC(ABC):
@@ -20,7 +45,15 @@ class JobProcessorABC(ABC):
     Sub‑classes declare the concrete workflow by providing:
 
     * ``steps`` – an ordered list of method names (as strings) that will be
-      called sequentially when `run` is invoked.
+      called when `run` is invoked.
+    * ``step_dependencies`` – an optional mapping of step names to the names
+      of the steps which must succeed before they start. Steps which are not
+      in the mapping depend on the step declared before them, so that steps
+      run sequentially by default. Dependencies must be declared before the
+      steps which depend on them.
+    * ``max_concurrent_steps`` – the number of steps whose dependencies have
+      succeeded that may run at the same time, in a thread pool.
+      Defaults to 1, in which case steps run in the calling thread.
     * ``exception_handlers`` – a mapping whose keys are ``(step_name,
       exception_type)`` tuples and whose values are the names of handler
       methods (as strings) that should be executed when the corresponding
@@ -34,9 +67,12 @@ class JobProcessorABC(ABC):
     * Validation that every declared step and handler actually exists and is
       callable.
     * Automatic lookup of the appropriate handler when a step raises an
-      exception.
+      exception. Once a step raises, no more steps are started, and the
+      exception of the first failed step is handled after running steps end.
     * Update the Job instance state.
       (e.g. ``PROCESSING`` → ``FAILED`` / ``SUCCEEDED``).
+    * Recording a JobStepMetric per executed step, with its timing, peak memory
+      usage and any counters that the step added via `add_step_metrics`.
     * Hook methods (`on_*`) that subclasses may override to react to lifecycle
       events such as the start/end of the whole run, the start of a step, or an
       uncaught exception.
@@ -44,17 +80,22 @@ class JobProcessorABC(ABC):
     Public Methods
     ---------------
     run() -> None
-        Executes each step in order, applying the appropriate exception
+        Executes each step once its dependencies succeed, applying the appropriate exception
         handling logic. Updates the job state to ``FAILED`` if any step raises
         an unhandled exception, otherwise marks the job as ``SUCCEEDED``.
 
+    add_step_metrics(**counters) -> None
+        Adds the passed counters (e.g. ``bytes_downloaded``) to the metrics
+        of the step executing in the calling thread.
+
     Hook Methods (override as needed)
     ---------------------------------
     on_run() -> None
         Invoked once before any step is executed.
 
     on_step_start(step: str) -> None
-        Invoked right before a particular step begins execution.
+        Invoked right before a particular step begins execution,
+        in the thread which executes it.
 
     on_step_exception(step: str, e: Exception) -> None
         Invoked when a step raises an exception that *does* have a registered
@@ -80,6 +121,10 @@ class JobProcessorABC(ABC):
     def exception_handlers(self) -> Dict[Tuple[str, type], str]:
         pass
 
+    step_dependencies: Dict[str, List[str]] = {}
+
+    max_concurrent_steps: int = 1
+
     def __init__(self, job: Job):
         self._job = job
 
@@ -87,9 +132,19 @@ class JobProcessorABC(ABC):
         self._steps_functions: List[Callable] = []
         self._init_step_functions()
 
+        self._steps_dependencies: Dict[str, Set[str]] = {}
+        self._init_steps_dependencies()
+
         self._exception_handlers_functions: Dict[Tuple[str, type], Callable] = {}
         self._init_exception_handlers_functions()
 
+        self._step_metrics: List[JobStepMetric] = []
+        # Each thread tracks the metric of the step it executes
+        self._thread_step_metric = threading.local()
+        # Metrics of the steps which are running, whose memory usage is sampled
+        self._running_step_metrics: List[JobStepMetric] = []
+        self._running_step_metrics_lock = threading.Lock()
+
     def _init_step_functions(self):
         """Create mapping of steps to callable step functions"""
         self._steps_functions = [getattr(self, step, step) for step in self.steps]
@@ -99,6 +154,24 @@ class JobProcessorABC(ABC):
                 self.__class__.__name__, *not_implemented_steps
             )
 
+    def _init_steps_dependencies(self):
+        """Create mapping of steps to the steps which must succeed before they start"""
+        self._steps_dependencies = {
+            step: set(self.step_dependencies.get(step, self.steps[index - 1 : index]))
+            for index, step in enumerate(self.steps)
+        }
+
+        # Dependencies declared before their steps keep the steps acyclic
+        if not_implemented_dependencies := [
+            dependency
+            for step, dependencies in self.step_dependencies.items()
+            for dependency in dependencies
+            if step not in self.steps or dependency not in self.steps[: self.steps.index(step)]
+        ]:
+            raise JobProcessorStepDependencyNotImplementedError(
+                self.__class__.__name__, *not_implemented_dependencies
+            )
+
     def _init_exception_handlers_functions(self):
         """Create mapping of exception handlers to callable exception handler functions"""
         self._exception_handlers_functions = {
@@ -141,38 +214,201 @@ class JobProcessorABC(ABC):
     def on_run_done(self) -> None:
         pass
 
+    def add_step_metrics(self, **counters: int) -> None:
+        """Adds the passed counters to the metrics of the step executing in the calling thread."""
+        step_metric = self._thread_step_metric.value
+        for counter, value in counters.items():
+            setattr(step_metric, counter, getattr(step_metric, counter) + value)
+
+    def _start_step_metric(self, step: str) -> JobStepMetric:
+        dataset = self.job.dataset
+        step_metric = JobStepMetric(
+            job=self.job,
+            step=step,
+            started_at=make_aware(datetime.now()),
+            # The duration is measured with a monotonic clock
+            duration=time.perf_counter(),
+            dataset_size_in_bytes=dataset.estimated_size_in_bytes if dataset else None,
+        )
+        self._step_metrics.append(step_metric)
+
+        with self._running_step_metrics_lock:
+            self._running_step_metrics.append(step_metric)
+        self._sample_step_rss()
+
+        return step_metric
+
+    def _end_step_metric(self, step_metric: JobStepMetric, succeeded: bool) -> None:
+        step_metric.ended_at = make_aware(datetime.now())
+        step_metric.duration = time.perf_counter() - step_metric.duration
+        step_metric.succeeded = succeeded
+
+        self._sample_step_rss()
+        with self._running_step_metrics_lock:
+            self._running_step_metrics.remove(step_metric)
+
+        logger.info(
+            f"Step {step_metric.step} took {step_metric.duration:.2f}s.",
+            job_id=self.job.id,
+            step=step_metric.step,
+            succeeded=step_metric.succeeded,
+            duration=step_metric.duration,
+            bytes_downloaded=step_metric.bytes_downloaded,
+            bytes_written=step_metric.bytes_written,
+            bytes_uploaded=step_metric.bytes_uploaded,
+            file_count=step_metric.file_count,
+            peak_rss_in_bytes=step_metric.peak_rss_in_bytes,
+        )
+
+    def _sample_step_rss(self) -> None:
+        """Raises the peak RSS of each running step to the current RSS of the process."""
+        if (rss_in_bytes := get_current_rss_in_bytes()) is None:
+            return
+
+        with self._running_step_metrics_lock:
+            for step_metric in self._running_step_metrics:
+                step_metric.peak_rss_in_bytes = max(
+                    step_metric.peak_rss_in_bytes or 0, rss_in_bytes
+                )
+
+    def _sample_step_rss_until(self, stopped: threading.Event) -> None:
+        while not stopped.wait(RSS_SAMPLE_INTERVAL_SECONDS):
+            self._sample_step_rss()
+
+    def _save_step_metrics(self) -> None:
+        """Saves the run's step metrics, without letting a failure affect the job's outcome."""
+        try:
+            JobStepMetric.objects.bulk_create(self._step_metrics)
+        except Exception as e:
+            logger.exception(f"Unable to save step metrics for job {self.job.id}: {e}")
+
     def run(self) -> None:
         """
-        Execute each step in order.
+        Execute each step once the steps it depends on have succeeded.
         If a step raises an exception look for a matching handler.
         By default mark the job failed when exception raised.
+        Metrics of each executed step are saved once the run ends, whether or not it succeeded.
         """
+        # Memory usage is sampled in the background while steps run
+        stopped = threading.Event()
+        sampler = threading.Thread(target=self._sample_step_rss_until, args=(stopped,), daemon=True)
+        sampler.start()
+
+        try:
+            self._run_steps()
+        finally:
+            stopped.set()
+            sampler.join()
+            self._save_step_metrics()
+
+    def _run_steps(self) -> None:
         # mark job as processing
         self.on_run()
 
-        for step_function in self._steps_functions:
-            step = step_function.__name__
+        if failure := self._run_steps_functions():
+            step, e = failure
 
-            try:
-                self.on_step_start(step)
-                step_function()
-            except Exception as e:
-                if exception_handler := self._lookup_handler(step, e):
-                    exception_handler(e)
-                else:
-                    self.on_uncaught_exception(step, e)
+            if exception_handler := self._lookup_handler(step, e):
+                exception_handler(e)
+            else:
+                self.on_uncaught_exception(step, e)
 
-                if self.job.state is JobStates.PROCESSING:
-                    self.job.apply_state(JobStates.FAILED, reason=f"Error occurred during {step}.")
+            if self.job.state is JobStates.PROCESSING:
+                self.job.apply_state(JobStates.FAILED, reason=f"Error occurred during {step}.")
 
-                self.job.save()
-                raise
+            self.job.save()
+            raise e
 
         self.job.apply_state(JobStates.SUCCEEDED)
         self.job.save()
 
         self.on_run_done()
 
+    def _run_steps_functions(self) -> Tuple[str, Exception] | None:
+        """
+        Starts each step once its dependencies have succeeded,
+        running at most max_concurrent_steps steps at the same time.
+        No more steps are started once a step raises an exception.
+        Returns the first failed step and its exception, if any.
+        """
+        pending_steps = list(self.steps)
+        succeeded_steps: Set[str] = set()
+        running_steps: Dict[Future, str] = {}
+        failures: List[Tuple[str, Exception]] = []
+
+        executor = (
+            ThreadPoolExecutor(self.max_concurrent_steps, thread_name_prefix=f"job-{self.job.id}")
+            if self.max_concurrent_steps > 1
+            else nullcontext()
+        )
+        with executor:
+            while True:
+                ready_steps = [
+                    step
+                    for step in pending_steps
+                    if self._steps_dependencies[step] <= succeeded_steps
+                ]
+                while (
+                    not failures and ready_steps and len(running_steps) < self.max_concurrent_steps
+                ):
+                    step = ready_steps.pop(0)
+                    pending_steps.remove(step)
+                    running_steps[self._submit_step(executor, step)] = step
+
+                if not running_steps:
+                    break
+
+                done, _ = wait(running_steps, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running_steps.pop(future)
+                    if e := future.exception():
+                        if failures:
+                            logger.info(f"Step {step} also failed: {e.__class__.__name__}")
+                        failures.append((step, e))
+                    else:
+                        succeeded_steps.add(step)
+
+        return failures[0] if failures else None
+
+    def _submit_step(self, executor: ThreadPoolExecutor | nullcontext, step: str) -> Future:
+        """
+        Starts the passed step in the executor's thread pool,
+        or runs it in the calling thread when steps aren't run concurrently.
+        """
+        step_metric = self._start_step_metric(step)
+
+        if isinstance(executor, ThreadPoolExecutor):
+            return executor.submit(self._run_step_in_thread, step, step_metric)
+
+        future = Future()
+        try:
+            self._run_step(step, step_metric)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+
+        return future
+
+    def _run_step(self, step: str, step_metric: JobStepMetric) -> None:
+        self._thread_step_metric.value = step_metric
+
+        try:
+            self.on_step_start(step)
+            getattr(self, step)()
+        except Exception:
+            self._end_step_metric(step_metric, succeeded=False)
+            raise
+
+        self._end_step_metric(step_metric, succeeded=True)
+
+    def _run_step_in_thread(self, step: str, step_metric: JobStepMetric) -> None:
+        try:
+            self._run_step(step, step_metric)
+        finally:
+            # Threads open their own db connections, which must be closed explicitly
+            connection.close()
+
     def _lookup_handler(self, step: str, e: Exception) -> Callable | None:
         """ """
         if handler := self._exception_handlers_functions.get((step, e.__class__)):
@@ -1,9 +1,15 @@
+import shutil
+from typing import Dict
+
+from django.conf import settings
+from django.db.models import Sum
+
 from scpca_portal import notifications, s3, utils
 from scpca_portal.config.logging import get_and_configure_logger
 from scpca_portal.enums import JobStates
 from scpca_portal.exceptions import DatasetLockedProjectError, DatasetMissingLibrariesError
 from scpca_portal.job_processors import JobProcessorABC
-from scpca_portal.models import ComputedFile
+from scpca_portal.models import ComputedFile, Job
 
 logger = get_and_configure_logger(__name__)
 
@@ -13,20 +19,47 @@ class DatasetJobProcessor(JobProcessorABC):
     steps = [
         "setup_work_dir",
         "purge_old_computed_file",
+        "download_original_files",
+        "generate_metadata_files",
         "create_new_computed_file",
         "upload_new_computed_file",
         "clean_up_local_computed_file",
         "send_notification",
     ]
 
+    # Original files are downloaded while the old computed file is purged
+    # and metadata files are generated in the work dir
+    step_dependencies = {
+        "purge_old_computed_file": [],
+        "download_original_files": ["setup_work_dir"],
+        "generate_metadata_files": ["setup_work_dir"],
+        "create_new_computed_file": [
+            "purge_old_computed_file",
+            "download_original_files",
+            "generate_metadata_files",
+        ],
+    }
+
+    max_concurrent_steps = 3
+
     exception_handlers = {
+        ("download_original_files", DatasetLockedProjectError): "handle_locked_project",
         ("create_new_computed_file", DatasetLockedProjectError): "handle_locked_project",
         ("create_new_computed_file", DatasetMissingLibrariesError): "handle_missing_libraries",
     }
 
+    def __init__(self, job: Job):
+        super().__init__(job)
+        self.is_computed_file_uploaded = False
+        self.is_original_files_downloaded = False
+        self.metadata_file_paths = {}
+        self.reusable_computed_file = None
+
     # Logging
     def on_run(self):
         logger.info(f"Processing {self.job.id} - {self.job.batch_job_id} - {self.job.dataset}")
+        # Looked up once before steps run concurrently, rather than by whichever step is first
+        self.reusable_computed_file = self.job.dataset.get_reusable_computed_file()
 
     def on_step_start(self, step: str):
         logger.info(f"Entering step: {step}")
@@ -57,18 +90,93 @@ class DatasetJobProcessor(JobProcessorABC):
         if self.job.dataset.computed_file:
             self.job.dataset.computed_file.purge(delete_from_s3=True)
 
+    @property
+    def has_checkpoint_entries(self) -> bool:
+        # Uploads with checkpointed entries download their own files (see upload_dataset_file)
+        return settings.DATASET_JOB_CHECKPOINTS and bool(self.job.checkpoint.get("entries"))
+
+    def download_original_files(self):
+        # Identical archives are copied, and resumed uploads only download their remaining files
+        if self.reusable_computed_file or self.has_checkpoint_entries:
+            return
+
+        self.download_dataset_files()
+
+    def download_dataset_files(self):
+        if self.job.dataset.is_locked:
+            raise DatasetLockedProjectError(self.job.dataset)
+
+        original_files = self.job.dataset.original_files
+        ComputedFile.download_dataset_files(self.job.dataset, original_files)
+        self.is_original_files_downloaded = True
+        self.add_step_metrics(
+            bytes_downloaded=original_files.aggregate(size=Sum("size_in_bytes"))["size"] or 0
+        )
+
+    def generate_metadata_files(self):
+        # Metadata files are written to the work dir, and copied into the archive later
+        if self.reusable_computed_file:
+            return
+
+        self.metadata_file_paths = ComputedFile.write_local_metadata_files(self.job.dataset)
+
     def create_new_computed_file(self):
-        self.job.dataset.computed_file = ComputedFile.get_dataset_file(self.job.dataset)
+        # Archives identical to another dataset's are copied within s3
+        if reusable_computed_file := self.reusable_computed_file:
+            logger.info(f"Copying identical archive of computed file {reusable_computed_file.id}")
+            if computed_file := ComputedFile.get_dataset_file_copy(
+                self.job.dataset, reusable_computed_file
+            ):
+                self.job.dataset.computed_file = computed_file
+                self.job.dataset.computed_file.save()
+                self.job.dataset.save()
+                self.is_computed_file_uploaded = True
+                return
+
+        if settings.DATASET_JOB_CHECKPOINTS:
+            # Original files weren't downloaded if an identical archive failed to be copied
+            if not self.is_original_files_downloaded and not self.has_checkpoint_entries:
+                self.download_dataset_files()
+
+            # The archive is uploaded while it's created, resuming from an interrupted attempt
+            self.job.dataset.computed_file = ComputedFile.get_dataset_file(
+                self.job.dataset,
+                checkpoint=self.job.checkpoint,
+                on_checkpoint=self.save_checkpoint,
+                metadata_file_paths=self.metadata_file_paths,
+            )
+            self.save_checkpoint({})
+            self.add_step_metrics(bytes_uploaded=self.job.dataset.computed_file.size_in_bytes)
+            self.is_computed_file_uploaded = True
+        else:
+            self.job.dataset.computed_file = ComputedFile.get_dataset_file(
+                self.job.dataset, metadata_file_paths=self.metadata_file_paths
+            )
         self.job.dataset.computed_file.save()
         self.job.dataset.save()
 
-    def handle_locked_project(self, step: str, e: Exception):
+        original_files = self.job.dataset.original_files
+        self.add_step_metrics(
+            bytes_written=self.job.dataset.computed_file.size_in_bytes,
+            file_count=original_files.count(),
+        )
+        # Original files are downloaded here when resuming an upload or when a copy failed
+        if not self.is_original_files_downloaded:
+            self.add_step_metrics(
+                bytes_downloaded=original_files.aggregate(size=Sum("size_in_bytes"))["size"] or 0
+            )
+
+    def save_checkpoint(self, checkpoint: Dict):
+        self.job.checkpoint = checkpoint
+        self.job.save(update_fields=["checkpoint", "updated_at"])
+
+    def handle_locked_project(self, e: Exception):
         self.job.apply_state(JobStates.FAILED, reason="Dataset contains locked project.")
         self.job.save()
         self.job.dataset.save()
         self.job.create_retry_job()
 
-    def handle_missing_libraries(self, step: str, e: Exception):
+    def handle_missing_libraries(self, e: Exception):
         self.job.apply_state(JobStates.FAILED, reason="Dataset contains missing libraries.")
         self.job.save()
         self.job.dataset.save()
@@ -77,12 +185,18 @@ class DatasetJobProcessor(JobProcessorABC):
             notifications.send_dataset_job_error_email(self.job)
 
     def upload_new_computed_file(self):
-        s3.upload_output_file(
+        # Copied and checkpointed archives were uploaded while they were created
+        if self.is_computed_file_uploaded:
+            return
+
+        if s3.upload_output_file(
             self.job.dataset.computed_file.s3_key, self.job.dataset.computed_file.s3_bucket
-        )
+        ):
+            self.add_step_metrics(bytes_uploaded=self.job.dataset.computed_file.size_in_bytes)
 
     def clean_up_local_computed_file(self):
         self.job.dataset.computed_file.clean_up_local_computed_file()
+        shutil.rmtree(self.job.dataset.metadata_files_local_dir, ignore_errors=True)
 
     def send_notification(self):
         if self.job.dataset.email:
@@ -1,13 +1,16 @@
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from functools import partial
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, NamedTuple, Set
 
 from django.conf import settings
-from django.db import connection
+from django.db import connection, connections, transaction
 from django.template.defaultfilters import pluralize
 
-from scpca_portal import s3
+from scpca_portal import s3, utils
 from scpca_portal.config.logging import get_and_configure_logger
+from scpca_portal.enums import ProjectLoadStates
 from scpca_portal.models import (
     ComputedFile,
     Contact,
@@ -49,8 +52,16 @@ def _can_process_project(project_metadata: Dict[str, Any], submitter_whitelist:
     - Input files exist for the project
     - The project's pi is on the whitelist of acceptable submitters
     """
-    project_path = settings.INPUT_DATA_PATH / project_metadata["scpca_project_id"]
-    if project_path not in settings.INPUT_DATA_PATH.iterdir():
+    project_id = project_metadata["scpca_project_id"]
+    if settings.LOAD_METADATA_FROM_S3:
+        # Nothing is downloaded, so check the synced input files instead
+        has_input_files = OriginalFile.objects.filter(project_id=project_id).exists()
+    else:
+        has_input_files = (
+            settings.INPUT_DATA_PATH / project_id in settings.INPUT_DATA_PATH.iterdir()
+        )
+
+    if not has_input_files:
         logger.warning(
             f"Metadata found for {project_metadata['scpca_project_id']},"
             "but no s3 folder of that name exists."
@@ -110,7 +121,9 @@ def create_project(
             return
 
     logger.info(f"Importing Project {project_metadata['scpca_project_id']} data")
+    metadata_hash = Project.get_metadata_hash(project_metadata, bucket=input_bucket_name)
     project = Project.get_from_dict(project_metadata)
+    project.metadata_hash = metadata_hash
     project.s3_input_bucket = input_bucket_name
     project.save()
 
@@ -125,6 +138,168 @@ def create_project(
     return project
 
 
+def update_project(
+    project_metadata: Dict[str, Any],
+    submitter_whitelist: Set[str],
+    input_bucket_name: str,
+    update_s3: bool,
+) -> Project | None:
+    """
+    Validate that a project can be processed, then update the existing project in place,
+    only applying the changes between its metadata and what's stored in the db.
+    Projects which don't exist yet are created. Return the updated project.
+    """
+    if not _can_process_project(project_metadata, submitter_whitelist):
+        return
+
+    project_id = project_metadata["scpca_project_id"]
+    project = Project.objects.filter(scpca_id=project_id).first()
+    if not project:
+        return create_project(
+            project_metadata, submitter_whitelist, input_bucket_name, False, update_s3
+        )
+
+    logger.info(f"Updating '{project}'")
+    project.metadata_hash = Project.get_metadata_hash(project_metadata, bucket=input_bucket_name)
+    is_changed = project.update_from_dict(project_metadata)
+    project.s3_input_bucket = input_bucket_name
+    project.save()
+
+    related_ids = _get_project_related_ids(project)
+    project.contacts.clear()
+    project.external_accessions.clear()
+    project.publications.clear()
+    Contact.bulk_create_from_project_data(project_metadata, project)
+    ExternalAccession.bulk_create_from_project_data(project_metadata, project)
+    Publication.bulk_create_from_project_data(project_metadata, project)
+    is_changed |= related_ids != _get_project_related_ids(project)
+
+    project.update_metadata(is_changed=is_changed, delete_from_s3=update_s3)
+
+    return project
+
+
+def _get_project_related_ids(project: Project) -> List[Set[int]]:
+    return [
+        set(project.contacts.values_list("pk", flat=True)),
+        set(project.external_accessions.values_list("pk", flat=True)),
+        set(project.publications.values_list("pk", flat=True)),
+    ]
+
+
+class ProjectLoadResult(NamedTuple):
+    project_id: str | None
+    state: ProjectLoadStates
+    duration: float  # in seconds
+    error: str | None = None
+
+
+def _is_project_unchanged(
+    project_metadata: Dict[str, Any], input_bucket_name: str, reload_existing: bool
+) -> bool:
+    """
+    Return whether the project was previously loaded from the same metadata.
+    Only projects which would otherwise be reloaded are checked.
+    """
+    if not reload_existing:
+        return False
+
+    project_id = project_metadata.get("scpca_project_id")
+    stored_metadata_hash = (
+        Project.objects.filter(scpca_id=project_id).values_list("metadata_hash", flat=True).first()
+    )
+
+    return stored_metadata_hash is not None and stored_metadata_hash == Project.get_metadata_hash(
+        project_metadata, bucket=input_bucket_name
+    )
+
+
+def load_project(
+    project_metadata: Dict[str, Any],
+    submitter_whitelist: Set[str],
+    input_bucket_name: str,
+    reload_existing: bool,
+    update_s3: bool,
+    clean_up_input_data: bool,
+    incremental: bool = False,
+    skip_unchanged: bool = False,
+) -> ProjectLoadResult:
+    """
+    Creates a project and all of its related data within a single transaction,
+    cleans up its input files, and returns the outcome along with how long it took.
+    Existing projects are updated in place rather than recreated when incremental is passed,
+    and are skipped if their metadata hash is unchanged when skip_unchanged is passed.
+    Errors are logged and returned rather than raised, so that other projects can still load.
+    """
+    project_id = project_metadata.get("scpca_project_id")
+    start = time.perf_counter()
+
+    try:
+        if skip_unchanged and _is_project_unchanged(
+            project_metadata, input_bucket_name, reload_existing
+        ):
+            logger.info(f"{project_id} metadata is unchanged, skipping.")
+            return ProjectLoadResult(
+                project_id, ProjectLoadStates.UNCHANGED, time.perf_counter() - start
+            )
+
+        is_existing = Project.objects.filter(scpca_id=project_id).exists()
+        with transaction.atomic():
+            if incremental and reload_existing:
+                project = update_project(
+                    project_metadata, submitter_whitelist, input_bucket_name, update_s3
+                )
+            else:
+                project = create_project(
+                    project_metadata,
+                    submitter_whitelist,
+                    input_bucket_name,
+                    reload_existing,
+                    update_s3,
+                )
+
+        if project and clean_up_input_data:
+            logger.info(f"Cleaning up '{project}' input files")
+            utils.remove_nested_data_dirs(project.scpca_id)
+    except Exception as error:
+        logger.exception(f"Failed to load {project_id}.")
+        return ProjectLoadResult(
+            project_id, ProjectLoadStates.FAILED, time.perf_counter() - start, str(error)
+        )
+
+    state = ProjectLoadStates.SKIPPED
+    if project:
+        state = ProjectLoadStates.RELOADED if is_existing else ProjectLoadStates.LOADED
+
+    return ProjectLoadResult(project_id, state, time.perf_counter() - start)
+
+
+def _init_load_projects_worker() -> None:
+    """Drops clients inherited from the parent process so that each worker creates its own."""
+    s3.get_aws_s3.cache_clear()
+
+
+def load_projects(
+    projects_metadata: List[Dict[str, Any]], max_workers: int, **kwargs
+) -> List[ProjectLoadResult]:
+    """
+    Loads the passed projects, concurrently in a pool of worker processes if max_workers > 1.
+    Each worker process opens its own db connection, and each project is loaded in its own
+    transaction. Keyword arguments are passed on to load_project.
+    """
+    if max_workers <= 1:
+        return [load_project(project_metadata, **kwargs) for project_metadata in projects_metadata]
+
+    # Forked workers must not share the parent's db connections, they each open their own
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_load_projects_worker,
+    ) as executor:
+        return list(executor.map(partial(load_project, **kwargs), projects_metadata))
+
+
 # TODO: Remove after the dataset release
 def _create_computed_file(
     computed_file: ComputedFile, update_s3: bool, clean_up_output_data: bool
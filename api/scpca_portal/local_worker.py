@@ -0,0 +1,167 @@
+"""
+A db backed alternative to AWS Batch, for self hosted deployments and local testing.
+
+When settings.JOB_EXECUTOR is LOCAL, submitted jobs are left PENDING in the db,
+and are claimed by worker processes with SELECT ... FOR UPDATE SKIP LOCKED (see Job.claim_pending).
+While processing a job, each worker regularly saves a heartbeat to the job,
+so that jobs of workers which have died can be failed and retried (see Job.recover_stale).
+Throughput is scaled by running more worker processes.
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from multiprocessing.sharedctypes import Synchronized
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.timezone import make_aware
+
+from scpca_portal import s3
+from scpca_portal.config.logging import get_and_configure_logger
+from scpca_portal.job_processors import DatasetJobProcessor
+from scpca_portal.models import Job
+
+logger = get_and_configure_logger(__name__)
+
+
+def get_worker_id(pid: int | None = None) -> str:
+    """Returns an id which identifies the worker process with the passed pid, or the current one."""
+    return f"{socket.gethostname()}-{pid or os.getpid()}"
+
+
+@contextmanager
+def heartbeat(job: Job, interval: float):
+    """Saves a heartbeat to the passed job every interval seconds, until the context exits."""
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(interval):
+            Job.objects.filter(pk=job.pk).update(heartbeat_at=make_aware(datetime.now()))
+        # Threads open their own db connections, which must be closed explicitly
+        connection.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def process_job(job: Job) -> bool:
+    """
+    Processes the passed claimed job while sending heartbeats.
+    Returns whether or not the job succeeded.
+    """
+    with heartbeat(job, settings.LOCAL_WORKER_HEARTBEAT_SECONDS):
+        try:
+            DatasetJobProcessor(job).run()
+        except Exception:
+            # The processor has already logged the error and saved the job as FAILED
+            return False
+
+    return True
+
+
+def run_worker(poll_seconds: float, until_empty: bool = False) -> int:
+    """
+    Claims and processes PENDING jobs one at a time.
+    Polls for new jobs when there are none left, or returns if until_empty is passed.
+    Returns the number of processed jobs.
+    """
+    worker_id = get_worker_id()
+    logger.info("Worker started.", worker_id=worker_id)
+
+    processed_count = 0
+    while True:
+        if job := Job.claim_pending(worker_id=worker_id):
+            logger.info(f"Claimed job {job.id}.", worker_id=worker_id)
+            process_job(job)
+            processed_count += 1
+            continue
+
+        if until_empty:
+            logger.info(f"Processed {processed_count} jobs.", worker_id=worker_id)
+            return processed_count
+
+        time.sleep(poll_seconds)
+
+
+def _run_worker_process(poll_seconds: float, until_empty: bool, processed_count: Synchronized):
+    """
+    Runs a worker in a child process and adds its number of processed jobs to processed_count.
+    Clients inherited from the parent process are dropped so that each worker creates its own.
+    """
+    s3.get_aws_s3.cache_clear()
+    count = run_worker(poll_seconds, until_empty)
+    with processed_count.get_lock():
+        processed_count.value += count
+
+
+def run_workers(processes: int, poll_seconds: float, until_empty: bool = False) -> int:
+    """
+    Runs and supervises worker processes, and recovers jobs of dead workers while they run.
+    Workers which exit unexpectedly (e.g. killed by the OOM killer) are replaced,
+    and their jobs are failed and retried right away rather than once their heartbeat is stale.
+    Returns the number of jobs processed by all workers which exited normally.
+    """
+    if processes <= 1:
+        Job.recover_stale(settings.LOCAL_WORKER_STALE_SECONDS)
+        return run_worker(poll_seconds, until_empty)
+
+    context = multiprocessing.get_context("fork")
+    processed_count = context.Value("i", 0)
+
+    def start_worker() -> multiprocessing.Process:
+        worker = context.Process(
+            target=_run_worker_process, args=(poll_seconds, until_empty, processed_count)
+        )
+        worker.start()
+        return worker
+
+    # Forked workers must not share the parent's db connections, they each open their own
+    connections.close_all()
+    workers = [start_worker() for _ in range(processes)]
+    try:
+        while workers:
+            Job.recover_stale(settings.LOCAL_WORKER_STALE_SECONDS)
+            multiprocessing.connection.wait(
+                [worker.sentinel for worker in workers],
+                timeout=settings.LOCAL_WORKER_STALE_SECONDS,
+            )
+
+            exited_workers = [worker for worker in workers if not worker.is_alive()]
+            workers = [worker for worker in workers if worker.is_alive()]
+
+            dead_worker_ids = []
+            for worker in exited_workers:
+                worker.join()
+                # Workers only exit on their own once there are no jobs left to process
+                if worker.exitcode == 0 and until_empty:
+                    continue
+
+                worker_id = get_worker_id(worker.pid)
+                logger.warning(
+                    f"Worker exited with code {worker.exitcode}, starting a replacement.",
+                    worker_id=worker_id,
+                )
+                dead_worker_ids.append(worker_id)
+
+            if dead_worker_ids:
+                # Retry jobs are created before replacements start, so that they're claimed
+                Job.recover_stale(settings.LOCAL_WORKER_STALE_SECONDS, dead_worker_ids)
+                connections.close_all()
+                workers.extend(start_worker() for _ in dead_worker_ids)
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+    return processed_count.value
@@ -24,6 +24,10 @@ class Command(BaseCommand):
         Queued jobs are picked up by the submit_pending command.
         By default, failed jobs are queued.
         """
+        array_help_text = """
+        Array submits the datasets' jobs as AWS Batch array jobs, one per queue,
+        instead of one batch job per dataset.
+        """
 
         parser.add_argument(
             "--ignore-hash",
@@ -37,11 +41,17 @@ class Command(BaseCommand):
             action=BooleanOptionalAction,
             help=retry_failed_jobs_help_text,
         )
+        parser.add_argument(
+            "--array",
+            default=False,
+            action=BooleanOptionalAction,
+            help=array_help_text,
+        )
 
     def handle(self, *args, **kwargs):
         self.create_ccdl_datasets(**kwargs)
 
-    def create_ccdl_datasets(self, ignore_hash, retry_failed_jobs, **kwargs) -> None:
+    def create_ccdl_datasets(self, ignore_hash, retry_failed_jobs, array, **kwargs) -> None:
         created_datasets, updated_datasets = CCDLDataset.create_or_update_ccdl_datasets(
             ignore_hash=ignore_hash
         )
@@ -52,7 +62,9 @@ class Command(BaseCommand):
             updated_count = len(updated_datasets)
             logger.info(f"{updated_count} existing dataset{pluralize(updated_count)} updated.")
 
-        submitted_jobs, failed_jobs = Job.submit_ccdl_datasets(created_datasets + updated_datasets)
+        submitted_jobs, failed_jobs = Job.submit_ccdl_datasets(
+            created_datasets + updated_datasets, as_array=array
+        )
         if submitted_jobs:
             submitted_count = len(submitted_jobs)
             logger.info(
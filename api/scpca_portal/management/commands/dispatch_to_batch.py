@@ -1,7 +1,7 @@
 from argparse import BooleanOptionalAction
 from collections import Counter
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.template.defaultfilters import pluralize
 
 from scpca_portal.config.logging import get_and_configure_logger
@@ -16,6 +16,7 @@ class Command(BaseCommand):
     for projects for which computed files have yet to be generated for them.
     If regenerate-all is passed, then presence of existing computed files are ignored.
     If a project-id is passed, then all other projects will be ignored.
+    If array is passed, jobs are submitted as array jobs instead of one batch job per file.
     """
 
     def add_arguments(self, parser):
@@ -23,11 +24,14 @@ class Command(BaseCommand):
         parser.add_argument("--project-id", type=str, default="")
         # for now, we're only notifying on submission of the last project job
         parser.add_argument("--notify", default=False, action=BooleanOptionalAction)
+        parser.add_argument("--array", default=False, action=BooleanOptionalAction)
 
     def handle(self, *args, **kwargs):
         self.dispatch_to_batch(**kwargs)
 
-    def dispatch_to_batch(self, project_id: str, regenerate_all: bool, notify: bool, **kwargs):
+    def dispatch_to_batch(
+        self, project_id: str, regenerate_all: bool, notify: bool, array: bool, **kwargs
+    ):
         """
         Iterate over all projects that fit the criteria of the passed flags
         and submit jobs to Batch accordingly.
@@ -41,6 +45,7 @@ class Command(BaseCommand):
             projects = projects.filter(scpca_id=project_id)
 
         job_counts = Counter()
+        array_jobs = []
 
         project_list = list(projects)  # convert to list to be able to index below
         for project in project_list:
@@ -56,7 +61,10 @@ class Command(BaseCommand):
                     notify=is_last_job and notify,
                 )
 
-                job.submit()
+                if array:
+                    array_jobs.append(job)
+                else:
+                    job.submit()
                 job_counts["project"] += 1
 
             for sample in project.samples_to_generate:
@@ -66,9 +74,20 @@ class Command(BaseCommand):
                         download_config_name=download_config_name,
                     )
 
-                    job.submit()
+                    if array:
+                        array_jobs.append(job)
+                    else:
+                        job.submit()
                     job_counts["sample"] += 1
 
+        if array_jobs:
+            _, unsubmitted_jobs = Job.bulk_submit(array_jobs, as_array=True)
+            if unsubmitted_jobs:
+                raise CommandError(
+                    f"Failed to submit {len(unsubmitted_jobs)} job{pluralize(unsubmitted_jobs)}: "
+                    f"{', '.join(job.batch_job_name for job in unsubmitted_jobs)}"
+                )
+
         total_job_count = sum(job_counts.values())
         logger.info(
             "Job submission complete. "
@@ -4,7 +4,7 @@ from django.core.management.base import BaseCommand
 
 from scpca_portal import common, loader, notifications, utils
 from scpca_portal.config.logging import get_and_configure_logger
-from scpca_portal.models import Project, Sample
+from scpca_portal.models import Job, Project, Sample
 
 logger = get_and_configure_logger(__name__)
 
@@ -20,6 +20,9 @@ class Command(BaseCommand):
 
     At which point the instance which generated this computed file will receive a new job
     from the job queue and begin computing the next file.
+
+    When run as a child of an array job, the array name is passed instead,
+    and the arguments are read from the job resolved from the child's AWS_BATCH_JOB_ARRAY_INDEX.
     """
 
     def add_arguments(self, parser):
@@ -27,8 +30,15 @@ class Command(BaseCommand):
         parser.add_argument("--sample-id", type=str)
         parser.add_argument("--download-config-name", type=str)
         parser.add_argument("--notify", default=False, action=BooleanOptionalAction)
+        parser.add_argument("--array-name", type=str)
 
     def handle(self, *args, **kwargs):
+        if array_name := kwargs.get("array_name"):
+            job = Job.get_array_job(array_name)
+            # The job's command is ["python", "manage.py", "generate_computed_file", *args]
+            parser = self.create_parser("manage.py", "generate_computed_file")
+            kwargs = vars(parser.parse_args(job.batch_container_overrides["command"][3:]))
+
         self.generate_computed_file(**kwargs)
 
     def generate_computed_file(
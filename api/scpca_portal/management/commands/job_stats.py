@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import make_aware
+
+from scpca_portal import common
+from scpca_portal.config.logging import get_and_configure_logger
+from scpca_portal.models import JobStepMetric
+
+logger = get_and_configure_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = """
+    Reports the p50 and p95 duration and throughput of each job processing step,
+    per dataset size bucket, from the recorded JobStepMetrics of successful steps.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=7, help="Only report on steps started in the last N days."
+        )
+
+    def handle(self, *args, **kwargs):
+        self.job_stats(**kwargs)
+
+    def job_stats(self, days: int, **kwargs) -> None:
+        since = make_aware(datetime.now()) - timedelta(days=days)
+        stats = JobStepMetric.get_stats(since=since)
+
+        if not stats:
+            logger.info(f"No job step metrics were recorded in the last {days} days.")
+            return
+
+        logger.info(f"Job step stats for the last {days} days:\n{self.format(stats)}")
+
+    @staticmethod
+    def format(stats: List[Dict]) -> str:
+        header = (
+            f"\t{'step':<30} {'size':<12} {'count':>6} "
+            f"{'p50 (s)':>9} {'p95 (s)':>9} {'p50 (MB/s)':>11} {'p95 (MB/s)':>11} "
+            f"{'peak RSS (MB)':>14}"
+        )
+        rows = [
+            f"\t{stat['step']:<30} {stat['size_bucket']:<12} {stat['count']:>6} "
+            f"{stat['duration_p50']:>9.2f} {stat['duration_p95']:>9.2f} "
+            f"{stat['throughput_p50'] / common.MB_IN_BYTES:>11.2f} "
+            f"{stat['throughput_p95'] / common.MB_IN_BYTES:>11.2f} "
+            f"{(stat['peak_rss_in_bytes'] or 0) / common.MB_IN_BYTES:>14.1f}"
+            for stat in stats
+        ]
+        return "\n".join([header, *rows])
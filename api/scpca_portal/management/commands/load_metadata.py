@@ -1,11 +1,15 @@
+import time
 from argparse import BooleanOptionalAction
+from collections import Counter
 from typing import Set
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import pluralize
 
 from scpca_portal import common, loader, lockfile, metadata_parser, utils
 from scpca_portal.config.logging import get_and_configure_logger
+from scpca_portal.enums import ProjectLoadStates
 from scpca_portal.models import OriginalFile, Project
 
 logger = get_and_configure_logger(__name__)
@@ -21,6 +25,12 @@ class Command(BaseCommand):
         /SCPCP000001/samples_metadata.csv
         /SCPCP000001/SCPCS000001/SCPCL000001_metadata.json
         /SCPCP000001/SCPCS000002/SCPCL000002_spatial/SCPCL000002_metadata.json
+
+    Metadata files are downloaded before they are parsed,
+    unless LOAD_METADATA_FROM_S3 is set, in which case they are read directly from the bucket.
+
+    With --workers greater than 1, projects are loaded concurrently in a pool of worker processes.
+    Each project is loaded in its own transaction, so a failed project doesn't affect the others.
     """
 
     def add_arguments(self, parser):
@@ -49,6 +59,26 @@ class Command(BaseCommand):
             "--reload-existing", action="store_true", default=False, help=reload_existing_help_text
         )
 
+        incremental_help_text = """
+        Used with --reload-existing. Update existing projects in place, only applying
+        what changed in their metadata, instead of purging and recreating them.
+        Computed files of unchanged samples are kept.
+        """
+        parser.add_argument(
+            "--incremental", action="store_true", default=False, help=incremental_help_text
+        )
+
+        skip_unchanged_help_text = """
+        Skip reloading existing projects whose metadata and input files are unchanged
+        since they were last loaded.
+        """
+        parser.add_argument(
+            "--skip-unchanged",
+            action=BooleanOptionalAction,
+            default=True,
+            help=skip_unchanged_help_text,
+        )
+
         reload_locked_help_text = """
         Only reload projects that were previously in the lockfile but have since been removed.
         """
@@ -59,6 +89,9 @@ class Command(BaseCommand):
         scpca_portal_id_help_text = "Reload an individual project."
         parser.add_argument("--scpca-project-id", type=str, help=scpca_portal_id_help_text)
 
+        workers_help_text = "Number of worker processes to load projects with."
+        parser.add_argument("--workers", type=int, default=1, help=workers_help_text)
+
     def handle(self, *args, **kwargs):
         self.load_metadata(**kwargs)
 
@@ -70,10 +103,13 @@ class Command(BaseCommand):
         input_bucket_name: str,
         clean_up_input_data: bool,
         reload_existing: bool,
+        incremental: bool,
+        skip_unchanged: bool,
         reload_locked: bool,
         scpca_project_id: str,
         update_s3: bool,
         submitter_whitelist: Set[str],
+        workers: int = 1,
         **kwargs,
     ) -> None:
         """Loads metadata from input metadata files on s3 and creates model objects in the db."""
@@ -83,7 +119,8 @@ class Command(BaseCommand):
             )
 
         utils.create_data_dirs()
-        loader.download_projects_metadata()
+        if not settings.LOAD_METADATA_FROM_S3:
+            loader.download_projects_metadata()
 
         projects_metadata_ids = set(metadata_parser.get_projects_metadata_ids())
         locked_project_ids = set(lockfile.get_locked_project_ids())
@@ -104,13 +141,41 @@ class Command(BaseCommand):
                 logger.info(f"{scpca_project_id} is not available to reload.")
                 return
 
-        loader.download_projects_related_metadata(filter_on_project_ids)
-        for project_metadata in metadata_parser.load_projects_metadata(filter_on_project_ids):
-            # validate that a project can be added to the db,
-            # then creates it, all its samples and libraries, and all other relations
-            if project := loader.create_project(
-                project_metadata, submitter_whitelist, input_bucket_name, reload_existing, update_s3
-            ):
-                if clean_up_input_data:
-                    logger.info(f"Cleaning up '{project}' input files")
-                    utils.remove_nested_data_dirs(project.scpca_id)
+        if not settings.LOAD_METADATA_FROM_S3:
+            loader.download_projects_related_metadata(filter_on_project_ids)
+
+        # validate that each project can be added to the db,
+        # then creates it, all its samples and libraries, and all other relations
+        start = time.perf_counter()
+        results = loader.load_projects(
+            metadata_parser.load_projects_metadata(filter_on_project_ids),
+            max_workers=workers,
+            submitter_whitelist=submitter_whitelist,
+            input_bucket_name=input_bucket_name,
+            reload_existing=reload_existing,
+            update_s3=update_s3,
+            clean_up_input_data=clean_up_input_data,
+            incremental=incremental,
+            skip_unchanged=skip_unchanged,
+        )
+
+        for result in results:
+            logger.info(
+                f"{result.project_id} {result.state.label.lower()} in {result.duration:.1f}s."
+            )
+
+        states_counts = Counter(result.state for result in results)
+        logger.info(
+            f"Loaded {states_counts[ProjectLoadStates.LOADED]},"
+            f" reloaded {states_counts[ProjectLoadStates.RELOADED]},"
+            f" skipped {states_counts[ProjectLoadStates.UNCHANGED]} unchanged,"
+            f" skipped {states_counts[ProjectLoadStates.SKIPPED]} other"
+            f" and failed {states_counts[ProjectLoadStates.FAILED]}"
+            f" project{pluralize(len(results))} in {time.perf_counter() - start:.1f}s."
+        )
+
+        failed_project_ids = [
+            result.project_id for result in results if result.state == ProjectLoadStates.FAILED
+        ]
+        if failed_project_ids:
+            raise CommandError(f"Failed to load: {', '.join(failed_project_ids)}")
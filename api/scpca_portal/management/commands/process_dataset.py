@@ -1,4 +1,10 @@
-from django.core.management.base import BaseCommand
+import os
+from argparse import BooleanOptionalAction
+from typing import Iterator, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import pluralize
 
 from scpca_portal.config.logging import get_and_configure_logger
 from scpca_portal.job_processors import DatasetJobProcessor
@@ -12,16 +18,94 @@ class Command(BaseCommand):
     This command is meant to be called as an entrypoint to a AWS Batch job instance.
     Individual files are computed according to their passed dataset.
 
+    When run as a child of an array job, the array name is passed instead of a job id,
+    and the job is resolved from the child's AWS_BATCH_JOB_ARRAY_INDEX.
+
+    Multiple jobs can be processed in one container, to avoid paying container startup
+    for each small dataset. Jobs passed via job-ids are processed in order.
+    If drain is passed, PENDING jobs with datasets of at most AWS_BATCH_PACK_MAX_SIZE_IN_BYTES
+    are then claimed and processed until there are none left.
+    Downloaded input files and the db connection are reused between jobs.
+
     Processing details can be found in: scpca_portal.job_processors.DatasetJobProcessor
     """
 
     def add_arguments(self, parser):
         parser.add_argument("--job-id", type=str)
+        parser.add_argument("--array-name", type=str)
+        parser.add_argument(
+            "--job-ids",
+            type=lambda job_ids: job_ids.split(","),
+            default=[],
+            help="Comma separated ids of jobs to process in order.",
+        )
+        parser.add_argument("--drain", default=False, action=BooleanOptionalAction)
 
     def handle(self, *args, **kwargs):
         self.process_dataset(**kwargs)
 
-    def process_dataset(self, job_id: str, **kwargs) -> None:
-        job = Job.objects.get(id=job_id)
+    def process_dataset(
+        self, job_id: str, array_name: str, job_ids: List[str], drain: bool, **kwargs
+    ) -> None:
+        if job_ids or drain:
+            self.process_datasets(job_ids, drain)
+            return
+
+        if job_id:
+            job = Job.objects.get(id=job_id)
+        elif array_name:
+            job = Job.get_array_job(array_name)
+        else:
+            raise CommandError("Either a job id, job ids, an array name or drain must be passed.")
+
         processor = DatasetJobProcessor(job)
         processor.run()
+
+    def process_datasets(self, job_ids: List[str], drain: bool) -> None:
+        """
+        Processes the passed jobs and, if drain is passed, claimed PENDING jobs.
+        A job which fails doesn't stop the remaining jobs from being processed.
+        """
+        processed_count = 0
+        failed_jobs = []
+
+        for job in self.get_jobs(job_ids, drain):
+            processed_count += 1
+            try:
+                DatasetJobProcessor(job).run()
+            except Exception:
+                # The processor has already logged the error and saved the job as FAILED
+                failed_jobs.append(job)
+
+        logger.info(f"Processed {processed_count} job{pluralize(processed_count)}.")
+        if failed_jobs:
+            raise CommandError(
+                f"{len(failed_jobs)} job{pluralize(failed_jobs)} failed: "
+                f"{', '.join(str(job.id) for job in failed_jobs)}"
+            )
+
+    @staticmethod
+    def get_jobs(job_ids: List[str], drain: bool) -> Iterator[Job]:
+        """
+        Yields the passed jobs in order, then claimed PENDING jobs if drain is passed.
+        Passed jobs which don't exist are skipped, so that they don't stop the rest of the pack.
+        """
+        # Datasets are only processed once, so that retries aren't claimed by the same container
+        dataset_ids = set()
+
+        jobs = Job.objects.filter(id__in=job_ids).with_datasets().in_bulk()
+        for job_id in job_ids:
+            if not (job := jobs.get(int(job_id))):
+                logger.warning(f"Job {job_id} doesn't exist, skipping.")
+                continue
+
+            dataset_ids.add(job.dataset_object_id)
+            yield job
+
+        if drain:
+            batch_job_id = os.getenv("AWS_BATCH_JOB_ID")
+            while job := Job.claim_pending(
+                settings.AWS_BATCH_PACK_MAX_SIZE_IN_BYTES, batch_job_id, dataset_ids
+            ):
+                dataset_ids.add(job.dataset_object_id)
+                yield job
@@ -0,0 +1,91 @@
+import subprocess
+import sys
+from typing import List, NamedTuple
+
+from django.core.management.base import BaseCommand
+
+from scpca_portal.config.logging import get_and_configure_logger
+
+logger = get_and_configure_logger(__name__)
+
+IMPORT_TIME_PREFIX = "import time:"
+
+
+class ImportTime(NamedTuple):
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+class Command(BaseCommand):
+    help = """
+    Reports the import time of a management command using `python -X importtime`.
+
+    The passed command's module is imported in a fresh interpreter after Django is set up,
+    which mirrors the startup work done by a Batch container before the command runs.
+    A summary of the total import time and the slowest imports is logged.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--command", type=str, default="process_dataset")
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Number of slowest imports to report."
+        )
+
+    def handle(self, *args, **kwargs):
+        self.profile_import_time(**kwargs)
+
+    def profile_import_time(self, command: str, limit: int, **kwargs) -> None:
+        script = (
+            "import configurations; configurations.setup(); "
+            "from django.core.management import load_command_class; "
+            f"load_command_class('scpca_portal', '{command}')"
+        )
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        import_times = self.parse_import_times(result.stderr)
+        total_us = sum(import_time.self_us for import_time in import_times)
+
+        logger.info(
+            f"Importing '{command}' took {total_us / 1000:.1f}ms "
+            f"across {len(import_times)} modules."
+        )
+
+        top_level_imports = [it for it in import_times if it.depth == 0]
+        logger.info(
+            f"Slowest top level imports (cumulative):\n{self.format(top_level_imports, limit)}"
+        )
+        logger.info(
+            f"Slowest modules (self):\n{self.format(import_times, limit, cumulative=False)}"
+        )
+
+    @staticmethod
+    def parse_import_times(output: str) -> List[ImportTime]:
+        """Parses the stderr output of `python -X importtime` into a list of ImportTimes."""
+        import_times = []
+        for line in output.splitlines():
+            if not line.startswith(IMPORT_TIME_PREFIX):
+                continue
+
+            self_us, cumulative_us, module = line.removeprefix(IMPORT_TIME_PREFIX).split("|")
+            # Skip the header line
+            if not self_us.strip().isdigit():
+                continue
+
+            # Nested imports are indented by two spaces per level
+            depth = (len(module) - len(module.lstrip()) - 1) // 2
+            import_times.append(ImportTime(module.strip(), depth, int(self_us), int(cumulative_us)))
+
+        return import_times
+
+    @staticmethod
+    def format(import_times: List[ImportTime], limit: int, cumulative: bool = True) -> str:
+        key = "cumulative_us" if cumulative else "self_us"
+        slowest = sorted(import_times, key=lambda it: getattr(it, key), reverse=True)[:limit]
+        return "\n".join(f"\t{getattr(it, key) / 1000:>9.1f}ms  {it.module}" for it in slowest)
@@ -0,0 +1,42 @@
+from argparse import BooleanOptionalAction
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import pluralize
+
+from scpca_portal import local_worker
+from scpca_portal.config.logging import get_and_configure_logger
+from scpca_portal.enums import JobExecutors
+
+logger = get_and_configure_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = """
+    Runs a pool of local worker processes which claim and process PENDING dataset jobs
+    from the db, as an alternative to AWS Batch (see scpca_portal.local_worker).
+    Requires the JOB_EXECUTOR setting to be LOCAL, so that jobs aren't also submitted to Batch.
+
+    By default, workers poll for new jobs until they're stopped.
+    If until-empty is passed, workers exit once there are no PENDING jobs left.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=settings.LOCAL_WORKER_PROCESSES)
+        parser.add_argument(
+            "--poll-seconds", type=float, default=settings.LOCAL_WORKER_POLL_SECONDS
+        )
+        parser.add_argument("--until-empty", default=False, action=BooleanOptionalAction)
+
+    def handle(self, *args, **kwargs):
+        self.run_local_workers(**kwargs)
+
+    def run_local_workers(
+        self, processes: int, poll_seconds: float, until_empty: bool, **kwargs
+    ) -> None:
+        if settings.JOB_EXECUTOR != JobExecutors.LOCAL:
+            raise CommandError("Local workers require the JOB_EXECUTOR setting to be LOCAL.")
+
+        logger.info(f"Starting {processes} local worker{pluralize(processes)}.")
+        processed_count = local_worker.run_workers(processes, poll_seconds, until_empty)
+        logger.info(f"Local workers processed {processed_count} job{pluralize(processed_count)}.")
@@ -1,3 +1,5 @@
+from argparse import BooleanOptionalAction
+
 from django.core.management.base import BaseCommand
 
 from scpca_portal.config.logging import get_and_configure_logger
@@ -7,13 +9,19 @@ logger = get_and_configure_logger(__name__)
 
 
 class Command(BaseCommand):
-    help = """Submits all pending jobs to AWS Batch for processing."""
+    help = """
+    Submits all pending jobs to AWS Batch for processing.
+    If pack is passed, jobs with small datasets are packed together and processed in one container.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pack", default=False, action=BooleanOptionalAction)
 
     def handle(self, *args, **kwargs):
-        self.submit_pending()
+        self.submit_pending(**kwargs)
 
-    def submit_pending(self):
-        submitted_jobs, pending_jobs, failed_jobs = Job.submit_pending()
+    def submit_pending(self, pack: bool = False, **kwargs):
+        submitted_jobs, pending_jobs, failed_jobs = Job.submit_pending(pack=pack)
 
         if submitted_jobs:
             logger.info(f"{len(submitted_jobs)} jobs were submitted to AWS Batch.")
@@ -1,3 +1,5 @@
+from argparse import BooleanOptionalAction
+
 from django.core.management.base import BaseCommand
 
 from scpca_portal.config.logging import get_and_configure_logger
@@ -9,14 +11,24 @@ logger = get_and_configure_logger(__name__)
 class Command(BaseCommand):
     help = """Sync all local submitted jobs' states with
     their corresponding AWS Batch job statuses.
+    Jobs are only synced once their sync interval has passed since they were last synced,
+    so that young and small jobs are synced more often than long running and large ones.
     """
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ignore-schedule",
+            default=False,
+            action=BooleanOptionalAction,
+            help="Sync all processing jobs, regardless of when they were last synced.",
+        )
+
     def handle(self, *args, **kwargs):
-        self.sync_batch_jobs()
+        self.sync_batch_jobs(**kwargs)
 
-    def sync_batch_jobs(self):
+    def sync_batch_jobs(self, ignore_schedule: bool = False, **kwargs):
         logger.info("Syncing job states with AWS Batch...")
-        success = Job.bulk_sync_state()
+        success = Job.bulk_sync_state(ignore_schedule=ignore_schedule)
 
         if success:
             logger.info("Successfully synced job states with AWS Batch!")
@@ -1,10 +1,57 @@
 import csv
 import io
-from typing import Dict, List
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterable, List
+
+from django.conf import settings
+from django.core.cache import caches
 
 from scpca_portal import common, utils
 
 
+class FileContentsCache:
+    """
+    Thread safe in-memory cache of file contents,
+    whose total size in bytes is kept within a budget by evicting the least recently used files.
+    """
+
+    def __init__(self):
+        self.entries: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self.size_in_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+    def set(self, key: str, contents: str, size_in_bytes: int, max_size_in_bytes: int) -> None:
+        with self.lock:
+            if key in self.entries:
+                self.size_in_bytes -= self.entries.pop(key)[1]
+
+            if size_in_bytes > max_size_in_bytes:
+                return
+
+            while self.entries and self.size_in_bytes + size_in_bytes > max_size_in_bytes:
+                _, (_, evicted_size_in_bytes) = self.entries.popitem(last=False)
+                self.size_in_bytes -= evicted_size_in_bytes
+
+            self.entries[key] = (contents, size_in_bytes)
+            self.size_in_bytes += size_in_bytes
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size_in_bytes = 0
+
+
+file_contents_cache = FileContentsCache()
+
+
 class MetadataFilenames:
     SINGLE_CELL_METADATA_FILE_NAME = "single_cell_metadata.tsv"
     SPATIAL_METADATA_FILE_NAME = "spatial_metadata.tsv"
@@ -44,6 +91,62 @@ def get_file_contents(libraries_metadata: List[Dict], **kwargs) -> str:
         return metadata_buffer.getvalue()
 
 
+def get_field_names(libraries_metadata: Iterable[Dict]) -> List[str]:
+    """
+    Return the sorted union of the passed libraries metadata keys.
+    Dicts are only inspected one at a time, so a generator can be passed in.
+    """
+    return utils.get_sorted_field_names(utils.get_keys_from_dicts(libraries_metadata))
+
+
+def write_file_contents(
+    metadata_file: BinaryIO,
+    sorted_libraries_metadata: Iterable[Dict],
+    fieldnames: List[str],
+    **kwargs,
+) -> None:
+    """
+    Write a metadata file directly to an open binary file, e.g. a zip archive entry,
+    formatting and writing one row at a time so that the whole file is never held in memory.
+    Rows must already be sorted and fieldnames must be known up front (see get_field_names).
+    The output is identical to that of get_file_contents.
+    """
+    kwargs["delimiter"] = kwargs.get("delimiter", common.TAB)
+    # By default fill dicts with missing fieldnames with "NA" values
+    kwargs["restval"] = kwargs.get("restval", common.NA)
+
+    with io.TextIOWrapper(metadata_file, encoding="utf-8", newline="") as metadata_buffer:
+        csv_writer = csv.DictWriter(metadata_buffer, fieldnames=fieldnames, **kwargs)
+        csv_writer.writeheader()
+        for library_metadata in sorted_libraries_metadata:
+            csv_writer.writerow(format_metadata_dict(library_metadata))
+
+
+def get_cached_file_contents(fingerprint: str) -> str | None:
+    """Return previously generated metadata file contents for the passed fingerprint, if any."""
+    if (file_contents := file_contents_cache.get(fingerprint)) is not None:
+        return file_contents
+
+    if "metadata_files_disk" in settings.CACHES:
+        return caches["metadata_files_disk"].get(fingerprint)
+
+    return None
+
+
+def cache_file_contents(fingerprint: str, file_contents: str) -> None:
+    """
+    Memoise metadata file contents under the passed fingerprint.
+    Large files are only cached on disk, and only when a cache directory is configured.
+    """
+    size_in_bytes = len(file_contents.encode())
+    if size_in_bytes <= settings.METADATA_FILE_CACHE_MAX_SIZE_IN_BYTES:
+        file_contents_cache.set(
+            fingerprint, file_contents, size_in_bytes, settings.METADATA_FILE_CACHE_MEMORY_IN_BYTES
+        )
+    elif "metadata_files_disk" in settings.CACHES:
+        caches["metadata_files_disk"].set(fingerprint, file_contents)
+
+
 def format_metadata_dict(metadata_dict: Dict) -> Dict:
     """
     Returns a copy of metadata dict that is formatted and ready to be written to file.
@@ -1,10 +1,12 @@
 import csv
+import io
 import json
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
 
 from django.conf import settings
 
-from scpca_portal import common, utils
+from scpca_portal import common, s3, utils
 from scpca_portal.models.original_file import OriginalFile
 
 PROJECT_METADATA_KEYS = [
@@ -44,6 +46,35 @@ BULK_METADATA_KEYS = [
 ]
 
 
+def read_metadata_files(metadata_files: Iterable[OriginalFile]) -> List[str]:
+    """
+    Returns the text contents of the passed metadata files, in order.
+    When LOAD_METADATA_FROM_S3 is set, files are read straight from s3,
+    otherwise they are read from their previously downloaded local copies.
+    Either way, files are read concurrently.
+    """
+    metadata_files = list(metadata_files)
+
+    if settings.LOAD_METADATA_FROM_S3:
+        # Newlines are translated the same way as when opening a local file
+        return [
+            io.StringIO(raw_contents.decode("utf-8"), newline=None).read()
+            for raw_contents in s3.read_files(metadata_files)
+        ]
+
+    if not metadata_files:
+        return []
+
+    max_workers = min(len(metadata_files), settings.AWS_S3_MAX_POOL_CONNECTIONS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda mf: mf.local_file_path.read_text(), metadata_files))
+
+
+def read_metadata_file(metadata_file: OriginalFile) -> str:
+    """Returns the text contents of the passed metadata file."""
+    return read_metadata_files([metadata_file])[0]
+
+
 def get_projects_metadata_ids(*, bucket: str = settings.AWS_S3_INPUT_BUCKET_NAME) -> List[str]:
     """
     Opens the projects metadata file and returns a list of all project ids.
@@ -51,7 +82,7 @@ def get_projects_metadata_ids(*, bucket: str = settings.AWS_S3_INPUT_BUCKET_NAME
     """
     projects_metadata_file = OriginalFile.get_input_projects_metadata_file(bucket=bucket)
 
-    with open(projects_metadata_file.local_file_path) as raw_file:
+    with io.StringIO(read_metadata_file(projects_metadata_file)) as raw_file:
         projects_metadata = csv.DictReader(raw_file)
         return [row["scpca_project_id"] for row in projects_metadata]
 
@@ -65,7 +96,7 @@ def load_projects_metadata(
     If an optional project id is passed, all projects are filtered out except for the one passed.
     """
     projects_metadata_file = OriginalFile.get_input_projects_metadata_file(bucket=bucket)
-    with open(projects_metadata_file.local_file_path) as raw_file:
+    with io.StringIO(read_metadata_file(projects_metadata_file)) as raw_file:
         projects_metadata = list(csv.DictReader(raw_file))
 
     for project_metadata in projects_metadata:
@@ -86,7 +117,7 @@ def load_samples_metadata(
     Transforms keys in data dicts to match associated model attributes.
     """
     samples_metadata_file = OriginalFile.get_input_samples_metadata_file(project_id, bucket=bucket)
-    with open(samples_metadata_file.local_file_path) as raw_file:
+    with io.StringIO(read_metadata_file(samples_metadata_file)) as raw_file:
         return list(csv.DictReader(raw_file))
 
 
@@ -101,14 +132,10 @@ def load_libraries_metadata(
         project_id, bucket=bucket
     )
 
-    libraries_metadata = []
-    for library_metadata_file in library_metadata_files:
-        with open(library_metadata_file.local_file_path) as raw_file:
-            libraries_metadata.append(
-                utils.transform_keys(json.load(raw_file), LIBRARY_METADATA_KEYS)
-            )
-
-    return libraries_metadata
+    return [
+        utils.transform_keys(json.loads(raw_contents), LIBRARY_METADATA_KEYS)
+        for raw_contents in read_metadata_files(library_metadata_files)
+    ]
 
 
 def load_bulk_metadata(
@@ -121,7 +148,7 @@ def load_bulk_metadata(
     bulk_metadata_file = OriginalFile.get_input_project_bulk_metadata_file(
         project_id, bucket=bucket
     )
-    with open(bulk_metadata_file.local_file_path) as raw_file:
+    with io.StringIO(read_metadata_file(bulk_metadata_file)) as raw_file:
         bulk_metadata_dicts = list(csv.DictReader(raw_file, delimiter=common.TAB))
 
     for bulk_metadata_dict in bulk_metadata_dicts:
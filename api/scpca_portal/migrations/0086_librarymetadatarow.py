@@ -0,0 +1,122 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:24
+
+import hashlib
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+EXCLUDED_SAMPLE_METADATA_ATTRIBUTES = {"scpca_project_id", "submitter"}
+EXCLUDED_LIBRARY_METADATA_ATTRIBUTES = {"scpca_sample_id", "has_citeseq", "sample_cell_estimates"}
+
+
+def apply_library_metadata_rows(apps, schema_editor):
+    Library = apps.get_model("scpca_portal", "library")
+    LibraryMetadataRow = apps.get_model("scpca_portal", "librarymetadatarow")
+
+    # Mirrors Project.get_metadata, Sample.get_metadata and Library.get_metadata at this migration
+    rows = []
+    for library in Library.objects.select_related("project").prefetch_related("samples"):
+        project_metadata = {
+            "scpca_project_id": library.project.scpca_id,
+            "pi_name": library.project.pi_name,
+            "project_title": library.project.title,
+        }
+        library_metadata = {
+            key: value
+            for key, value in library.metadata.items()
+            if key not in EXCLUDED_LIBRARY_METADATA_ATTRIBUTES
+        }
+
+        for sample in library.samples.all():
+            sample_metadata = {
+                key: value
+                for key, value in sample.metadata.items()
+                if key not in EXCLUDED_SAMPLE_METADATA_ATTRIBUTES
+            }
+            sample_metadata["includes_anndata"] = sample.includes_anndata
+
+            metadata = project_metadata | sample_metadata | library_metadata
+            if library.is_multiplexed:
+                metadata["demux_cell_count_estimate"] = library.metadata["sample_cell_estimates"][
+                    sample.scpca_id
+                ]
+            metadata = {
+                key: ";".join(value) if isinstance(value, list) else value
+                for key, value in metadata.items()
+            }
+
+            rows.append(
+                LibraryMetadataRow(
+                    digest=hashlib.md5(
+                        json.dumps(metadata, sort_keys=True).encode("utf-8")
+                    ).hexdigest(),
+                    metadata=metadata,
+                    scpca_library_id=metadata["scpca_library_id"],
+                    scpca_project_id=metadata["scpca_project_id"],
+                    scpca_sample_id=metadata["scpca_sample_id"],
+                    library=library,
+                    sample=sample,
+                )
+            )
+
+    LibraryMetadataRow.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scpca_portal", "0085_ccdldataset_ccdl_is_merged"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LibraryMetadataRow",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("digest", models.CharField(max_length=32)),
+                ("metadata", models.JSONField(default=dict)),
+                ("scpca_library_id", models.TextField(db_collation="C")),
+                ("scpca_project_id", models.TextField(db_collation="C")),
+                ("scpca_sample_id", models.TextField(db_collation="C")),
+                (
+                    "library",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="metadata_rows",
+                        to="scpca_portal.library",
+                    ),
+                ),
+                (
+                    "sample",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="metadata_rows",
+                        to="scpca_portal.sample",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "library_metadata_rows",
+                "ordering": ["scpca_project_id", "scpca_sample_id", "scpca_library_id"],
+                "get_latest_by": "updated_at",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("library", "sample"),
+                        name="unique_library_metadata_row_library_sample",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(apply_library_metadata_rows, reverse_code=migrations.RunPython.noop),
+    ]
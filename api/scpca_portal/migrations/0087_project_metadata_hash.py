@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scpca_portal", "0086_librarymetadatarow"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="metadata_hash",
+            field=models.CharField(max_length=32, null=True),
+        ),
+    ]
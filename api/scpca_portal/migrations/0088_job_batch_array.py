@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scpca_portal", "0087_project_metadata_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="batch_array_index",
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="batch_array_name",
+            field=models.TextField(null=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scpca_portal", "0089_job_worker_heartbeat"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobStepMetric",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("step", models.TextField()),
+                ("succeeded", models.BooleanField(default=True)),
+                ("started_at", models.DateTimeField()),
+                ("ended_at", models.DateTimeField()),
+                ("duration", models.FloatField()),
+                ("bytes_downloaded", models.BigIntegerField(default=0)),
+                ("bytes_written", models.BigIntegerField(default=0)),
+                ("bytes_uploaded", models.BigIntegerField(default=0)),
+                ("file_count", models.PositiveIntegerField(default=0)),
+                ("peak_rss_in_bytes", models.BigIntegerField(null=True)),
+                ("dataset_size_in_bytes", models.BigIntegerField(null=True)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="step_metrics",
+                        to="scpca_portal.job",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "job_step_metrics",
+                "ordering": ["started_at", "id"],
+                "get_latest_by": "updated_at",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scpca_portal", "0090_jobstepmetric"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="checkpoint",
+            field=models.JSONField(default=dict),
+        ),
+    ]
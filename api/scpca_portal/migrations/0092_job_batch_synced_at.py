@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scpca_portal", "0091_job_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="batch_synced_at",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
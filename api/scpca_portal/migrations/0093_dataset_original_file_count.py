@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scpca_portal", "0092_job_batch_synced_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ccdldataset",
+            name="original_file_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userdataset",
+            name="original_file_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
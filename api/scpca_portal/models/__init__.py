@@ -6,7 +6,9 @@ from scpca_portal.models.datasets.ccdl_dataset import CCDLDataset
 from scpca_portal.models.datasets.user_dataset import UserDataset
 from scpca_portal.models.external_accession import ExternalAccession
 from scpca_portal.models.job import Job
+from scpca_portal.models.job_step_metric import JobStepMetric
 from scpca_portal.models.library import Library
+from scpca_portal.models.library_metadata_row import LibraryMetadataRow
 from scpca_portal.models.original_file import OriginalFile
 from scpca_portal.models.project import Project
 from scpca_portal.models.project_summary import ProjectSummary
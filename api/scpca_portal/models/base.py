@@ -1,3 +1,5 @@
+import string
+
 from django.db import models
 
 
@@ -20,3 +22,16 @@ class TimestampedModel(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class StripWhitespace(models.Func):
+    """
+    Strips the leading and trailing whitespace that str.strip() strips from a text expression.
+    (Trim only strips spaces, which would leave tabs and newlines in metadata values.)
+    """
+
+    function = "BTRIM"
+    output_field = models.TextField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, models.Value(string.whitespace), **extra)
@@ -1,18 +1,26 @@
+import time
+from collections import defaultdict
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, Set, Tuple
 from zipfile import ZipFile
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import QuerySet
 
 from typing_extensions import Self
 
 from scpca_portal import common, metadata_file, readme_file, s3, utils
 from scpca_portal.config.logging import get_and_configure_logger
 from scpca_portal.enums import DatasetFormats, Modalities
-from scpca_portal.exceptions import DatasetLockedProjectError, DatasetMissingLibrariesError
+from scpca_portal.exceptions import (
+    DatasetDownloadFailedError,
+    DatasetLockedProjectError,
+    DatasetMissingLibrariesError,
+)
 from scpca_portal.models.base import CommonDataAttributes, TimestampedModel
 from scpca_portal.models.library import Library
+from scpca_portal.models.library_metadata_row import LibraryMetadataRow
 from scpca_portal.models.original_file import OriginalFile
 
 if TYPE_CHECKING:
@@ -202,10 +210,266 @@ class ComputedFile(CommonDataAttributes, TimestampedModel):
             case _:
                 return None
 
+    @staticmethod
+    def write_metadata_file(
+        zip_file: ZipFile,
+        metadata_file_path: str,
+        libraries,
+        included_keys: Set | None = None,
+    ) -> None:
+        """
+        Streams the passed libraries' metadata file straight into a new entry of the zip archive
+        (see write_metadata_file_contents).
+        Contents which were already cached while hashing a dataset are written instead.
+        """
+        if not included_keys:
+            fingerprint = LibraryMetadataRow.get_fingerprint(libraries)
+            if (file_contents := metadata_file.get_cached_file_contents(fingerprint)) is not None:
+                zip_file.writestr(metadata_file_path, file_contents)
+                return
+
+        with zip_file.open(metadata_file_path, "w") as metadata_zip_entry:
+            ComputedFile.write_metadata_file_contents(metadata_zip_entry, libraries, included_keys)
+
+    @staticmethod
+    def write_metadata_file_contents(
+        metadata_file_output: BinaryIO, libraries, included_keys: Set | None = None
+    ) -> None:
+        """
+        Writes the passed libraries' metadata file to the open binary file.
+        Field names are collected in a first pass over the rows,
+        which are then queried again and written one at a time.
+        """
+
+        def get_libraries_metadata():
+            libraries_metadata = LibraryMetadataRow.get_sorted_libraries_metadata(libraries)
+            if not included_keys:
+                return libraries_metadata
+            return (
+                utils.filter_dict_by_keys(lib_md, included_keys) for lib_md in libraries_metadata
+            )
+
+        fieldnames = metadata_file.get_field_names(get_libraries_metadata())
+        metadata_file.write_file_contents(
+            metadata_file_output, get_libraries_metadata(), fieldnames
+        )
+
+    @classmethod
+    def write_local_metadata_files(
+        cls, dataset: "DatasetABC"
+    ) -> Dict[Tuple[str | None, Modalities | None], Path]:
+        """
+        Writes the dataset's metadata files to its local metadata files directory,
+        one row at a time, and returns their local paths by project id and modality
+        (see write_dataset_entries).
+        """
+        local_paths = {}
+        for project_id, modality, libraries in dataset.get_metadata_file_libraries():
+            local_path = dataset.metadata_files_local_dir / cls.get_metadata_file_zip_path(
+                dataset, project_id, modality
+            )
+            local_path.parent.mkdir(parents=True, exist_ok=True)
+            with local_path.open("wb") as metadata_local_file:
+                cls.write_metadata_file_contents(metadata_local_file, libraries)
+            local_paths[(project_id, modality)] = local_path
+
+        return local_paths
+
+    @staticmethod
+    def download_dataset_files(dataset: "DatasetABC", original_files: QuerySet[OriginalFile]):
+        """
+        Downloads the passed original files of the dataset, one project at a time,
+        and raises DatasetLockedProjectError if the dataset is locked in the meantime.
+        Raises DatasetDownloadFailedError if any of the files failed to download.
+        """
+        for project in dataset.projects:
+            if not s3.download_files(original_files.filter(project_id=project.scpca_id)):
+                raise DatasetDownloadFailedError(dataset)
+            if dataset.is_locked:
+                raise DatasetLockedProjectError(dataset)
+
+    @staticmethod
+    def write_dataset_entries(
+        zip_file: ZipFile,
+        dataset: "DatasetABC",
+        skipped_paths: Set[str] = set(),
+        on_entry: Callable[[], None] | None = None,
+        metadata_file_paths: Dict[Tuple[str | None, Modalities | None], Path] = {},
+    ) -> None:
+        """
+        Writes the dataset's readme, metadata and original files to the zip archive,
+        except for entries at the passed paths, calling on_entry after each written entry.
+        Metadata files which were already written locally are passed by project id and modality
+        (see write_local_metadata_files), and are copied into the archive from disk.
+        """
+
+        def write_entry(zip_path: str, write: Callable[[], None]) -> None:
+            if zip_path in skipped_paths:
+                return
+            write()
+            if on_entry:
+                on_entry()
+
+        # Readme file
+        write_entry(
+            readme_file.OUTPUT_NAME,
+            lambda: zip_file.writestr(readme_file.OUTPUT_NAME, dataset.readme_file_contents),
+        )
+
+        # Metadata files
+        for project_id, modality, libraries in dataset.get_metadata_file_libraries():
+            metadata_file_path = str(
+                ComputedFile.get_metadata_file_zip_path(dataset, project_id, modality)
+            )
+            if local_path := metadata_file_paths.get((project_id, modality)):
+                write_entry(
+                    metadata_file_path, lambda: zip_file.write(local_path, metadata_file_path)
+                )
+            else:
+                write_entry(
+                    metadata_file_path,
+                    lambda: ComputedFile.write_metadata_file(
+                        zip_file, metadata_file_path, libraries
+                    ),
+                )
+
+        # Original files
+        for original_file in dataset.original_files:
+            original_file_path = str(
+                ComputedFile.get_original_file_zip_path(original_file, dataset)
+            )
+            write_entry(
+                original_file_path,
+                lambda: zip_file.write(original_file.local_file_path, original_file_path),
+            )
+
+    @classmethod
+    def upload_dataset_file(
+        cls,
+        dataset: "DatasetABC",
+        checkpoint: Dict,
+        on_checkpoint: Callable[[Dict], None] | None = None,
+        metadata_file_paths: Dict[Tuple[str | None, Modalities | None], Path] = {},
+    ) -> int:
+        """
+        Streams the dataset's zip archive straight to its s3 key with a multipart upload,
+        and returns the archive's size.
+        After entries are committed to uploaded parts, at most every DATASET_JOB_CHECKPOINT_SECONDS,
+        on_checkpoint is called with a checkpoint of the upload and its entries.
+        An upload is resumed from the passed checkpoint if it was recorded for the same dataset
+        contents and its parts are still uploaded, so that its entries aren't downloaded
+        or written again. Otherwise, the checkpoint's upload is aborted and a new one is started.
+        Original files are only downloaded here if the passed checkpoint has entries,
+        and must already be downloaded otherwise.
+        """
+        s3_bucket = settings.AWS_S3_OUTPUT_BUCKET_NAME
+        s3_key = cls.get_dataset_file_s3_key(dataset)
+        has_checkpoint_entries = bool(checkpoint.get("entries"))
+
+        if checkpoint and not cls.is_resumable_checkpoint(checkpoint, dataset, s3_bucket, s3_key):
+            logger.info("Discarding stale dataset checkpoint.", upload_id=checkpoint["upload_id"])
+            s3.abort_multipart_upload(
+                checkpoint["s3_key"], checkpoint["s3_bucket"], checkpoint["upload_id"]
+            )
+            checkpoint = {}
+
+        entries = [utils.get_zip_info(entry) for entry in checkpoint.get("entries", [])]
+        uploaded_paths = {entry.filename for entry in entries}
+        if entries:
+            logger.info(f"Resuming dataset upload after {len(entries)} entries.")
+
+        # Files are downloaded here when an upload is resumed, or when its checkpoint was stale,
+        # without the files which were already uploaded
+        if has_checkpoint_entries:
+            original_files = dataset.original_files
+            uploaded_original_file_ids = [
+                original_file.pk
+                for original_file in original_files
+                if str(cls.get_original_file_zip_path(original_file, dataset)) in uploaded_paths
+            ]
+            cls.download_dataset_files(
+                dataset, original_files.exclude(pk__in=uploaded_original_file_ids)
+            )
+
+        writer = s3.MultipartUploadWriter(
+            s3_key,
+            s3_bucket,
+            upload_id=checkpoint.get("upload_id"),
+            parts=checkpoint.get("parts"),
+            offset=checkpoint.get("offset", 0),
+        )
+
+        with ZipFile(writer, "w") as zip_file:
+            # Entries which were already uploaded only need to be added to the central directory
+            for entry in entries:
+                zip_file.filelist.append(entry)
+                zip_file.NameToInfo[entry.filename] = entry
+
+            checkpointed_at = time.monotonic()
+
+            def on_entry():
+                nonlocal checkpointed_at
+                if time.monotonic() - checkpointed_at < settings.DATASET_JOB_CHECKPOINT_SECONDS:
+                    return
+
+                if on_checkpoint and writer.commit():
+                    on_checkpoint(
+                        {
+                            **writer.get_state(),
+                            "s3_bucket": s3_bucket,
+                            "s3_key": s3_key,
+                            "combined_hash": dataset.combined_hash,
+                            "entries": [
+                                utils.get_zip_info_dict(info) for info in zip_file.filelist
+                            ],
+                        }
+                    )
+                    checkpointed_at = time.monotonic()
+
+            cls.write_dataset_entries(
+                zip_file, dataset, uploaded_paths, on_entry, metadata_file_paths
+            )
+
+        writer.complete()
+
+        return writer.tell()
+
+    @staticmethod
+    def is_resumable_checkpoint(
+        checkpoint: Dict, dataset: "DatasetABC", s3_bucket: str, s3_key: str
+    ) -> bool:
+        """
+        Returns whether the checkpoint's upload can be resumed for the dataset,
+        i.e. the dataset's contents haven't changed and the checkpointed parts are still uploaded.
+        """
+        if (checkpoint["combined_hash"], checkpoint["s3_bucket"], checkpoint["s3_key"]) != (
+            dataset.combined_hash,
+            s3_bucket,
+            s3_key,
+        ):
+            return False
+
+        uploaded_parts = s3.list_multipart_upload_parts(s3_key, s3_bucket, checkpoint["upload_id"])
+        if uploaded_parts is None:
+            return False
+
+        # Parts after the checkpoint may have been uploaded too, and will be overwritten
+        return uploaded_parts[: len(checkpoint["parts"])] == checkpoint["parts"]
+
     @classmethod
-    def get_dataset_file(cls, dataset: "DatasetABC") -> Self:
+    def get_dataset_file(
+        cls,
+        dataset: "DatasetABC",
+        checkpoint: Dict | None = None,
+        on_checkpoint: Callable[[Dict], None] | None = None,
+        metadata_file_paths: Dict[Tuple[str | None, Modalities | None], Path] = {},
+    ) -> Self:
         """
         Computes a given dataset's zip archive and returns a corresponding ComputedFile object.
+        If a checkpoint is passed, the archive is streamed straight to s3 instead of being written
+        locally, and can be resumed from the checkpoints passed to on_checkpoint
+        (see upload_dataset_file).
+        Already written local metadata files can be passed (see write_dataset_entries).
         """
         if dataset.is_locked:
             raise DatasetLockedProjectError(dataset)
@@ -214,30 +478,41 @@ class ComputedFile(CommonDataAttributes, TimestampedModel):
         if not dataset.libraries.exists():
             raise DatasetMissingLibrariesError(dataset)
 
-        dataset_original_files = dataset.original_files
-        for project in dataset.projects:
-            s3.download_files(dataset_original_files.filter(project_id=project.scpca_id))
-            if dataset.is_locked:
-                raise DatasetLockedProjectError(dataset)
+        if checkpoint is not None:
+            size_in_bytes = cls.upload_dataset_file(
+                dataset, checkpoint, on_checkpoint, metadata_file_paths
+            )
+        else:
+            cls.download_dataset_files(dataset, dataset.original_files)
+            with ZipFile(dataset.computed_file_local_path, "w") as zip_file:
+                cls.write_dataset_entries(
+                    zip_file, dataset, metadata_file_paths=metadata_file_paths
+                )
+            size_in_bytes = dataset.computed_file_local_path.stat().st_size
 
-        with ZipFile(dataset.computed_file_local_path, "w") as zip_file:
-            # Readme file
-            zip_file.writestr(readme_file.OUTPUT_NAME, dataset.readme_file_contents)
+        return cls.get_dataset_computed_file(dataset, size_in_bytes)
 
-            # Metadata files
-            for project_id, modality, metadata_file_content in dataset.get_metadata_file_contents():
-                zip_file.writestr(
-                    str(ComputedFile.get_metadata_file_zip_path(dataset, project_id, modality)),
-                    metadata_file_content,
-                )
+    @classmethod
+    def get_dataset_file_copy(cls, dataset: "DatasetABC", source: Self) -> Self | None:
+        """
+        Copies the passed computed file of another dataset with the same format and combined hash,
+        whose archive is identical to the dataset's, to the dataset's s3 key within s3.
+        Returns a corresponding ComputedFile object, or None if the copy failed.
+        """
+        if dataset.is_locked:
+            raise DatasetLockedProjectError(dataset)
 
-            # Original files
-            for original_file in dataset.original_files:
-                zip_file.write(
-                    original_file.local_file_path,
-                    ComputedFile.get_original_file_zip_path(original_file, dataset),
-                )
+        s3_key = cls.get_dataset_file_s3_key(dataset)
+        if not s3.copy_output_file(
+            source.s3_key, source.s3_bucket, s3_key, settings.AWS_S3_OUTPUT_BUCKET_NAME
+        ):
+            return None
+
+        return cls.get_dataset_computed_file(dataset, source.size_in_bytes)
 
+    @classmethod
+    def get_dataset_computed_file(cls, dataset: "DatasetABC", size_in_bytes: int) -> Self:
+        """Returns a ComputedFile object for the dataset's archive of the passed size."""
         computed_file = cls(
             has_bulk_rna_seq=(
                 any(
@@ -260,7 +535,7 @@ class ComputedFile(CommonDataAttributes, TimestampedModel):
             metadata_only=dataset.format == DatasetFormats.METADATA,
             s3_bucket=settings.AWS_S3_OUTPUT_BUCKET_NAME,
             s3_key=cls.get_dataset_file_s3_key(dataset),
-            size_in_bytes=dataset.computed_file_local_path.stat().st_size,
+            size_in_bytes=size_in_bytes,
             workflow_version=utils.join_workflow_versions(
                 library.workflow_version for library in dataset.libraries
             ),
@@ -282,11 +557,6 @@ class ComputedFile(CommonDataAttributes, TimestampedModel):
         if not libraries.exists():
             raise ValueError("There are no libraries on the portal!")
 
-        libraries_metadata = utils.filter_dict_list_by_keys(
-            Library.get_libraries_metadata(libraries),
-            common.METADATA_COLUMN_SORT_ORDER,
-        )
-
         zip_file_path = cls.get_local_file_path(download_config)
         with ZipFile(zip_file_path, "w") as zip_file:
             # Readme file
@@ -298,9 +568,11 @@ class ComputedFile(CommonDataAttributes, TimestampedModel):
                 ),
             )
             # Metadata file
-            zip_file.writestr(
+            cls.write_metadata_file(
+                zip_file,
                 metadata_file.get_file_name(download_config),
-                metadata_file.get_file_contents(libraries_metadata),
+                libraries,
+                included_keys=common.METADATA_COLUMN_SORT_ORDER,
             )
 
         computed_file = cls(
@@ -329,7 +601,7 @@ class ComputedFile(CommonDataAttributes, TimestampedModel):
         if not libraries.exists():
             raise ValueError("Unable to find libraries for download_config.")
 
-        libraries_metadata = Library.get_libraries_metadata(libraries)
+        libraries_metadata = LibraryMetadataRow.get_sorted_libraries_metadata(libraries)
         original_files = Library.get_libraries_original_files(libraries, download_config)
         s3.download_files(original_files)
 
@@ -390,7 +662,7 @@ class ComputedFile(CommonDataAttributes, TimestampedModel):
         if not libraries.exists():
             raise ValueError("Unable to find libraries for download_config.")
 
-        libraries_metadata = Library.get_libraries_metadata(libraries)
+        libraries_metadata = LibraryMetadataRow.get_sorted_libraries_metadata(libraries)
         original_files = Library.get_libraries_original_files(libraries, download_config)
         s3.download_files(original_files)
 
@@ -513,7 +785,32 @@ class ComputedFile(CommonDataAttributes, TimestampedModel):
         self.zip_file_path.unlink(missing_ok=True)
 
     def purge(self, delete_from_s3: bool = False) -> None:
-        """Purges a computed file, optionally deleting it from S3."""
+        """
+        Purges a computed file, optionally deleting it from S3.
+        Objects are only deleted from S3 once the current transaction commits, if any,
+        so that they're kept when the purge is rolled back.
+        """
         if delete_from_s3:
-            s3.delete_output_file(self.s3_key, self.s3_bucket)
+            s3_key, s3_bucket = self.s3_key, self.s3_bucket
+            transaction.on_commit(lambda: s3.delete_output_file(s3_key, s3_bucket))
         self.delete()
+
+    @staticmethod
+    def bulk_purge(computed_files: QuerySet[Self], delete_from_s3: bool = False) -> None:
+        """
+        Purges all passed computed files with a single delete query,
+        optionally deleting their objects from S3 in batches
+        once the current transaction commits, if any.
+        """
+        if delete_from_s3:
+            keys_by_bucket = defaultdict(set)
+            for s3_bucket, s3_key in computed_files.values_list("s3_bucket", "s3_key"):
+                keys_by_bucket[s3_bucket].add(s3_key)
+
+            def delete_output_files():
+                for s3_bucket, s3_keys in keys_by_bucket.items():
+                    s3.delete_output_files(s3_keys, s3_bucket)
+
+            transaction.on_commit(delete_output_files)
+
+        computed_files.delete()
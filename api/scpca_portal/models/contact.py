@@ -34,8 +34,12 @@ class Contact(TimestampedModel):
 
     @classmethod
     def bulk_create_from_project_data(cls, project_data, project):
-        """Creates a list of contact objects and saves them."""
-        contacts = []
+        """
+        Creates the project's contacts which aren't in the db yet and adds them to the project.
+        Contacts are shared by projects which may be loaded concurrently,
+        so inserts of contacts which were created in the meantime are ignored.
+        """
+        contacts = {}
 
         try:
             zipped_contact_details = utils.get_csv_zipped_values(project_data, "email", "name")
@@ -52,14 +56,11 @@ class Contact(TimestampedModel):
                 "email": email.lower().strip(),
                 "pi_name": project.pi_name,
             }
+            contacts.setdefault(contact_data["email"], Contact.get_from_dict(contact_data))
 
-            # Handle case where contact is already in db
-            if existing_contact := Contact.objects.filter(email=contact_data["email"]).first():
-                if existing_contact not in project.contacts.all():
-                    project.contacts.add(existing_contact)
-                continue
-
-            contacts.append(Contact.get_from_dict(contact_data))
-
-        Contact.objects.bulk_create(contacts)
-        project.contacts.add(*contacts)
+        # Existing contacts are left as they are, and rows are inserted in email order
+        # so that concurrent loads lock the unique index in the same order and can't deadlock
+        Contact.objects.bulk_create(
+            [contacts[email] for email in sorted(contacts)], ignore_conflicts=True
+        )
+        project.contacts.add(*Contact.objects.filter(email__in=contacts.keys()))
@@ -1,8 +1,9 @@
 import sys
 import uuid
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List, Set
+from typing import Dict, Iterable, List, Set
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
@@ -19,6 +20,7 @@ from scpca_portal.models.api_token import APIToken
 from scpca_portal.models.base import TimestampedModel
 from scpca_portal.models.computed_file import ComputedFile
 from scpca_portal.models.library import Library
+from scpca_portal.models.library_metadata_row import LibraryMetadataRow
 from scpca_portal.models.original_file import OriginalFile
 from scpca_portal.models.project import Project
 from scpca_portal.models.sample import Sample
@@ -50,6 +52,7 @@ class DatasetABC(TimestampedModel, models.Model):
     includes_files_merged = models.BooleanField(default=False)
     includes_files_multiplexed = models.BooleanField(default=False)
     estimated_size_in_bytes = models.BigIntegerField(default=0)
+    original_file_count = models.PositiveIntegerField(default=0)
 
     # Non user-editable - set during processing
     started_at = models.DateTimeField(null=True)
@@ -111,6 +114,7 @@ class DatasetABC(TimestampedModel, models.Model):
 
         # stats property attributes
         self.estimated_size_in_bytes = self.get_estimated_size_in_bytes()
+        self.original_file_count = self.original_files.count()
 
         super().save(*args, **kwargs)
 
@@ -173,9 +177,17 @@ class DatasetABC(TimestampedModel, models.Model):
         return not self.is_hash_changed
 
     def get_metadata_file_content(self, libraries: QuerySet[Library]) -> str:
-        """Return a string of the metadata file content of a collection of libraries."""
-        libraries_metadata = Library.get_libraries_metadata(libraries)
-        return metadata_file.get_file_contents(libraries_metadata)
+        """
+        Return a string of the metadata file content of a collection of libraries.
+        Contents are memoised, so they're only generated again when the libraries' rows change.
+        """
+        fingerprint = LibraryMetadataRow.get_fingerprint(libraries)
+        if (file_contents := metadata_file.get_cached_file_contents(fingerprint)) is None:
+            libraries_metadata = LibraryMetadataRow.get_sorted_libraries_metadata(libraries)
+            file_contents = metadata_file.get_file_contents(libraries_metadata)
+            metadata_file.cache_file_contents(fingerprint, file_contents)
+
+        return file_contents
 
     def get_project_modality_metadata_file_content(
         self, project_id: str, modality: Modalities
@@ -189,23 +201,33 @@ class DatasetABC(TimestampedModel, models.Model):
         Return a list of three element tuples which includes the project_id, modality,
         and their associatied metadata file contents as a string.
         """
+        return [
+            (project_id, modality, self.get_metadata_file_content(libraries))
+            for project_id, modality, libraries in self.get_metadata_file_libraries()
+        ]
+
+    def get_metadata_file_libraries(
+        self,
+    ) -> List[tuple[str | None, Modalities | None, QuerySet[Library]]]:
+        """
+        Return a list of three element tuples which includes the project_id, modality,
+        and the libraries whose metadata make up their associated metadata file.
+        """
         # We only return one metadata file for all metadata datasets
         # TODO: if we need to put project metadata files in a project folder,
         # add a condition "not ccdl_project_id" to this line
         if self.format == DatasetFormats.METADATA:
-            return [(None, None, self.get_metadata_file_content(self.libraries))]
+            return [(None, None, self.libraries)]
 
-        metadata_file_contents = []
+        metadata_file_libraries = []
         for project_id, project_config in self.data.items():
             for modality in [Modalities.SINGLE_CELL, Modalities.SPATIAL]:
                 if not project_config.get(modality.value, []):
                     continue
 
-                metadata_file_content = self.get_project_modality_metadata_file_content(
-                    project_id, modality
-                )
-                metadata_file_contents.append((project_id, modality, metadata_file_content))
-        return metadata_file_contents
+                libraries = self.get_project_modality_libraries(project_id, modality)
+                metadata_file_libraries.append((project_id, modality, libraries))
+        return metadata_file_libraries
 
     @property
     def readme_file_contents(self) -> str:
@@ -223,6 +245,13 @@ class DatasetABC(TimestampedModel, models.Model):
     def get_includes_files_multiplexed(self) -> bool:
         return self.multiplexed_projects.exists()
 
+    @property
+    def includes_spatial(self) -> bool:
+        return any(
+            project_config.get(DatasetDataProjectConfig.SPATIAL)
+            for project_config in self.data.values()
+        )
+
     @property
     def pretty_estimated_size_in_bytes(self) -> str:
         return utils.format_bytes(self.estimated_size_in_bytes)
@@ -498,6 +527,10 @@ class DatasetABC(TimestampedModel, models.Model):
     def computed_file_local_path(self) -> Path:
         return settings.OUTPUT_DATA_PATH / ComputedFile.get_dataset_file_s3_key(self)
 
+    @property
+    def metadata_files_local_dir(self) -> Path:
+        return settings.OUTPUT_DATA_PATH / f"{self.id}_metadata"
+
     @property
     def download_filename(self) -> str:
         output_format = "-".join(self.format.split("_")).lower()
@@ -513,6 +546,60 @@ class DatasetABC(TimestampedModel, models.Model):
 
         return self.computed_file.get_dataset_download_url(self.download_filename)
 
+    def get_reusable_computed_file(self) -> ComputedFile | None:
+        """
+        Returns the computed file of another succeeded and unexpired dataset
+        with the same format and combined hash, whose archive is identical to this dataset's.
+        """
+        return DatasetABC.get_reusable_computed_files([self]).get(self.id)
+
+    @staticmethod
+    def get_reusable_computed_files(datasets: List[Self]) -> Dict[uuid.UUID, ComputedFile]:
+        """
+        Returns the reusable computed files of the passed datasets by dataset id
+        (see get_reusable_computed_file), with one query per dataset model rather than per dataset.
+        Datasets without a reusable computed file are omitted.
+        """
+        combined_hashes = {dataset.combined_hash for dataset in datasets if dataset.combined_hash}
+        if not combined_hashes:
+            return {}
+
+        now = make_aware(datetime.now())
+        computed_files = defaultdict(list)
+        for relation in ComputedFile._meta.related_objects:
+            if not issubclass(relation.related_model, DatasetABC):
+                continue
+
+            source_datasets = (
+                relation.related_model.objects.filter(
+                    combined_hash__in=combined_hashes,
+                    is_succeeded=True,
+                    is_expired=False,
+                    computed_file__isnull=False,
+                )
+                .filter(models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=now))
+                .select_related("computed_file")
+            )
+            for source_dataset in source_datasets:
+                computed_files[(source_dataset.format, source_dataset.combined_hash)].append(
+                    source_dataset.computed_file
+                )
+
+        reusable_computed_files = {}
+        for dataset in datasets:
+            if reusable_computed_file := max(
+                (
+                    computed_file
+                    for computed_file in computed_files[(dataset.format, dataset.combined_hash)]
+                    if computed_file.pk != dataset.computed_file_id
+                ),
+                key=lambda computed_file: computed_file.created_at,
+                default=None,
+            ):
+                reusable_computed_files[dataset.id] = reusable_computed_file
+
+        return reusable_computed_files
+
     def apply_job_state(self, job) -> None:
         """
         Sets the dataset state (flag, reason, timestamps) based on the given job.
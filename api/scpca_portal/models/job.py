@@ -1,19 +1,21 @@
+import os
+import uuid
 from collections import defaultdict
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Set
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import make_aware
 
 from typing_extensions import Self
 
-from scpca_portal import batch, common
+from scpca_portal import batch, batch_sizing, common, lockfile, utils
 from scpca_portal.config.logging import get_and_configure_logger
-from scpca_portal.enums import JobStates
+from scpca_portal.enums import JobExecutors, JobStates
 from scpca_portal.exceptions import (
     DatasetError,
     DatasetLockedProjectError,
@@ -27,8 +29,11 @@ from scpca_portal.exceptions import (
     JobTerminationFailedError,
 )
 from scpca_portal.models.base import TimestampedModel
+from scpca_portal.models.computed_file import ComputedFile
 from scpca_portal.models.datasets.base import DatasetABC
 from scpca_portal.models.datasets.ccdl_dataset import CCDLDataset
+from scpca_portal.models.datasets.user_dataset import UserDataset
+from scpca_portal.models.project import Project
 
 logger = get_and_configure_logger(__name__)
 
@@ -61,6 +66,26 @@ class JobQuerySet(models.QuerySet):
             )
         return super().update(**kwargs)
 
+    def with_datasets(self):
+        """
+        Prefetches the jobs' datasets with one query per dataset model.
+        Otherwise, each access of the generic foreign key queries its dataset separately.
+        """
+        return self.prefetch_related("dataset")
+
+    def filter_dataset_size(self, max_size_in_bytes: int):
+        """Filters to jobs whose datasets' estimated size is at most the passed size."""
+        query = models.Q(pk__in=[])
+        for dataset_cls in [CCDLDataset, UserDataset]:
+            query |= models.Q(
+                dataset_content_type=ContentType.objects.get_for_model(dataset_cls),
+                dataset_object_id__in=dataset_cls.objects.filter(
+                    estimated_size_in_bytes__lte=max_size_in_bytes
+                ).values("pk"),
+            )
+
+        return self.filter(query)
+
 
 class JobManager(models.Manager.from_queryset(JobQuerySet)):
     pass
@@ -91,20 +116,31 @@ class Job(TimestampedModel):
     batch_job_definition = models.TextField(null=True)
     batch_job_queue = models.TextField(null=True)
     batch_container_overrides = models.JSONField(default=dict)
+    # Set when the job is submitted as a child of an array job
+    batch_array_name = models.TextField(null=True)
+    batch_array_index = models.PositiveIntegerField(null=True)
 
     # Job Information Defined from AWS (via Response)
     batch_job_id = models.TextField(null=True)
     batch_status = models.TextField(null=True)  # Set by a cron job
+    batch_synced_at = models.DateTimeField(null=True)  # Set by a cron job
+
+    # Progress of the dataset's archive upload, which retries resume from
+    # (see ComputedFile.upload_dataset_file)
+    checkpoint = models.JSONField(default=dict)
+
+    # Job Information Defined by local workers (see scpca_portal.local_worker)
+    worker_id = models.TextField(null=True)
+    heartbeat_at = models.DateTimeField(null=True)
 
     # Datasets should never be deleted
     dataset_content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True)
     dataset_object_id = models.UUIDField(null=True)
     dataset = GenericForeignKey("dataset_content_type", "dataset_object_id")
 
-    # Maximum size of a dataset in GB in order to be accommodated by the fargate pipeline
-    # Number should be half of max fargate ephemeral storage (which is 200 GB)
-    # Each instance downloads all dataset files, copies them to a zip file, and uploads the zip file
-    MAX_FARGATE_SIZE_IN_BYTES = 100 * common.GB_IN_BYTES
+    # AWS Batch array jobs must have between 2 and 10,000 children
+    MIN_ARRAY_SIZE = 2
+    MAX_ARRAY_SIZE = 10_000
 
     def __str__(self):
         if self.batch_job_id:
@@ -119,6 +155,17 @@ class Job(TimestampedModel):
         """
         return cls(batch_job_name=str(dataset.id), dataset=dataset)
 
+    @classmethod
+    def get_array_job(cls, array_name: str) -> Self:
+        """
+        Returns the job which the running AWS Batch array job child should process,
+        using the child's index, which AWS Batch sets in AWS_BATCH_JOB_ARRAY_INDEX.
+        """
+        return cls.objects.get(
+            batch_array_name=array_name,
+            batch_array_index=int(os.environ["AWS_BATCH_JOB_ARRAY_INDEX"]),
+        )
+
     def validate_dataset(self) -> None:
         if self.dataset and not issubclass(type(self.dataset), DatasetABC):
             raise ValidationError(
@@ -200,6 +247,7 @@ class Job(TimestampedModel):
         Prepares a new PENDING job for retry with:
         - incremented attempt count
         - batch fields
+        - the checkpoint, so that the dataset's upload is resumed
         - the associated dataset
         By default, saves the new job as PENDING (state, timestamp).
         (For bulk operations, the caller should pass False to prevent saving.)
@@ -217,6 +265,7 @@ class Job(TimestampedModel):
             batch_job_definition=self.batch_job_definition,
             batch_job_queue=self.batch_job_queue,
             batch_container_overrides=self.batch_container_overrides,
+            checkpoint=self.checkpoint,
             dataset=self.dataset,
         )
 
@@ -238,20 +287,11 @@ class Job(TimestampedModel):
         if not jobs:
             return []
 
-        retry_jobs = []
-        retry_datasets = defaultdict(list)
-
-        for job in jobs:
-            if retry_job := job.create_retry_job(save=False):
-                retry_jobs.append(retry_job)
-                if job.dataset:  # TODO: Remove after the dataset release
-                    retry_datasets[job.dataset.get_class()].append(job.dataset)
+        retry_jobs = [retry_job for job in jobs if (retry_job := job.create_retry_job(save=False))]
 
         if retry_jobs:
             cls.objects.bulk_create(retry_jobs)
-            if retry_datasets:  # TODO: Remove after the dataset release
-                for dataset_cls, datasets in retry_datasets.items():
-                    dataset_cls.bulk_update_state(datasets)
+            cls.bulk_update_dataset_state(retry_jobs)
 
         return retry_jobs
 
@@ -289,57 +329,111 @@ class Job(TimestampedModel):
             "failed_reason",
             "terminated_at",
             "terminated_reason",
+            "batch_synced_at",
         ]
         cls.objects.bulk_update(jobs, STATE_UPDATE_ATTRS)
 
+    @staticmethod
+    def bulk_update_dataset_state(jobs: List[Self]) -> None:
+        """
+        Updates state attributes of the given jobs' datasets in bulk,
+        with one query per dataset model.
+        """
+        datasets = defaultdict(dict)
+        for job in jobs:
+            if job.dataset:  # TODO: Remove after the dataset release
+                datasets[job.dataset.get_class()][job.dataset.pk] = job.dataset
+
+        for dataset_cls, class_datasets in datasets.items():
+            dataset_cls.bulk_update_state(list(class_datasets.values()))
+
     @classmethod
-    def bulk_sync_state(cls) -> bool:
+    def bulk_sync_state(cls, ignore_schedule: bool = False) -> bool:
         """
-        Syncs all PROCESSING jobs' states with the corresponding AWS Batch jobs.
-        Saves the jobs (state, timestamp, reason).
+        Syncs PROCESSING jobs' states with the corresponding AWS Batch jobs.
+        Only jobs whose sync interval has passed since they were last synced are synced,
+        unless ignore_schedule is passed (see get_sync_interval).
+        Saves the jobs (state, timestamp, reason, sync timestamp).
         Calls the datasets' method to sync the jobs' state.
         Returns a boolean indicating if the jobs and datasets were updated during sync.
         """
-        processing_jobs = cls.objects.filter(state=JobStates.PROCESSING)
-        if not processing_jobs.exists():
+        # Local workers save their jobs' states themselves
+        if settings.JOB_EXECUTOR == JobExecutors.LOCAL:
             return False
 
-        synced_jobs = []
-        synced_datasets = defaultdict(list)
-        failed_job_ids = []
+        processing_jobs = list(cls.objects.filter(state=JobStates.PROCESSING).with_datasets())
+
+        now = make_aware(datetime.now())
+        if not ignore_schedule:
+            processing_jobs = [job for job in processing_jobs if job.is_sync_due(now)]
+
+        if not processing_jobs:
+            return False
 
         fetched_jobs = []
         try:
             fetched_jobs = batch.get_jobs(processing_jobs)
         except Exception:
-            failed_job_ids.extend(processing_jobs)
+            logger.info(f"{len(processing_jobs)} jobs failed to sync.")
+            return False
 
         # Map the fetched AWS jobs for easy lookup by batch_job_id
         aws_jobs = {job["jobId"]: job for job in fetched_jobs}
 
+        fetched_processing_jobs = []
+        synced_jobs = []
         for job in processing_jobs:
             if aws_job := aws_jobs.get(job.batch_job_id):
+                fetched_processing_jobs.append(job)
+                job.batch_synced_at = now
                 new_state, reason = cls.get_job_state(aws_job)
                 if job.apply_state(new_state, reason):
                     synced_jobs.append(job)
-                    if job.dataset:  # TODO: Remove after the dataset release
-                        synced_datasets[job.dataset.get_class()].append(job.dataset)
+
+        if failed_job_count := len(processing_jobs) - len(fetched_processing_jobs):
+            logger.info(f"{failed_job_count} jobs failed to sync.")
+
+        cls.bulk_update_state(fetched_processing_jobs)
 
         if not synced_jobs:
             logger.info("No jobs were updated during sync.")
             return False
 
         logger.info(f"Synced {len(synced_jobs)} jobs with AWS.")
-        cls.bulk_update_state(synced_jobs)
-        if synced_datasets:  # TODO: Remove after the dataset release
-            for dataset_cls, datasets in synced_datasets.items():
-                dataset_cls.bulk_update_state(datasets)
-
-        if failed_job_ids:
-            logger.info(f"{len(failed_job_ids)} jobs failed to sync.")
+        cls.bulk_update_dataset_state(synced_jobs)
 
         return True
 
+    def get_sync_interval(self) -> timedelta:
+        """
+        Returns the interval at which the PROCESSING job is synced with AWS Batch.
+        Young jobs and jobs with small datasets are synced often,
+        while long running jobs and jobs with large datasets, which are expected to take longer,
+        are synced less often.
+        """
+        processing_at = self.processing_at or self.pending_at
+        age_in_seconds = (make_aware(datetime.now()) - processing_at).total_seconds()
+
+        size_in_bytes = (self.dataset and self.dataset.estimated_size_in_bytes) or 0
+        expected_duration_in_seconds = size_in_bytes / settings.AWS_BATCH_SYNC_BYTES_PER_SECOND
+
+        interval_in_seconds = settings.AWS_BATCH_SYNC_INTERVAL_FRACTION * max(
+            age_in_seconds, expected_duration_in_seconds
+        )
+
+        return timedelta(
+            seconds=min(
+                max(interval_in_seconds, settings.AWS_BATCH_SYNC_MIN_INTERVAL_SECONDS),
+                settings.AWS_BATCH_SYNC_MAX_INTERVAL_SECONDS,
+            )
+        )
+
+    def is_sync_due(self, now: datetime) -> bool:
+        """Returns whether the job hasn't been synced with AWS Batch within its sync interval."""
+        return (
+            self.batch_synced_at is None or now - self.batch_synced_at >= self.get_sync_interval()
+        )
+
     @staticmethod
     def get_job_state(aws_job: dict) -> tuple[str, str | None]:
         """
@@ -392,37 +486,69 @@ class Job(TimestampedModel):
         return True
 
     # API SUBMISSION AND TERMINATION LOGIC
-    def submit(self, *, save=True):
+    def prepare_submit(
+        self,
+        locked_project_ids: Set[str] | None = None,
+        reusable_computed_files: Dict[uuid.UUID, ComputedFile] | None = None,
+    ) -> None:
         """
-        Submits the PENDING job to AWS Batch and assigns batch_job_id.
-        By default, saves the job as PROCESSING (state, timestamp).
-        (For bulk operations, the caller should pass False to prevent saving.)
-        Calls the dataset's method to sync the job's state.
+        Validates that the job can be submitted and dynamically configures it for submission.
+        When preparing jobs in bulk, the ids of locked projects and projects in the lockfile,
+        and the datasets' reusable computed files (see DatasetABC.get_reusable_computed_files)
+        can be passed, otherwise they're queried for the job's dataset.
         Raises an error when unable to submit:
         - JobSubmitNotPendingError
         - DatasetLockedProjectError
-        - JobSubmissionFailedError
         """
         if self.state != JobStates.PENDING:
             raise JobSubmitNotPendingError(self)
 
         # if job has dataset, dynamically configure job for submission
         if self.dataset:
-            if self.dataset.is_locked:
+            if locked_project_ids is None:
+                is_locked = self.dataset.is_locked
+            else:
+                is_locked = self.dataset.contains_project_ids(locked_project_ids)
+
+            if is_locked:
                 raise DatasetLockedProjectError(self.dataset)
 
-            # dynamically choose queue based on dataset size
-            self.batch_job_queue = settings.AWS_BATCH_FARGATE_JOB_QUEUE_NAME
-            self.batch_job_definition = settings.AWS_BATCH_FARGATE_JOB_DEFINITION_NAME
-            if self.dataset.estimated_size_in_bytes > Job.MAX_FARGATE_SIZE_IN_BYTES:
-                self.batch_job_queue = settings.AWS_BATCH_EC2_JOB_QUEUE_NAME
-                self.batch_job_definition = settings.AWS_BATCH_EC2_JOB_DEFINITION_NAME
+            if reusable_computed_files is None:
+                is_reusable = self.dataset.get_reusable_computed_file() is not None
+            else:
+                is_reusable = self.dataset.id in reusable_computed_files
 
-            # Save job to get ID before submitting
-            if not self.id:
-                self.save()
+            # dynamically choose queue and container resources based on the dataset
+            sizing = self.get_dataset_sizing(is_reusable)
+            self.batch_job_queue = sizing.batch_job_queue
+            self.batch_job_definition = sizing.batch_job_definition
+            self.batch_container_overrides = {
+                **self.batch_container_overrides,
+                "resourceRequirements": sizing.resource_requirements,
+            }
 
+    def get_dataset_sizing(self, is_reusable: bool = False) -> batch_sizing.JobSizing:
+        """
+        Returns the queue and container resources for processing the job's dataset,
+        based on its estimated size, number of files and whether it has merged or spatial files.
+        Datasets whose archive can be copied from another dataset (is_reusable)
+        get the smallest resources.
+        """
+        if is_reusable:
+            return batch_sizing.get_job_sizing(0, 0, includes_merged=False, includes_spatial=False)
+
+        return batch_sizing.get_job_sizing(
+            self.dataset.estimated_size_in_bytes,
+            self.dataset.original_file_count,
+            includes_merged=self.dataset.includes_files_merged,
+            includes_spatial=self.dataset.includes_spatial,
+        )
+
+    def set_dataset_command(self) -> None:
+        """Sets the command which processes the job's dataset. The job must already be saved."""
+        if self.dataset:
             self.batch_container_overrides = {
+                **self.batch_container_overrides,
                 "command": [
                     "python",
                     "manage.py",
@@ -432,6 +558,38 @@ class Job(TimestampedModel):
                 ],
             }
 
+    def get_resources_key(self) -> tuple:
+        """Returns the job's container resource requirements as a hashable key for grouping jobs."""
+        return tuple(
+            (requirement["type"], requirement["value"])
+            for requirement in self.batch_container_overrides.get("resourceRequirements", [])
+        )
+
+    def submit(self, *, save=True):
+        """
+        Submits the PENDING job to AWS Batch and assigns batch_job_id.
+        By default, saves the job as PROCESSING (state, timestamp).
+        When jobs are executed locally, the job is instead saved as PENDING for workers to claim.
+        (For bulk operations, use bulk_submit instead.)
+        Calls the dataset's method to sync the job's state.
+        Raises an error when unable to submit:
+        - JobSubmitNotPendingError
+        - DatasetLockedProjectError
+        - JobSubmissionFailedError
+        """
+        self.prepare_submit()
+
+        # Save job to get ID before submitting
+        if self.dataset and not self.id:
+            self.save()
+        self.set_dataset_command()
+
+        # Local workers claim PENDING jobs from the db instead, so the job is only saved
+        if settings.JOB_EXECUTOR == JobExecutors.LOCAL:
+            if save:
+                self.save()
+            return
+
         job_id = batch.submit_job(self)
 
         if not job_id:
@@ -445,77 +603,359 @@ class Job(TimestampedModel):
             if self.dataset:  # TODO: Remove after the dataset release
                 self.dataset.save()
 
-    def increment_attempt_or_fail(self) -> bool:
+    @classmethod
+    def bulk_submit(
+        cls, jobs: List[Self], *, as_array: bool = False, pack: bool = False
+    ) -> tuple[List[Self], List[Self]]:
+        """
+        Submits the passed PENDING jobs to AWS Batch concurrently,
+        as array jobs if as_array is passed (see submit_arrays),
+        or with small jobs packed together if pack is passed (see submit_packs).
+        Locked projects, the lockfile and reusable computed files are fetched once for all jobs,
+        and unsaved jobs are created in bulk.
+        Saves the submitted jobs as PROCESSING (batch attributes, state, timestamp)
+        and syncs their datasets' state in bulk.
+        Returns the submitted jobs and the jobs which couldn't be submitted, in the passed order.
+        """
+        locked_project_ids = set()
+        reusable_computed_files = {}
+        if datasets := [job.dataset for job in jobs if job.dataset]:
+            locked_project_ids = set(lockfile.get_locked_project_ids()) | set(
+                Project.objects.filter(is_locked=True).values_list("scpca_id", flat=True)
+            )
+            reusable_computed_files = DatasetABC.get_reusable_computed_files(datasets)
+
+        prepared_jobs = {}
+        for index, job in enumerate(jobs):
+            try:
+                job.prepare_submit(locked_project_ids, reusable_computed_files)
+                prepared_jobs[index] = job
+            except (JobError, DatasetError):
+                pass
+
+        # Save jobs to get IDs before submitting
+        if new_jobs := [job for job in prepared_jobs.values() if not job.id]:
+            cls.objects.bulk_create(new_jobs)
+
+        for job in prepared_jobs.values():
+            job.set_dataset_command()
+
+        # Local workers claim PENDING jobs from the db instead, so jobs are only saved
+        if settings.JOB_EXECUTOR == JobExecutors.LOCAL:
+            return list(prepared_jobs.values()), [
+                job for index, job in enumerate(jobs) if index not in prepared_jobs
+            ]
+
+        if as_array:
+            batch_job_ids = cls.submit_arrays(prepared_jobs)
+        elif pack:
+            batch_job_ids = cls.submit_packs(prepared_jobs)
+        else:
+            batch_job_ids = dict(
+                zip(prepared_jobs.keys(), batch.submit_jobs(list(prepared_jobs.values())))
+            )
+
+        submitted_jobs = []
+        unsubmitted_jobs = []
+
+        for index, job in enumerate(jobs):
+            if batch_job_id := batch_job_ids.get(index):
+                job.batch_job_id = batch_job_id
+                job.apply_state(JobStates.PROCESSING)
+                submitted_jobs.append(job)
+            else:
+                unsubmitted_jobs.append(job)
+
+        if submitted_jobs:
+            updated_batch_attrs = [
+                "batch_job_id",
+                "batch_job_queue",
+                "batch_job_definition",
+                "batch_container_overrides",
+                "batch_array_name",
+                "batch_array_index",
+            ]
+            cls.objects.bulk_update(submitted_jobs, updated_batch_attrs)
+            cls.bulk_update_state(submitted_jobs)
+            cls.bulk_update_dataset_state(submitted_jobs)
+
+        return submitted_jobs, unsubmitted_jobs
+
+    @classmethod
+    def submit_arrays(cls, jobs: Dict[int, Self]) -> Dict[int, str]:
+        """
+        Submits the passed saved jobs as AWS Batch array jobs, instead of one batch job per job.
+        An array job is submitted for each queue, definition, resources and command,
+        with up to MAX_ARRAY_SIZE children.
+        Each child runs the command without arguments, and resolves its job by array name
+        and index (see get_array_job), which are saved before submission.
+        Returns the child batch job IDs of the submitted jobs, keyed the same as the passed jobs.
+        """
+        array_groups = defaultdict(list)
+        for key, job in jobs.items():
+            command = job.batch_container_overrides["command"][:3]
+            resources = job.get_resources_key()
+            array_groups[
+                (job.batch_job_queue, job.batch_job_definition, resources, *command)
+            ].append(key)
+
+        batch_job_ids = {}
+        for group_keys in array_groups.values():
+            for array_keys in utils.get_chunk_list(group_keys, cls.MAX_ARRAY_SIZE):
+                array_jobs = [jobs[key] for key in array_keys]
+
+                if len(array_jobs) < cls.MIN_ARRAY_SIZE:
+                    if batch_job_id := batch.submit_job(array_jobs[0]):
+                        batch_job_ids[array_keys[0]] = batch_job_id
+                    continue
+
+                array_name = f"array-{uuid.uuid4()}"
+                for array_index, job in enumerate(array_jobs):
+                    job.batch_array_name = array_name
+                    job.batch_array_index = array_index
+                cls.objects.bulk_update(array_jobs, ["batch_array_name", "batch_array_index"])
+
+                array_job = cls(
+                    batch_job_name=array_name,
+                    batch_job_queue=array_jobs[0].batch_job_queue,
+                    batch_job_definition=array_jobs[0].batch_job_definition,
+                    batch_container_overrides={
+                        **array_jobs[0].batch_container_overrides,
+                        "command": [
+                            *array_jobs[0].batch_container_overrides["command"][:3],
+                            "--array-name",
+                            array_name,
+                        ],
+                    },
+                )
+
+                if array_batch_job_id := batch.submit_job(array_job, array_size=len(array_jobs)):
+                    # Children are addressed by the array job ID and their index
+                    for key, job in zip(array_keys, array_jobs):
+                        batch_job_ids[key] = f"{array_batch_job_id}:{job.batch_array_index}"
+                else:
+                    for job in array_jobs:
+                        job.batch_array_name = None
+                        job.batch_array_index = None
+                    cls.objects.bulk_update(array_jobs, ["batch_array_name", "batch_array_index"])
+
+        return batch_job_ids
+
+    @classmethod
+    def submit_packs(cls, jobs: Dict[int, Self]) -> Dict[int, str]:
+        """
+        Submits the passed saved jobs, packing jobs with small datasets together
+        so that each pack is processed in one container (see process_dataset --job-ids).
+        Jobs with datasets of at most AWS_BATCH_PACK_MAX_SIZE_IN_BYTES are packed
+        in groups of up to AWS_BATCH_PACK_MAX_JOBS with the same queue and resources,
+        and all other jobs are submitted individually.
+        Packed jobs share the batch job ID of their pack.
+        Returns the batch job IDs of the submitted jobs, keyed the same as the passed jobs.
+        """
+        packs = []
+        pack_groups = defaultdict(list)
+        for key, job in jobs.items():
+            if (
+                job.dataset
+                and job.dataset.estimated_size_in_bytes <= settings.AWS_BATCH_PACK_MAX_SIZE_IN_BYTES
+            ):
+                pack_groups[
+                    (job.batch_job_queue, job.batch_job_definition, job.get_resources_key())
+                ].append(key)
+            else:
+                packs.append([key])
+
+        for group_keys in pack_groups.values():
+            packs.extend(utils.get_chunk_list(group_keys, settings.AWS_BATCH_PACK_MAX_JOBS))
+
+        submissions = []
+        for pack_keys in packs:
+            pack_jobs = [jobs[key] for key in pack_keys]
+            if len(pack_jobs) == 1:
+                submissions.append(pack_jobs[0])
+                continue
+
+            submissions.append(
+                cls(
+                    batch_job_name=f"pack-{uuid.uuid4()}",
+                    batch_job_queue=pack_jobs[0].batch_job_queue,
+                    batch_job_definition=pack_jobs[0].batch_job_definition,
+                    batch_container_overrides={
+                        **pack_jobs[0].batch_container_overrides,
+                        "command": [
+                            "python",
+                            "manage.py",
+                            "process_dataset",
+                            "--job-ids",
+                            ",".join(str(job.id) for job in pack_jobs),
+                        ],
+                    },
+                )
+            )
+
+        batch_job_ids = {}
+        for pack_keys, batch_job_id in zip(packs, batch.submit_jobs(submissions)):
+            if batch_job_id:
+                batch_job_ids.update({key: batch_job_id for key in pack_keys})
+
+        return batch_job_ids
+
+    @classmethod
+    def claim_pending(
+        cls,
+        max_size_in_bytes: int | None = None,
+        batch_job_id: str | None = None,
+        exclude_dataset_ids: Iterable[str] = (),
+        worker_id: str | None = None,
+    ) -> Self | None:
+        """
+        Claims the next PENDING dataset job, optionally only if its dataset is at most
+        the passed size, for processing by an already running container or local worker.
+        Jobs locked by other containers, workers or submit_pending are skipped,
+        as are jobs of the passed datasets (e.g. retries of datasets the container processed).
+        Saves the claimed job as PROCESSING with the container's batch_job_id
+        or the local worker's id and heartbeat, and syncs its dataset's state.
+        Returns the claimed job, or None if there are no jobs left to claim.
+        """
+        jobs = cls.objects.filter(state=JobStates.PENDING, dataset_object_id__isnull=False)
+        if max_size_in_bytes is not None:
+            jobs = jobs.filter_dataset_size(max_size_in_bytes)
+
+        with transaction.atomic():
+            job = (
+                jobs.exclude(dataset_object_id__in=exclude_dataset_ids)
+                .select_for_update(skip_locked=True)
+                .first()
+            )
+            if not job:
+                return None
+
+            job.batch_job_id = batch_job_id
+            job.worker_id = worker_id
+            if worker_id:
+                job.heartbeat_at = make_aware(datetime.now())
+            job.apply_state(JobStates.PROCESSING)
+            job.set_dataset_command()
+            job.save()
+            cls.bulk_update_dataset_state([job])
+
+        return job
+
+    @classmethod
+    def recover_stale(
+        cls, stale_after_seconds: float, dead_worker_ids: Iterable[str] = ()
+    ) -> List[Self]:
+        """
+        Fails PROCESSING jobs of local workers which haven't sent a heartbeat
+        within the passed number of seconds (e.g. the worker was killed),
+        or of the passed workers which are known to have exited,
+        and creates PENDING retry jobs for them.
+        Returns the newly created retry jobs.
+        """
+        stale_at = make_aware(datetime.now() - timedelta(seconds=stale_after_seconds))
+        stale_jobs = list(
+            cls.objects.filter(state=JobStates.PROCESSING, worker_id__isnull=False)
+            .filter(models.Q(heartbeat_at__lt=stale_at) | models.Q(worker_id__in=dead_worker_ids))
+            .with_datasets()
+        )
+        if not stale_jobs:
+            return []
+
+        for job in stale_jobs:
+            job.apply_state(JobStates.FAILED, "Worker stopped sending heartbeats.")
+
+        logger.info(f"Recovering {len(stale_jobs)} jobs from unresponsive workers.")
+        cls.bulk_update_state(stale_jobs)
+        cls.bulk_update_dataset_state(stale_jobs)
+
+        return cls.create_retry_jobs(stale_jobs)
+
+    def increment_attempt_or_fail(self, *, save=True) -> bool:
         """
         Increment a job's attempt count.
         If attempts exceed the max allotted job attempts, fail the job.
+        By default, saves the job.
+        (For bulk operations, the caller should pass False to prevent saving.)
         """
         if self.attempt >= common.MAX_JOB_ATTEMPTS:
             self.apply_state(JobStates.FAILED, "Unable to dispatch job to aws")
-            self.save()
+            if save:
+                self.save()
             return False
 
         self.attempt += 1
-        self.save()
+        if save:
+            self.save()
         return True
 
     @classmethod
-    def submit_pending(cls) -> tuple[List[Self], List[Self], List[Self]]:
+    def submit_pending(cls, *, pack: bool = False) -> tuple[List[Self], List[Self], List[Self]]:
         """
         Submits all PENDING jobs to AWS Batch.
+        If pack is passed, jobs with small datasets are packed together (see submit_packs).
         Updates the jobs' batch_job_id and saves them as PROCESSING (state, timestamp).
         Calls the datasets' method to sync the jobs' state.
-        Returns all the submitted jobs.
+        Increments the attempts of jobs which couldn't be submitted, failing them when exhausted.
+        Jobs are claimed before they're submitted, and released if they weren't submitted.
+        Returns the submitted, still pending and failed jobs.
         """
-        submitted_jobs = []
-        submitted_datasets = defaultdict(list)
+        # Pending jobs are claimed in a short transaction by saving them as PROCESSING,
+        # so that running containers and other submitters skip them while they're submitted.
+        # No locks are held while calling Batch, and submissions are never rolled back.
+        with transaction.atomic():
+            jobs = list(
+                Job.objects.filter(state=JobStates.PENDING)
+                .select_for_update(skip_locked=True)
+                .with_datasets()
+            )
+            cls.objects.filter(pk__in=[job.pk for job in jobs]).update(state=JobStates.PROCESSING)
+
+        # Claimed jobs which weren't submitted are released if submission raises
+        try:
+            submitted_jobs, unsubmitted_jobs = cls.bulk_submit(jobs, pack=pack)
+        except Exception:
+            cls.objects.filter(
+                pk__in=[job.pk for job in jobs if job.state == JobStates.PENDING]
+            ).update(state=JobStates.PENDING)
+            raise
+
         pending_jobs = []
         failed_jobs = []
+        for job in unsubmitted_jobs:
+            if job.increment_attempt_or_fail(save=False):
+                pending_jobs.append(job)
+            else:
+                failed_jobs.append(job)
 
-        for job in Job.objects.filter(state=JobStates.PENDING):
-            try:
-                job.submit(save=False)  # Jobs are saved in bulk outside of the loop
-                submitted_jobs.append(job)
-                if job.dataset:  # TODO: Remove after the dataset release
-                    submitted_datasets[job.dataset.get_class()].append(job.dataset)
-            except (JobError, DatasetError):
-                if job.increment_attempt_or_fail():
-                    pending_jobs.append(job)
-                else:
-                    failed_jobs.append(job)
-
-        if submitted_jobs:
-            updated_batch_attrs = ["batch_job_id", "batch_job_queue", "batch_job_definition"]
-            cls.objects.bulk_update(submitted_jobs, updated_batch_attrs)
-            cls.bulk_update_state(submitted_jobs)
-            if submitted_datasets:  # TODO: Remove after the dataset release
-                for dataset_cls, datasets in submitted_datasets.items():
-                    dataset_cls.bulk_update_state(datasets)
+        # Jobs which are still pending are released, including jobs which local workers claim
+        if released_jobs := [
+            job for job in [*submitted_jobs, *pending_jobs] if job.state == JobStates.PENDING
+        ]:
+            cls.objects.bulk_update(released_jobs, ["state", "attempt"])
+        if failed_jobs:
+            cls.bulk_update_state(failed_jobs)
 
         return submitted_jobs, pending_jobs, failed_jobs
 
     @classmethod
     def submit_ccdl_datasets(
-        cls, ccdl_datasets: List[CCDLDataset]
+        cls, ccdl_datasets: List[CCDLDataset], *, as_array: bool = False
     ) -> tuple[List[Self], List[Self]]:
-        """Gets and submits jobs for all passed ccdl datasets."""
-        submitted_jobs = []
-        failed_jobs = []
-
-        for dataset in ccdl_datasets:
-            job = Job.get_dataset_job(dataset)
-            try:
-                job.submit()
-                submitted_jobs.append(job)
-            except (DatasetError, JobError):
-                failed_jobs.append(dataset)
-
-        return submitted_jobs, failed_jobs
+        """
+        Gets and submits jobs for all passed ccdl datasets,
+        as array jobs if as_array is passed.
+        Returns the submitted jobs and the jobs which failed to submit.
+        """
+        return cls.bulk_submit(
+            [cls.get_dataset_job(dataset) for dataset in ccdl_datasets], as_array=as_array
+        )
 
     def terminate(self, reason: str | None = "Terminated processing job", *, save=True):
         """
         Terminates the PROCESSING job (incomplete) on AWS Batch.
-        By default, saves the job as TERMINATED (state, timestamp, reason)
+        Jobs of local workers aren't run on AWS Batch, and are only saved as TERMINATED.
+        By default, saves the job as TERMINATED (state, timestamp, reason),
+        along with other PROCESSING jobs which share its batch job (e.g. packed jobs).
         Calls the dataset's method to sync the job's state.
         Raises an error when unable to terminate:
         - JobInvalidTerminateStateError
@@ -524,7 +964,7 @@ class Job(TimestampedModel):
         if self.state in common.FINAL_JOB_STATES:
             raise JobInvalidTerminateStateError(self)
 
-        if not batch.terminate_job(self):
+        if self.batch_job_id and not batch.terminate_job(self):
             raise JobTerminationFailedError(self)
 
         self.apply_state(JobStates.TERMINATED, reason)
@@ -534,39 +974,53 @@ class Job(TimestampedModel):
             if self.dataset:  # TODO: Remove after the dataset release
                 self.dataset.save()
 
+            # Jobs which shared the batch job were terminated along with it
+            if self.batch_job_id and (
+                shared_jobs := list(
+                    Job.objects.filter(batch_job_id=self.batch_job_id, state=JobStates.PROCESSING)
+                    .exclude(pk=self.pk)
+                    .with_datasets()
+                )
+            ):
+                for job in shared_jobs:
+                    job.apply_state(JobStates.TERMINATED, reason)
+                Job.bulk_update_state(shared_jobs)
+                Job.bulk_update_dataset_state(shared_jobs)
+
     @classmethod
     def terminate_processing(cls, reason: str | None = "Terminated processing jobs") -> List[Self]:
         """
         Terminates all PROCESSING jobs (incomplete) on AWS Batch.
+        Each batch job is terminated once, along with all of the jobs which share it
+        (e.g. packed jobs), and jobs of local workers are terminated without calling AWS Batch.
         Saves the jobs as TERMINATED (state, timestamp, reason).
         Calls the datasets' method to sync the jobs' state.
         Returns all the terminated jobs.
         """
         terminated_jobs = []
-        terminated_datasets = defaultdict(list)
-        final_state_jobs = []
         failed_jobs = []
 
-        for job in cls.objects.filter(state=JobStates.PROCESSING):
-            try:
-                job.terminate(reason=reason, save=False)
+        batch_jobs = defaultdict(list)
+        for job in cls.objects.filter(state=JobStates.PROCESSING).with_datasets():
+            if job.batch_job_id:
+                batch_jobs[job.batch_job_id].append(job)
+            else:
                 terminated_jobs.append(job)
-                if job.dataset:  # TODO: Remove after the dataset release
-                    terminated_datasets[job.dataset.get_class()].append(job.dataset)
-            except JobInvalidTerminateStateError:
-                final_state_jobs.append(job)
-            except JobError:
-                failed_jobs.append(job)
+
+        for shared_jobs in batch_jobs.values():
+            if batch.terminate_job(shared_jobs[0]):
+                terminated_jobs.extend(shared_jobs)
+            else:
+                failed_jobs.extend(shared_jobs)
+
+        for job in terminated_jobs:
+            job.apply_state(JobStates.TERMINATED, reason)
 
         if terminated_jobs:
             logger.info(f"Terminated {len(terminated_jobs)} jobs on AWS.")
             cls.bulk_update_state(terminated_jobs)
-            if terminated_datasets:  # TODO: Remove after the dataset release
-                for dataset_cls, datasets in terminated_datasets.items():
-                    dataset_cls.bulk_update_state(datasets)
+            cls.bulk_update_dataset_state(terminated_jobs)
 
-        if final_state_jobs:
-            logger.info(f"{len(final_state_jobs)} jobs were not in a terminable state.")
         if failed_jobs:
             logger.info(f"{len(failed_jobs)} jobs failed to terminate.")
 
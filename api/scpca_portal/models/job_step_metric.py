@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Dict, List
+
+from django.db import models
+from django.db.models.functions import Greatest
+
+from scpca_portal import common
+from scpca_portal.models.base import TimestampedModel
+
+
+class Percentile(models.Aggregate):
+    """Postgres continuous percentile of the passed expression, e.g. 0.5 for the median."""
+
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = models.FloatField()
+
+    def __init__(self, expression, percentile: float, **extra):
+        super().__init__(expression, percentile=percentile, **extra)
+
+
+class JobStepMetric(TimestampedModel):
+    """Timings and throughput of a single step of a processed job.
+
+    One of these is recorded per step each time a job processor runs.
+    Counters are only set by steps which transfer or write files,
+    and `peak_rss_in_bytes` is the peak memory usage of the process while the step ran,
+    sampled periodically, which includes any steps running at the same time.
+    """
+
+    class Meta:
+        db_table = "job_step_metrics"
+        get_latest_by = "updated_at"
+        ordering = ["started_at", "id"]
+
+    # Upper bounds of the dataset size buckets which metrics are reported for
+    SIZE_BUCKETS = {
+        "<100MB": 100 * common.MB_IN_BYTES,
+        "100MB-1GB": common.GB_IN_BYTES,
+        "1GB-10GB": 10 * common.GB_IN_BYTES,
+        "10GB-100GB": 100 * common.GB_IN_BYTES,
+    }
+    LARGEST_SIZE_BUCKET = ">100GB"
+    # Jobs without datasets
+    NO_SIZE_BUCKET = "N/A"
+
+    step = models.TextField()
+    succeeded = models.BooleanField(default=True)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    duration = models.FloatField()  # in seconds
+
+    bytes_downloaded = models.BigIntegerField(default=0)
+    bytes_written = models.BigIntegerField(default=0)
+    bytes_uploaded = models.BigIntegerField(default=0)
+    file_count = models.PositiveIntegerField(default=0)
+    peak_rss_in_bytes = models.BigIntegerField(null=True)
+    # The dataset's estimated size when the job was processed
+    dataset_size_in_bytes = models.BigIntegerField(null=True)
+
+    job = models.ForeignKey("Job", on_delete=models.CASCADE, related_name="step_metrics")
+
+    def __str__(self):
+        return f"JobStepMetric {self.job_id} {self.step} {self.duration:.2f}s"
+
+    @classmethod
+    def get_size_bucket_expression(cls) -> models.Case:
+        """Returns an expression which labels metrics with their dataset size bucket."""
+        return models.Case(
+            models.When(dataset_size_in_bytes__isnull=True, then=models.Value(cls.NO_SIZE_BUCKET)),
+            *[
+                models.When(dataset_size_in_bytes__lt=max_size, then=models.Value(bucket))
+                for bucket, max_size in cls.SIZE_BUCKETS.items()
+            ],
+            default=models.Value(cls.LARGEST_SIZE_BUCKET),
+            output_field=models.TextField(),
+        )
+
+    @classmethod
+    def get_stats(cls, since: datetime | None = None) -> List[Dict]:
+        """
+        Returns the p50 and p95 duration and throughput of each step per dataset size bucket,
+        computed in the db from successful steps.
+        """
+        metrics = cls.objects.filter(succeeded=True)
+        if since:
+            metrics = metrics.filter(started_at__gte=since)
+
+        transferred_bytes = (
+            models.F("bytes_downloaded") + models.F("bytes_written") + models.F("bytes_uploaded")
+        )
+        return list(
+            metrics.annotate(
+                size_bucket=cls.get_size_bucket_expression(),
+                # Steps which took no measurable time are counted as taking a millisecond
+                throughput=models.ExpressionWrapper(
+                    transferred_bytes / Greatest("duration", models.Value(0.001)),
+                    output_field=models.FloatField(),
+                ),
+            )
+            .values("step", "size_bucket")
+            .annotate(
+                count=models.Count("id"),
+                duration_p50=Percentile("duration", 0.5),
+                duration_p95=Percentile("duration", 0.95),
+                throughput_p50=Percentile("throughput", 0.5),
+                throughput_p95=Percentile("throughput", 0.95),
+                peak_rss_in_bytes=models.Max("peak_rss_in_bytes"),
+                # Orders buckets from smallest to largest, followed by jobs without datasets
+                min_dataset_size_in_bytes=models.Min("dataset_size_in_bytes"),
+            )
+            .order_by("step", "min_dataset_size_in_bytes")
+        )
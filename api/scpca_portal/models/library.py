@@ -1,14 +1,25 @@
-from typing import Dict, List, Self
+from collections import defaultdict
+from typing import Any, Dict, List, Self, Set, Tuple
 
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet, prefetch_related_objects
 
 from scpca_portal import common, metadata_parser
 from scpca_portal.enums import FileFormats, Modalities
 from scpca_portal.models.base import TimestampedModel
 from scpca_portal.models.original_file import OriginalFile
 
+# Attributes which are compared when updating existing libraries
+UPDATED_LIBRARY_ATTRS = [
+    "formats",
+    "has_cite_seq_data",
+    "is_multiplexed",
+    "metadata",
+    "modality",
+    "workflow_version",
+]
+
 
 class Library(TimestampedModel):
     class Meta:
@@ -30,32 +41,40 @@ class Library(TimestampedModel):
         return f"Library {self.scpca_id}"
 
     @classmethod
-    def get_from_dict(cls, data, project) -> Self:
+    def get_from_dict(cls, data, project, file_flags: Dict[str, bool] | None = None) -> Self:
+        """
+        Return an unsaved Library built from the passed metadata dict.
+        The library's original file flags are queried unless they're passed in,
+        see OriginalFile.get_library_file_flags.
+        """
         library_id = data["scpca_library_id"]
-        original_files = OriginalFile.downloadable_objects.filter(library_id=library_id)
+        if file_flags is None:
+            file_flags = OriginalFile.get_library_file_flags(library_id=library_id).get(
+                library_id, {}
+            )
 
         modality = ""
-        if original_files.filter(is_single_cell=True).exists():
+        if file_flags.get("is_single_cell"):
             modality = Modalities.SINGLE_CELL
-        elif original_files.filter(is_spatial=True).exists():
+        elif file_flags.get("is_spatial"):
             modality = Modalities.SPATIAL
         elif data.get("seq_unit") == "bulk":
             modality = Modalities.BULK_RNA_SEQ
 
         formats = []
         if modality == Modalities.SPATIAL:
-            if original_files.filter(is_spatial_spaceranger=True).exists():
+            if file_flags.get("is_spatial_spaceranger"):
                 formats.append(FileFormats.SPATIAL_SPACERANGER)
         else:
-            if original_files.filter(is_single_cell_experiment=True).exists():
+            if file_flags.get("is_single_cell_experiment"):
                 formats.append(FileFormats.SINGLE_CELL_EXPERIMENT)
-            if original_files.filter(is_anndata=True).exists():
+            if file_flags.get("is_anndata"):
                 formats.append(FileFormats.ANN_DATA)
 
         library = cls(
             formats=sorted(formats),
             is_multiplexed=data.get("is_multiplexed", False),
-            has_cite_seq_data=original_files.filter(is_cite_seq=True).exists(),
+            has_cite_seq_data=file_flags.get("is_cite_seq", False),
             metadata=data,
             modality=modality,
             project=project,
@@ -66,22 +85,131 @@ class Library(TimestampedModel):
         return library
 
     @classmethod
-    def bulk_create_from_dicts(cls, library_jsons: List[Dict], sample) -> None:
-        libraries = []
-        for library_json in library_jsons:
+    def bulk_create_from_dicts(cls, library_jsons_samples: List[tuple[Dict, Any]], project) -> None:
+        """
+        Creates libraries from the passed (library json, sample) pairs
+        and associates each library with its paired sample.
+        Existing libraries are looked up with one query, new libraries are created with one insert,
+        and all sample associations are added with one more.
+        """
+        library_ids = {
+            library_json["scpca_library_id"] for library_json, _ in library_jsons_samples
+        }
+        libraries_by_id = {
+            library.scpca_id: library
+            for library in Library.objects.filter(scpca_id__in=library_ids)
+        }
+        library_file_flags = OriginalFile.get_library_file_flags(project_id=project.scpca_id)
+
+        new_libraries = []
+        for library_json, _ in library_jsons_samples:
             library_id = library_json["scpca_library_id"]
-            if existing_library := Library.objects.filter(scpca_id=library_id).first():
-                sample.libraries.add(existing_library)
-            else:
-                libraries.append(Library.get_from_dict(library_json, sample.project))
+            if library_id not in libraries_by_id:
+                library = Library.get_from_dict(
+                    library_json, project, library_file_flags.get(library_id, {})
+                )
+                libraries_by_id[library_id] = library
+                new_libraries.append(library)
+
+        Library.objects.bulk_create(new_libraries)
+
+        SampleLibrary = Library.samples.through
+        sample_library_ids = {
+            (sample.pk, libraries_by_id[library_json["scpca_library_id"]].pk)
+            for library_json, sample in library_jsons_samples
+        }
+        # Existing associations are skipped, the same as with sample.libraries.add()
+        SampleLibrary.objects.bulk_create(
+            [
+                SampleLibrary(sample_id=sample_id, library_id=library_id)
+                for sample_id, library_id in sample_library_ids
+            ],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def update_from_dicts(cls, library_jsons_samples: List[tuple[Dict, Any]], project) -> Set[int]:
+        """
+        Brings the project's libraries in line with the passed (library json, sample) pairs.
+        New libraries are created, libraries which are no longer passed are deleted,
+        and only libraries whose attributes or samples have changed are updated.
+        Returns the primary keys of the samples whose libraries were changed.
+        """
+        library_jsons = {}
+        library_sample_ids = defaultdict(set)
+        for library_json, sample in library_jsons_samples:
+            library_jsons[library_json["scpca_library_id"]] = library_json
+            library_sample_ids[library_json["scpca_library_id"]].add(sample.pk)
+
+        existing_libraries = {
+            library.scpca_id: library for library in project.libraries.prefetch_related("samples")
+        }
+        existing_library_sample_ids = {
+            library_id: {sample.pk for sample in library.samples.all()}
+            for library_id, library in existing_libraries.items()
+        }
 
-        Library.objects.bulk_create(libraries)
-        sample.libraries.add(*libraries)
+        changed_sample_ids = set()
+        removed_library_ids = existing_libraries.keys() - library_jsons.keys()
+        for library_id in removed_library_ids:
+            changed_sample_ids |= existing_library_sample_ids[library_id]
+        Library.objects.filter(project=project, scpca_id__in=removed_library_ids).delete()
+
+        new_library_ids = library_jsons.keys() - existing_libraries.keys()
+        for library_id in new_library_ids:
+            changed_sample_ids |= library_sample_ids[library_id]
+        Library.bulk_create_from_dicts(
+            [
+                (library_json, sample)
+                for library_json, sample in library_jsons_samples
+                if library_json["scpca_library_id"] in new_library_ids
+            ],
+            project,
+        )
+
+        library_file_flags = OriginalFile.get_library_file_flags(project_id=project.scpca_id)
+        updated_libraries = []
+        SampleLibrary = Library.samples.through
+        removed_sample_libraries = Q(pk__in=[])
+        added_sample_libraries = []
+        for library_id in existing_libraries.keys() & library_jsons.keys():
+            library = existing_libraries[library_id]
+            current_library = Library.get_from_dict(
+                library_jsons[library_id], project, library_file_flags.get(library_id, {})
+            )
+            if any(
+                getattr(library, attr) != getattr(current_library, attr)
+                for attr in UPDATED_LIBRARY_ATTRS
+            ):
+                for attr in UPDATED_LIBRARY_ATTRS:
+                    setattr(library, attr, getattr(current_library, attr))
+                updated_libraries.append(library)
+                changed_sample_ids |= existing_library_sample_ids[library_id]
+                changed_sample_ids |= library_sample_ids[library_id]
+
+            existing_sample_ids = existing_library_sample_ids[library_id]
+            if existing_sample_ids != library_sample_ids[library_id]:
+                changed_sample_ids |= existing_sample_ids ^ library_sample_ids[library_id]
+                removed_sample_libraries |= Q(
+                    library=library,
+                    sample_id__in=existing_sample_ids - library_sample_ids[library_id],
+                )
+                added_sample_libraries.extend(
+                    SampleLibrary(sample_id=sample_id, library=library)
+                    for sample_id in library_sample_ids[library_id] - existing_sample_ids
+                )
+
+        Library.objects.bulk_update(updated_libraries, UPDATED_LIBRARY_ATTRS)
+        SampleLibrary.objects.filter(removed_sample_libraries).delete()
+        SampleLibrary.objects.bulk_create(added_sample_libraries)
+
+        return changed_sample_ids
 
     @classmethod
-    def load_bulk_metadata(cls, project) -> None:
+    def get_bulk_library_jsons_samples(cls, project) -> List[tuple[Dict, Any]]:
         """
-        Parses bulk metadata tsv files and create Library objets for bulk-only samples
+        Parses bulk metadata tsv files and returns (library json, sample) pairs
+        for the project's bulk-only samples.
         """
         if not project.has_bulk_rna_seq:
             raise Exception("Trying to load bulk libraries for project with no bulk data")
@@ -90,15 +218,25 @@ class Library(TimestampedModel):
 
         sample_by_id = {sample.scpca_id: sample for sample in project.samples.all()}
 
-        for lib_metadata in all_bulk_libraries_metadata:
-            if sample := sample_by_id.get(lib_metadata["scpca_sample_id"]):
-                Library.bulk_create_from_dicts([lib_metadata], sample)
+        return [
+            (lib_metadata, sample)
+            for lib_metadata in all_bulk_libraries_metadata
+            if (sample := sample_by_id.get(lib_metadata["scpca_sample_id"]))
+        ]
 
     @classmethod
-    def load_metadata(cls, project) -> None:
+    def load_bulk_metadata(cls, project) -> None:
         """
-        Parses library metadata json files and creates Library objects.
-        If the project has bulk, loads bulk libraries.
+        Parses bulk metadata tsv files and create Library objets for bulk-only samples
+        """
+        Library.bulk_create_from_dicts(cls.get_bulk_library_jsons_samples(project), project)
+
+    @classmethod
+    def get_library_jsons_samples(cls, project) -> List[tuple[Dict, Any]]:
+        """
+        Parses library metadata json files and returns (library json, sample) pairs
+        for each of the project's libraries and their samples.
+        If the project has bulk, bulk libraries are included.
         """
         libraries_metadata = metadata_parser.load_libraries_metadata(project.scpca_id)
         library_files = OriginalFile.get_input_library_metadata_files(project.scpca_id)
@@ -108,16 +246,27 @@ class Library(TimestampedModel):
         }
         sample_by_id = {sample.scpca_id: sample for sample in project.samples.all()}
 
+        libraries_metadata_samples = []
         for library_file in library_files:
             if lib_metadata := library_metadata_by_id.get(library_file.library_id):
                 #  Multiplexed samples will have multiple sample IDs in lib.sample_ids
                 for sample_id in library_file.sample_ids:
                     # Only create the library if the sample exists in the project
                     if sample := sample_by_id.get(sample_id):
-                        Library.bulk_create_from_dicts([lib_metadata], sample)
+                        libraries_metadata_samples.append((lib_metadata, sample))
 
         if project.has_bulk_rna_seq:
-            Library.load_bulk_metadata(project)
+            libraries_metadata_samples.extend(cls.get_bulk_library_jsons_samples(project))
+
+        return libraries_metadata_samples
+
+    @classmethod
+    def load_metadata(cls, project) -> None:
+        """
+        Parses library metadata json files and creates Library objects.
+        If the project has bulk, loads bulk libraries.
+        """
+        Library.bulk_create_from_dicts(cls.get_library_jsons_samples(project), project)
 
     @property
     def original_files(self) -> QuerySet[OriginalFile]:
@@ -171,10 +320,38 @@ class Library(TimestampedModel):
         return original_files.exclude(is_single_cell_experiment=True).exclude(is_anndata=True)
 
     @staticmethod
-    def get_libraries_metadata(libraries) -> List[Dict]:
-        return [
-            lib_md for library in libraries for lib_md in library.get_combined_library_metadata()
-        ]
+    def get_libraries_samples_metadata(libraries) -> List[Tuple[Self, Any, Dict]]:
+        """
+        Return the combined metadata of the passed libraries, with one (library, sample, metadata)
+        tuple per library and sample.
+        Projects and samples are fetched in bulk and their metadata dicts are only built once,
+        so the number of queries doesn't grow with the number of libraries.
+        """
+        libraries = list(libraries)
+        prefetch_related_objects(libraries, "project", "samples")
+
+        projects_metadata = {}
+        samples_metadata = {}
+        libraries_samples_metadata = []
+        for library in libraries:
+            if library.project_id not in projects_metadata:
+                projects_metadata[library.project_id] = library.project.get_metadata()
+
+            for sample in library.samples.all():
+                if sample.pk not in samples_metadata:
+                    samples_metadata[sample.pk] = sample.get_metadata()
+
+                libraries_samples_metadata.append(
+                    (
+                        library,
+                        sample,
+                        projects_metadata[library.project_id]
+                        | samples_metadata[sample.pk]
+                        | library.get_metadata(sample.scpca_id),
+                    )
+                )
+
+        return libraries_samples_metadata
 
     @staticmethod
     def get_libraries_original_files(libraries, download_config) -> List[OriginalFile]:
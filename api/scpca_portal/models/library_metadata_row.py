@@ -0,0 +1,158 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Iterator, Set
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.db import models
+from django.db.models import Value
+from django.db.models.functions import MD5, Coalesce
+from django.utils.timezone import make_aware
+
+from typing_extensions import Self
+
+from scpca_portal import common, metadata_file
+from scpca_portal.models.base import TimestampedModel
+from scpca_portal.models.library import Library
+
+
+class LibraryMetadataRow(TimestampedModel):
+    """A single row of a metadata file.
+
+    There is one of these per library and sample. `metadata` holds the library's combined
+    project, sample and library metadata, already formatted for writing to a metadata file.
+    Rows are refreshed whenever a project's metadata is loaded, so that metadata files
+    can be built with a single ordered query instead of from each model's metadata.
+    """
+
+    class Meta:
+        db_table = "library_metadata_rows"
+        get_latest_by = "updated_at"
+        # Matches the row order of metadata files
+        ordering = ["scpca_project_id", "scpca_sample_id", "scpca_library_id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["library", "sample"], name="unique_library_metadata_row_library_sample"
+            )
+        ]
+
+    digest = models.CharField(max_length=32)
+    metadata = models.JSONField(default=dict)
+    # The C collation sorts by code point, the same way that python sorts strings
+    scpca_library_id = models.TextField(db_collation="C")
+    scpca_project_id = models.TextField(db_collation="C")
+    scpca_sample_id = models.TextField(db_collation="C")
+
+    library = models.ForeignKey("Library", on_delete=models.CASCADE, related_name="metadata_rows")
+    sample = models.ForeignKey("Sample", on_delete=models.CASCADE, related_name="metadata_rows")
+
+    def __str__(self):
+        return f"LibraryMetadataRow {self.scpca_library_id} {self.scpca_sample_id}"
+
+    @classmethod
+    def get_from_library_sample(cls, library, sample, library_metadata: Dict) -> Self:
+        """
+        Return an unsaved row with the library's combined metadata for the passed sample
+        (see Library.get_libraries_samples_metadata).
+        """
+        metadata = metadata_file.format_metadata_dict(library_metadata)
+
+        return cls(
+            digest=cls.get_digest(metadata),
+            metadata=metadata,
+            scpca_library_id=metadata[common.LIBRARY_ID_KEY],
+            scpca_project_id=metadata[common.PROJECT_ID_KEY],
+            scpca_sample_id=metadata[common.SAMPLE_ID_KEY],
+            library=library,
+            sample=sample,
+        )
+
+    @staticmethod
+    def get_digest(metadata: Dict) -> str:
+        """Return a hash of the passed metadata dict which doesn't depend on key order."""
+        return hashlib.md5(json.dumps(metadata, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def refresh_project_rows(cls, project) -> Set[int]:
+        """
+        Brings the project's rows in line with its current libraries and samples.
+        Only rows whose digest has changed are updated, new rows are created
+        and rows of library and sample pairs which no longer exist are deleted.
+        Returns the primary keys of the samples whose rows were changed.
+        """
+        current_rows = {
+            (library.pk, sample.pk): cls.get_from_library_sample(library, sample, library_metadata)
+            for library, sample, library_metadata in Library.get_libraries_samples_metadata(
+                project.libraries.all()
+            )
+        }
+        existing_rows = {
+            (row.library_id, row.sample_id): row
+            for row in cls.objects.filter(library__project=project)
+        }
+
+        cls.objects.filter(
+            pk__in=[row.pk for key, row in existing_rows.items() if key not in current_rows]
+        ).delete()
+
+        cls.objects.bulk_create(
+            [row for key, row in current_rows.items() if key not in existing_rows]
+        )
+
+        # bulk_update doesn't apply auto_now, so updated_at is set explicitly
+        updated_at = make_aware(datetime.now())
+        updated_rows = []
+        for key, existing_row in existing_rows.items():
+            current_row = current_rows.get(key)
+            if current_row and current_row.digest != existing_row.digest:
+                current_row.pk = existing_row.pk
+                current_row.updated_at = updated_at
+                updated_rows.append(current_row)
+
+        cls.objects.bulk_update(
+            updated_rows,
+            [
+                "digest",
+                "metadata",
+                "scpca_library_id",
+                "scpca_project_id",
+                "scpca_sample_id",
+                "updated_at",
+            ],
+        )
+
+        changed_keys = current_rows.keys() ^ existing_rows.keys()
+        return {sample_id for _, sample_id in changed_keys} | {
+            row.sample_id for row in updated_rows
+        }
+
+    @classmethod
+    def get_sorted_libraries_metadata(cls, libraries) -> Iterator[Dict]:
+        """
+        Yield the formatted metadata rows of the passed libraries in metadata file order,
+        without loading them all into memory.
+        """
+        return (
+            cls.objects.filter(library__in=libraries).values_list("metadata", flat=True).iterator()
+        )
+
+    @classmethod
+    def get_fingerprint(cls, libraries) -> str:
+        """
+        Return a hash of the ordered row digests of the passed libraries, computed in the db.
+        Libraries with identical fingerprints have identical metadata file contents.
+        """
+        return (
+            cls.objects.filter(library__in=libraries)
+            .order_by()
+            .aggregate(
+                fingerprint=MD5(
+                    Coalesce(
+                        StringAgg("digest", delimiter="", order_by=cls._meta.ordering),
+                        Value(""),
+                        output_field=models.TextField(),
+                    )
+                )
+            )
+            .get("fingerprint")
+        )
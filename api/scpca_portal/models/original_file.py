@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
 from django.conf import settings
+from django.contrib.postgres.aggregates import BoolOr
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
 
@@ -16,6 +17,17 @@ from scpca_portal.models.base import TimestampedModel
 logger = get_and_configure_logger(__name__)
 
 
+# Flags which determine a library's modality, formats and cite-seq data
+LIBRARY_FILE_FLAGS = [
+    "is_single_cell",
+    "is_spatial",
+    "is_spatial_spaceranger",
+    "is_single_cell_experiment",
+    "is_anndata",
+    "is_cite_seq",
+]
+
+
 class DownloadableFileManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(is_downloadable=True)
@@ -273,6 +285,27 @@ class OriginalFile(TimestampedModel):
 
         return bucket_paths
 
+    @classmethod
+    def get_library_file_flags(cls, **filters) -> Dict[str, Dict[str, bool]]:
+        """
+        Return a dict of library ids to their LIBRARY_FILE_FLAGS,
+        where a flag is set if it is set on any of the library's downloadable files.
+        All libraries matching the passed filters are aggregated in a single query.
+        """
+        library_files_flags = (
+            cls.downloadable_objects.filter(library_id__isnull=False, **filters)
+            .values("library_id")
+            .annotate(**{f"any_{flag}": BoolOr(flag) for flag in LIBRARY_FILE_FLAGS})
+            .order_by()
+        )
+
+        return {
+            library_file_flags["library_id"]: {
+                flag: library_file_flags[f"any_{flag}"] for flag in LIBRARY_FILE_FLAGS
+            }
+            for library_file_flags in library_files_flags
+        }
+
     @classmethod
     def get_input_projects_metadata_file(
         cls, *, bucket: str = settings.AWS_S3_INPUT_BUCKET_NAME
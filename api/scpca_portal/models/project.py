@@ -1,22 +1,25 @@
-import csv
-from collections import Counter
+import json
 from typing import Dict, List, Set
 
 from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg, BoolOr
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
-from django.db.models import Count, Q, QuerySet
+from django.db.models import Count, F, Func, Max, Q, QuerySet, Value
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Coalesce
 
 from typing_extensions import Self
 
-from scpca_portal import common, utils
+from scpca_portal import common, metadata_parser, utils
 from scpca_portal.config.logging import get_and_configure_logger
 from scpca_portal.enums import FileFormats, Modalities
-from scpca_portal.models.base import CommonDataAttributes, TimestampedModel
+from scpca_portal.models.base import CommonDataAttributes, StripWhitespace, TimestampedModel
 from scpca_portal.models.computed_file import ComputedFile
 from scpca_portal.models.contact import Contact
 from scpca_portal.models.external_accession import ExternalAccession
 from scpca_portal.models.library import Library
+from scpca_portal.models.library_metadata_row import LibraryMetadataRow
 from scpca_portal.models.original_file import OriginalFile
 from scpca_portal.models.project_summary import ProjectSummary
 from scpca_portal.models.publication import Publication
@@ -41,6 +44,8 @@ class Project(CommonDataAttributes, TimestampedModel):
     has_single_cell_data = models.BooleanField(default=False)
     has_spatial_data = models.BooleanField(default=False)
     human_readable_pi_name = models.TextField()
+    # Hash of the metadata the project was last loaded from, see get_metadata_hash
+    metadata_hash = models.CharField(max_length=32, null=True)
     includes_anndata = models.BooleanField(default=False)
     includes_cell_lines = models.BooleanField(default=False)
     includes_merged_anndata = models.BooleanField(default=False)
@@ -79,6 +84,48 @@ class Project(CommonDataAttributes, TimestampedModel):
 
         return project
 
+    @staticmethod
+    def get_metadata_hash(
+        project_metadata: Dict, *, bucket: str = settings.AWS_S3_INPUT_BUCKET_NAME
+    ) -> str:
+        """
+        Return a hash of the project's row of the projects metadata file
+        and the keys and hashes of all of its input files.
+        Projects whose metadata hash hasn't changed don't need to be reloaded.
+        """
+        project_files = (
+            OriginalFile.objects.filter(
+                project_id=project_metadata["scpca_project_id"], s3_bucket=bucket
+            )
+            .order_by("s3_key")
+            .values_list("s3_key", "hash")
+        )
+
+        return utils.hash_values(
+            [json.dumps(project_metadata, sort_keys=True)]
+            + [f"{s3_key}:{file_hash}" for s3_key, file_hash in project_files]
+        )
+
+    def update_from_dict(self, data: Dict) -> bool:
+        """
+        Applies the passed project metadata to the project, the same way as get_from_dict.
+        Returns whether any values changed, not counting modality flags,
+        as they're recomputed from the project's samples.
+        """
+        current_project = Project.get_from_dict(dict(data))
+
+        is_changed = False
+        for key in data.keys():
+            if key == "scpca_project_id" or not hasattr(self, key):
+                continue
+
+            value = getattr(current_project, key)
+            if not key.startswith(("includes_", "has_")):
+                is_changed |= getattr(self, key) != value
+            setattr(self, key, value)
+
+        return is_changed
+
     @classmethod
     def lock_projects(cls, locked_project_ids: List[str]) -> List[Self]:
         locked_projects = []
@@ -247,17 +294,13 @@ class Project(CommonDataAttributes, TimestampedModel):
 
     def get_bulk_rna_seq_sample_ids(self) -> Set[str]:
         """Returns set of bulk RNA sequencing sample IDs."""
-        bulk_rna_seq_sample_ids = set()
-        if self.has_bulk_rna_seq:
-            bulk_metadata_file = OriginalFile.get_input_project_bulk_metadata_file(self.scpca_id)
-            with open(bulk_metadata_file.local_file_path, "r") as bulk_metadata_file:
-                bulk_rna_seq_sample_ids.update(
-                    (
-                        line["sample_id"]
-                        for line in csv.DictReader(bulk_metadata_file, delimiter=common.TAB)
-                    )
-                )
-        return bulk_rna_seq_sample_ids
+        if not self.has_bulk_rna_seq:
+            return set()
+
+        return {
+            bulk_metadata["scpca_sample_id"]
+            for bulk_metadata in metadata_parser.load_bulk_metadata(self.scpca_id)
+        }
 
     def get_original_files_by_download_config(
         self, download_config: Dict
@@ -283,119 +326,204 @@ class Project(CommonDataAttributes, TimestampedModel):
 
     def load_metadata(self) -> None:
         """
-        Loads sample metadata and updates project aggregate values.
+        Loads sample metadata, refreshes the project's metadata file rows
+        and updates project aggregate values.
         """
         Sample.load_metadata(self)
+        LibraryMetadataRow.refresh_project_rows(self)
+
+        self.update_aggregates()
 
-        # Update project properties based on sample queries after processing all samples
+    def update_metadata(self, is_changed: bool = False, delete_from_s3: bool = False) -> None:
+        """
+        Updates the project's samples and libraries in place from its metadata files,
+        only applying what changed, then refreshes the project's metadata file rows
+        and updates project aggregate values.
+        Computed files of changed samples and computed files that are older than their
+        original files are purged. Project computed files are purged if anything changed.
+        """
+        samples_metadata = metadata_parser.load_samples_metadata(self.scpca_id)
+        changed_sample_ids = Sample.update_from_dicts(samples_metadata, self, delete_from_s3)
+        changed_sample_ids |= Library.update_from_dicts(
+            Library.get_library_jsons_samples(self), self
+        )
+        Sample.update_aggregate_properties(self)
+        changed_sample_ids |= LibraryMetadataRow.refresh_project_rows(self)
+
+        self.update_aggregates()
+
+        outdated_computed_files = self.get_outdated_computed_files()
+        outdated_computed_files |= ComputedFile.objects.filter(sample__in=changed_sample_ids)
+        if is_changed or changed_sample_ids:
+            outdated_computed_files |= ComputedFile.objects.filter(project=self)
+        ComputedFile.bulk_purge(outdated_computed_files, delete_from_s3)
+
+    def update_aggregates(self) -> None:
+        """Update project properties based on sample queries after processing all samples."""
         self.update_project_modality_properties()
         self.update_project_aggregate_properties()
         self.update_project_sample_aggregate_counts()
         self.update_project_summaries_aggregate_properties()
 
+    def get_outdated_computed_files(self) -> QuerySet[ComputedFile]:
+        """
+        Return the project's computed files which were created before one of their original files
+        last changed. Project computed files are outdated by a change to any of the project's files,
+        sample computed files only by changes to their libraries' files.
+        """
+        hash_change_ats = dict(
+            OriginalFile.objects.filter(project_id=self.scpca_id)
+            .order_by()
+            .values_list("library_id")
+            .annotate(hash_change_at=Max("hash_change_at"))
+        )
+        if not hash_change_ats:
+            return ComputedFile.objects.none()
+
+        outdated_computed_files = Q(project=self, created_at__lt=max(hash_change_ats.values()))
+        for sample in self.samples.prefetch_related("libraries"):
+            libraries_hash_change_ats = [
+                hash_change_ats[library.scpca_id]
+                for library in sample.libraries.all()
+                if library.scpca_id in hash_change_ats
+            ]
+            if libraries_hash_change_ats:
+                outdated_computed_files |= Q(
+                    sample=sample, created_at__lt=max(libraries_hash_change_ats)
+                )
+
+        return ComputedFile.objects.filter(outdated_computed_files)
+
     def purge(self, delete_from_s3: bool = False) -> None:
         """Purges project and its related data."""
         self.purge_computed_files(delete_from_s3)
-        for sample in self.samples.all():
-            sample.purge()
+
+        # Libraries belong to a single project, so all of them can be removed along with samples
+        self.libraries.all().delete()
+        self.samples.all().delete()
 
         self.delete()
 
     def purge_computed_files(self, delete_from_s3: bool = False) -> None:
         """Purges all computed files associated with the project instance."""
-        # Delete project's sample computed files
-        for sample in self.samples.all():
-            sample.purge_computed_files(delete_from_s3)
-
-        # Delete project's project computed files
-        for computed_file in self.project_computed_files.all():
-            computed_file.purge(delete_from_s3)
+        # Includes both the project's sample and project computed files
+        ComputedFile.bulk_purge(
+            ComputedFile.objects.filter(Q(project=self) | Q(sample__project=self)), delete_from_s3
+        )
 
     def update_project_modality_properties(self) -> None:
         """
         Updates project modality properties,
         which are derived from the existence of a certain attribute within a collection of Samples.
         """
+        sample_attrs = {
+            "has_bulk_rna_seq": "has_bulk_rna_seq",
+            "has_cite_seq_data": "has_cite_seq_data",
+            "has_multiplexed_data": "has_multiplexed_data",
+            "has_single_cell_data": "has_single_cell_data",
+            "has_spatial_data": "has_spatial_data",
+            "includes_anndata": "includes_anndata",
+            "includes_cell_lines": "is_cell_line",
+            "includes_xenografts": "is_xenograft",
+        }
 
         # Set modality flags based on a real data availability.
-        self.has_bulk_rna_seq = self.samples.filter(has_bulk_rna_seq=True).exists()
-        self.has_cite_seq_data = self.samples.filter(has_cite_seq_data=True).exists()
-        self.has_multiplexed_data = self.samples.filter(has_multiplexed_data=True).exists()
-        self.has_single_cell_data = self.samples.filter(has_single_cell_data=True).exists()
-        self.has_spatial_data = self.samples.filter(has_spatial_data=True).exists()
-        self.includes_anndata = self.samples.filter(includes_anndata=True).exists()
-        self.includes_cell_lines = self.samples.filter(is_cell_line=True).exists()
-        self.includes_xenografts = self.samples.filter(is_xenograft=True).exists()
-        self.save(
-            update_fields=(
-                "has_bulk_rna_seq",
-                "has_cite_seq_data",
-                "has_multiplexed_data",
-                "has_single_cell_data",
-                "has_spatial_data",
-                "includes_anndata",
-                "includes_cell_lines",
-                "includes_xenografts",
-            )
+        flags = self.samples.aggregate(
+            **{
+                attr: BoolOr(sample_attr, default=False)
+                for attr, sample_attr in sample_attrs.items()
+            }
         )
+        for attr, value in flags.items():
+            setattr(self, attr, value)
+
+        self.save(update_fields=tuple(sample_attrs))
 
     def update_project_aggregate_properties(self) -> None:
         """
         The Project model cache aggregated sample metadata.
         We need to update these after any project's sample gets added/deleted.
         """
-        samples = self.samples.all()
+        samples = self.samples.order_by()
+
+        sample_modality_attrs = {
+            "has_bulk_rna_seq": Modalities.BULK_RNA_SEQ,
+            "has_cite_seq_data": Modalities.CITE_SEQ,
+            "has_multiplexed_data": Modalities.MULTIPLEXED,
+            "has_single_cell_data": Modalities.SINGLE_CELL,
+            "has_spatial_data": Modalities.SPATIAL,
+        }
+        samples_aggregates = samples.aggregate(
+            disease_timings=ArrayAgg("disease_timing", distinct=True, default=[]),
+            organisms=ArrayAgg(
+                KeyTextTransform("organism", "metadata"),
+                distinct=True,
+                filter=Q(metadata__has_key="organism"),
+                default=[],
+            ),
+            **{attr: BoolOr(attr, default=False) for attr in sample_modality_attrs},
+        )
 
         # Additional Metadata Keys
+        metadata_keys = (
+            samples.annotate(key=Func("metadata", function="jsonb_object_keys"))
+            .values_list("key", flat=True)
+            .distinct()
+        )
         additional_metadata_keys = {
             key
-            for sample in samples
-            for key in sample.additional_metadata.keys()
+            for key in metadata_keys
+            if Sample.is_additional_metadata_key(key)
             # Include keys except multiplexed_with
-            if not (self.has_multiplexed_data and key == "multiplexed_with")
+            and not (self.has_multiplexed_data and key == "multiplexed_with")
         }
         self.additional_metadata_keys = sorted(additional_metadata_keys, key=str.lower)
 
         # Diagnoses Counts
-        self.diagnoses_counts = dict(Counter(samples.values_list("diagnosis", flat=True)))
+        self.diagnoses_counts = dict(
+            samples.values_list("diagnosis")
+            .annotate(count=Count("id"))
+            .values_list("diagnosis", "count")
+        )
 
         # Disease Timings excluding "NA"
-        self.disease_timings = list(
-            set(samples.values_list("disease_timing", flat=True)) - {common.NA}
-        )
+        self.disease_timings = list(set(samples_aggregates["disease_timings"]) - {common.NA})
 
         # Modalities
         self.modalities = utils.get_sorted_modalities(
-            {modality for sample in samples for modality in sample.modalities}
+            {
+                modality
+                for attr, modality in sample_modality_attrs.items()
+                if samples_aggregates[attr]
+            }
         )
 
         # Organisms
-        organisms = {
-            sample.additional_metadata["organism"]
-            for sample in samples
-            if "organism" in sample.additional_metadata
-        }
-        self.organisms = sorted(organisms)
-
-        bulk_libraries = Library.objects.filter(samples__in=samples).exclude(
-            modality=Modalities.BULK_RNA_SEQ
+        self.organisms = sorted(samples_aggregates["organisms"])
+
+        # We currently exlude bulk data in the aggregate values
+        libraries_aggregates = (
+            Library.objects.filter(samples__project=self)
+            .exclude(modality=Modalities.BULK_RNA_SEQ)
+            .aggregate(
+                seq_units=ArrayAgg(
+                    StripWhitespace(KeyTextTransform("seq_unit", "metadata")),
+                    distinct=True,
+                    default=[],
+                ),
+                technologies=ArrayAgg(
+                    StripWhitespace(KeyTextTransform("technology", "metadata")),
+                    distinct=True,
+                    default=[],
+                ),
+            )
         )
 
         # Sequencing Units
-        seq_units = {
-            seq_unit
-            for library in bulk_libraries
-            if (seq_unit := library.metadata.get("seq_unit", "").strip())
-        }
-        self.seq_units = sorted(seq_units)
+        self.seq_units = sorted(filter(None, libraries_aggregates["seq_units"]))
 
         # Technologies
-        technologies = {
-            technology
-            for library in bulk_libraries
-            if (technology := library.metadata.get("technology", "").strip())
-        }
-        self.technologies = sorted(technologies)
+        self.technologies = sorted(filter(None, libraries_aggregates["technologies"]))
 
         self.save()
 
@@ -422,20 +550,30 @@ class Project(CommonDataAttributes, TimestampedModel):
         """
         The ProjectSummary model cache aggregated sample metadata.
         We need to update these after any project's sample gets added/deleted.
+        Summaries are counted in a single grouped query and then replaced in bulk.
         """
-        summaries_counts = Counter()
-
-        for sample in self.samples.all():
+        summaries_counts = (
+            Sample.libraries.through.objects.filter(sample__project=self)
             # We currently exlude bulk data in the project summary and aggregate values
-            for library in sample.libraries.exclude(modality=Modalities.BULK_RNA_SEQ):
-                seq_unit = library.metadata.get("seq_unit", "").strip()
-                technology = library.metadata.get("technology", "").strip()
-                summaries_counts.update({(sample.diagnosis, seq_unit, technology): 1})
-
-        for (diagnosis, seq_unit, technology), count in summaries_counts.items():
-            project_summary, _ = ProjectSummary.objects.get_or_create(
-                diagnosis=diagnosis, project=self, seq_unit=seq_unit, technology=technology
+            .exclude(library__modality=Modalities.BULK_RNA_SEQ)
+            .values(
+                diagnosis=F("sample__diagnosis"),
+                seq_unit=Coalesce(
+                    StripWhitespace(KeyTextTransform("seq_unit", "library__metadata")),
+                    Value(""),
+                    output_field=models.TextField(),
+                ),
+                technology=Coalesce(
+                    StripWhitespace(KeyTextTransform("technology", "library__metadata")),
+                    Value(""),
+                    output_field=models.TextField(),
+                ),
             )
-            project_summary.sample_count = count
+            .annotate(sample_count=Count("id"))
+            .order_by()
+        )
 
-            project_summary.save(update_fields=("sample_count",))
+        self.summaries.all().delete()
+        ProjectSummary.objects.bulk_create(
+            [ProjectSummary(project=self, **summary_counts) for summary_counts in summaries_counts]
+        )
@@ -39,8 +39,12 @@ class Publication(TimestampedModel):
 
     @classmethod
     def bulk_create_from_project_data(cls, project_data, project):
-        """Creates a list of publication objects and saves them."""
-        publications = []
+        """
+        Creates the project's publications which aren't in the db yet and adds them to the project.
+        Publications are shared by projects which may be loaded concurrently,
+        so inserts of publications which were created in the meantime are ignored.
+        """
+        publications = {}
 
         try:
             zipped_publication_details = utils.get_csv_zipped_values(
@@ -59,16 +63,13 @@ class Publication(TimestampedModel):
                 "citation": citation.strip(common.STRIPPED_INPUT_VALUES),
                 "pi_name": project.pi_name,
             }
+            publications.setdefault(
+                publication_data["doi"], Publication.get_from_dict(publication_data)
+            )
 
-            # Handle case where contact is already in db
-            if existing_publication := Publication.objects.filter(
-                doi=publication_data["doi"]
-            ).first():
-                if existing_publication not in project.publications.all():
-                    project.publications.add(existing_publication)
-                continue
-
-            publications.append(Publication.get_from_dict(publication_data))
-
-        Publication.objects.bulk_create(publications)
-        project.publications.add(*publications)
+        # Existing publications are left as they are, and rows are inserted in doi order
+        # so that concurrent loads lock the unique index in the same order and can't deadlock
+        Publication.objects.bulk_create(
+            [publications[doi] for doi in sorted(publications)], ignore_conflicts=True
+        )
+        project.publications.add(*Publication.objects.filter(doi__in=publications.keys()))
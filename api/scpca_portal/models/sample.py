@@ -1,22 +1,43 @@
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, List, Self
+from typing import Dict, List, Self, Set
 
 from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.expressions import ArraySubquery
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
-from django.db.models import QuerySet
+from django.db.models import Count, F, Func, OuterRef, Q, QuerySet, Sum, Value
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Coalesce
 
 from scpca_portal import common, metadata_parser, utils
 from scpca_portal.config.logging import get_and_configure_logger
 from scpca_portal.enums import FileFormats, Modalities
-from scpca_portal.models.base import CommonDataAttributes, TimestampedModel
+from scpca_portal.models.base import CommonDataAttributes, StripWhitespace, TimestampedModel
+from scpca_portal.models.computed_file import ComputedFile
 from scpca_portal.models.library import Library
 
-if TYPE_CHECKING:
-    from scpca_portal.models import ComputedFile
-
 logger = get_and_configure_logger(__name__)
 
+# Attributes which are set from metadata when updating existing samples
+UPDATED_SAMPLE_ATTRS = [
+    "age",
+    "age_timing",
+    "diagnosis",
+    "disease_timing",
+    "is_cell_line",
+    "is_xenograft",
+    "metadata",
+    "multiplexed_with",
+    "sample_cell_count_estimate",
+    "seq_units",
+    "sex",
+    "subdiagnosis",
+    "technologies",
+    "tissue_location",
+    "treatment",
+]
+
 
 class Sample(CommonDataAttributes, TimestampedModel):
     class Meta:
@@ -86,6 +107,52 @@ class Sample(CommonDataAttributes, TimestampedModel):
 
         Sample.objects.bulk_create(samples)
 
+    @classmethod
+    def update_from_dicts(
+        cls, samples_metadata: List[Dict], project, delete_from_s3: bool = False
+    ) -> Set[int]:
+        """
+        Brings the project's samples in line with the passed sample metadata.
+        New samples are created, samples which are no longer passed are deleted along with
+        their computed files, and only samples whose metadata has changed are updated.
+        Returns the primary keys of the created, updated and deleted samples.
+        """
+        samples_metadata_by_id = {
+            sample_metadata["scpca_sample_id"]: sample_metadata
+            for sample_metadata in samples_metadata
+        }
+        existing_samples = {sample.scpca_id: sample for sample in project.samples.all()}
+
+        removed_samples = [
+            sample
+            for sample_id, sample in existing_samples.items()
+            if sample_id not in samples_metadata_by_id
+        ]
+        ComputedFile.bulk_purge(
+            ComputedFile.objects.filter(sample__in=removed_samples), delete_from_s3
+        )
+        Sample.objects.filter(pk__in=[sample.pk for sample in removed_samples]).delete()
+
+        new_samples = Sample.objects.bulk_create(
+            [
+                Sample.get_from_dict(sample_metadata, project)
+                for sample_id, sample_metadata in samples_metadata_by_id.items()
+                if sample_id not in existing_samples
+            ]
+        )
+
+        updated_samples = []
+        for sample_id, sample in existing_samples.items():
+            sample_metadata = samples_metadata_by_id.get(sample_id)
+            if sample_metadata is not None and sample_metadata != sample.metadata:
+                current_sample = Sample.get_from_dict(sample_metadata, project)
+                for attr in UPDATED_SAMPLE_ATTRS:
+                    setattr(sample, attr, getattr(current_sample, attr))
+                updated_samples.append(sample)
+        Sample.objects.bulk_update(updated_samples, UPDATED_SAMPLE_ATTRS)
+
+        return {sample.pk for sample in removed_samples + new_samples + updated_samples}
+
     @classmethod
     def load_metadata(cls, project) -> None:
         """
@@ -100,75 +167,22 @@ class Sample(CommonDataAttributes, TimestampedModel):
         Library.load_metadata(project)
 
         # Update sample properties based on library queries after processing all samples
-        Sample.update_modality_properties(project)
         Sample.update_aggregate_properties(project)
 
     @classmethod
     def update_aggregate_properties(cls, project) -> None:
         """
-        The Sample model caches aggregated library metadata.
+        The Sample model caches aggregated library metadata and modality flags,
+        derived from the existence of a certain attribute within a collection of Libraries.
         We need to update these after libraries are added/deleted.
+        All of a project's samples are aggregated in a single query and then saved in bulk.
         """
-        updated_samples = []
         updated_attrs = [
             "seq_units",
             "technologies",
             "multiplexed_with",
             "demux_cell_count_estimate_sum",
             "sample_cell_count_estimate",
-        ]
-
-        for sample in project.samples.all():
-            libraries = sample.libraries.all()
-
-            # Sequencing Units
-            seq_units = {
-                seq_unit
-                for library in libraries
-                if (seq_unit := library.metadata.get("seq_unit", "").strip())
-            }
-            sample.seq_units = sorted(seq_units, key=str.lower)
-
-            # Technologies
-            technologies = {
-                technology
-                for library in libraries
-                if (technology := library.metadata.get("technology", "").strip())
-            }
-            sample.technologies = sorted(technologies, key=str.lower)
-
-            if multiplexed_libraries := sample.libraries.filter(is_multiplexed=True):
-                # Cache all sample ID's related through the multiplexed libraries.
-                sample.multiplexed_with = list(
-                    sample.multiplexed_with_samples.order_by("scpca_id").values_list(
-                        "scpca_id", flat=True
-                    )
-                )
-                # Sum of all related libraries' sample_cell_estimates for that sample.
-                sample.demux_cell_count_estimate_sum = sum(
-                    library.metadata["sample_cell_estimates"].get(sample.scpca_id, 0)
-                    for library in multiplexed_libraries
-                )
-            else:
-                # Sum of filtered_cell_count from non-multiplexed Single-cell libraries.
-                sample.sample_cell_count_estimate = sum(
-                    library.metadata.get("filtered_cell_count", 0)
-                    for library in libraries.filter(
-                        modality=Modalities.SINGLE_CELL, is_multiplexed=False
-                    )
-                )
-            updated_samples.append(sample)
-
-        Sample.objects.bulk_update(updated_samples, updated_attrs)
-
-    @classmethod
-    def update_modality_properties(cls, project) -> None:
-        """
-        Updates sample modality properties,
-        derived from the existence of a certain attribute within a collection of Libraries.
-        """
-        updated_samples = []
-        updated_attrs = [
             "has_bulk_rna_seq",
             "has_cite_seq_data",
             "has_multiplexed_data",
@@ -176,31 +190,95 @@ class Sample(CommonDataAttributes, TimestampedModel):
             "has_spatial_data",
             "includes_anndata",
         ]
-        # Set modality flags based on a real data availability.
-        for sample in project.samples.all():
-            sample.has_bulk_rna_seq = sample.scpca_id in project.get_bulk_rna_seq_sample_ids()
-            sample.has_cite_seq_data = sample.libraries.filter(has_cite_seq_data=True).exists()
-            sample.has_multiplexed_data = sample.libraries.filter(is_multiplexed=True).exists()
-            sample.has_single_cell_data = sample.libraries.filter(
-                modality=Modalities.SINGLE_CELL
-            ).exists()
-            sample.has_spatial_data = sample.libraries.filter(modality=Modalities.SPATIAL).exists()
-            sample.includes_anndata = sample.libraries.filter(
-                formats__contains=[FileFormats.ANN_DATA]
-            ).exists()
+
+        def has_libraries(**filters):
+            return Count("libraries", filter=Q(**filters))
+
+        def metadata_values(key: str):
+            return ArrayAgg(
+                StripWhitespace(KeyTextTransform(key, "libraries__metadata")), distinct=True
+            )
+
+        def sum_cell_counts(*path, **filters):
+            cell_count = Func(
+                "libraries__metadata",
+                *[Value(key) if isinstance(key, str) else key for key in path],
+                function="jsonb_extract_path_text",
+                output_field=models.TextField(),
+            )
+            return Coalesce(
+                Sum(Cast(cell_count, models.FloatField()), filter=Q(**filters)), Value(0.0)
+            )
+
+        samples = cls.objects.filter(project=project).annotate(
+            library_seq_units=metadata_values("seq_unit"),
+            library_technologies=metadata_values("technology"),
+            # Sample ID's related through the multiplexed libraries.
+            multiplexed_with_ids=ArraySubquery(
+                Sample.objects.filter(
+                    libraries__is_multiplexed=True, libraries__samples=OuterRef("pk")
+                )
+                .exclude(pk=OuterRef("pk"))
+                .distinct()
+                .order_by("scpca_id")
+                .values("scpca_id")
+            ),
+            # Sum of all related libraries' sample_cell_estimates for that sample.
+            demux_cell_count=sum_cell_counts(
+                "sample_cell_estimates", F("scpca_id"), libraries__is_multiplexed=True
+            ),
+            # Sum of filtered_cell_count from non-multiplexed Single-cell libraries.
+            filtered_cell_count=sum_cell_counts(
+                "filtered_cell_count",
+                libraries__modality=Modalities.SINGLE_CELL,
+                libraries__is_multiplexed=False,
+            ),
+            cite_seq_libraries_count=has_libraries(libraries__has_cite_seq_data=True),
+            multiplexed_libraries_count=has_libraries(libraries__is_multiplexed=True),
+            single_cell_libraries_count=has_libraries(libraries__modality=Modalities.SINGLE_CELL),
+            spatial_libraries_count=has_libraries(libraries__modality=Modalities.SPATIAL),
+            anndata_libraries_count=has_libraries(
+                libraries__formats__contains=[FileFormats.ANN_DATA]
+            ),
+        )
+
+        bulk_rna_seq_sample_ids = project.get_bulk_rna_seq_sample_ids()
+        updated_samples = []
+        for sample in samples:
+            sample.seq_units = sorted(filter(None, sample.library_seq_units), key=str.lower)
+            sample.technologies = sorted(filter(None, sample.library_technologies), key=str.lower)
+
+            if sample.multiplexed_libraries_count:
+                sample.multiplexed_with = sample.multiplexed_with_ids
+                sample.demux_cell_count_estimate_sum = int(sample.demux_cell_count)
+            else:
+                sample.sample_cell_count_estimate = int(sample.filtered_cell_count)
+
+            sample.has_bulk_rna_seq = sample.scpca_id in bulk_rna_seq_sample_ids
+            sample.has_cite_seq_data = bool(sample.cite_seq_libraries_count)
+            sample.has_multiplexed_data = bool(sample.multiplexed_libraries_count)
+            sample.has_single_cell_data = bool(sample.single_cell_libraries_count)
+            sample.has_spatial_data = bool(sample.spatial_libraries_count)
+            sample.includes_anndata = bool(sample.anndata_libraries_count)
             updated_samples.append(sample)
 
         Sample.objects.bulk_update(updated_samples, updated_attrs)
 
+    @classmethod
+    def is_additional_metadata_key(cls, key: str) -> bool:
+        return (
+            not hasattr(cls, key)
+            # These fields are accounted for elsewhere,
+            # either in different models or by different names
+            and key not in ("scpca_sample_id", "scpca_project_id", "submitter")
+        )
+
     @property
     def additional_metadata(self) -> dict[str, str]:
         return {
             key: value
             for key, value in self.metadata.items()
-            if not hasattr(self, key)
-            # These fields are accounted for elsewhere,
-            # either in different models or by different names
-            and key not in ("scpca_sample_id", "scpca_project_id", "submitter")
+            if self.is_additional_metadata_key(key)
         }
 
     @property
@@ -249,7 +327,7 @@ class Sample(CommonDataAttributes, TimestampedModel):
             formats__contains=[download_config["format"]],
         )
 
-    def get_computed_file(self, download_config: Dict) -> "ComputedFile":
+    def get_computed_file(self, download_config: Dict) -> ComputedFile:
         "Return the sample computed file that matches the passed download_config."
         return self.computed_files.filter(
             modality=download_config["modality"],
@@ -293,7 +371,7 @@ class Sample(CommonDataAttributes, TimestampedModel):
         )
 
     @property
-    def computed_files(self) -> QuerySet["ComputedFile"]:
+    def computed_files(self) -> QuerySet[ComputedFile]:
         return self.sample_computed_files.order_by("created_at")
 
     @property
@@ -1,8 +1,8 @@
+from functools import cache
+
 from django.conf import settings
 from django.template.loader import render_to_string
 
-import boto3
-
 from scpca_portal.config.logging import get_and_configure_logger
 from scpca_portal.models import Job
 
@@ -16,6 +16,14 @@ SHARED_TEMPLATE_CONTEXT = {
 }
 
 
+@cache
+def get_aws_ses():
+    """Return the SES client, which is only created once an email is actually sent."""
+    import boto3
+
+    return boto3.client("ses", region_name=settings.AWS_REGION)
+
+
 def send_email(
     recipient: str,
     subject: str,
@@ -23,14 +31,12 @@ def send_email(
     body_html: str,
     sender: str = settings.EMAIL_SENDER,
 ):
-    ses = boto3.client("ses", region_name=settings.AWS_REGION)
-
     bcc_addressses = [settings.SLACK_NOTIFICATIONS_EMAIL]
     # dont double send emails to slack
     if settings.SLACK_NOTIFICATIONS_EMAIL is recipient:
         bcc_addressses = []
 
-    ses.send_email(
+    get_aws_ses().send_email(
         Source=sender,
         Destination={"ToAddresses": [recipient], "BccAddresses": bcc_addressses},
         Message={
@@ -1,21 +1,44 @@
 import json
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List
 
 from django.conf import settings
 
-import boto3
-from botocore.client import Config
-
 from scpca_portal import utils
 from scpca_portal.config.logging import get_and_configure_logger
 from scpca_portal.models.original_file import OriginalFile
 
 logger = get_and_configure_logger(__name__)
-aws_s3 = boto3.client(
-    "s3", config=Config(signature_version="s3v4", region_name=settings.AWS_REGION)
-)
+
+# Maximum number of keys accepted by a single DeleteObjects request
+DELETE_OBJECTS_MAX_KEYS = 1000
+# Every part of a multipart upload but the last must be at least 5 MiB
+MULTIPART_UPLOAD_MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+@cache
+def get_aws_s3(*, signed: bool = True):
+    """
+    Return the shared S3 client, creating it on first use.
+    boto3 is imported lazily so that commands which never touch S3 don't pay its import cost.
+    Unsigned clients are used to read from public buckets.
+    """
+    import boto3
+    from botocore import UNSIGNED
+    from botocore.client import Config
+
+    return boto3.client(
+        "s3",
+        config=Config(
+            signature_version="s3v4" if signed else UNSIGNED,
+            region_name=settings.AWS_REGION,
+            max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+        ),
+    )
+
 
 S3_OBJECT_KEYS = [
     # format is as follows: (old_key, new_key, default_value)
@@ -193,10 +216,40 @@ def download_files(original_files) -> bool:
     return True
 
 
+def read_file(original_file: OriginalFile) -> bytes:
+    """Return the contents of the passed original file, read directly from s3."""
+    # Input buckets may include a prefix, e.g. scpca-portal-public-test-inputs/2025-08-26
+    bucket_name, _, prefix = original_file.s3_bucket.partition("/")
+    key = str(Path(prefix, original_file.s3_key))
+
+    try:
+        response = get_aws_s3(signed="public-test" not in bucket_name).get_object(
+            Bucket=bucket_name, Key=key
+        )
+        return response["Body"].read()
+    except Exception:
+        logger.exception("Failed to read file from s3.", s3_bucket=bucket_name, s3_key=key)
+        raise
+
+
+def read_files(original_files: Iterable[OriginalFile]) -> List[bytes]:
+    """
+    Return the contents of all passed original files, in order, read directly from s3.
+    Files are read concurrently, which is much faster than syncing many small files.
+    """
+    original_files = list(original_files)
+    if not original_files:
+        return []
+
+    max_workers = min(len(original_files), settings.AWS_S3_MAX_POOL_CONNECTIONS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_file, original_files))
+
+
 def delete_output_file(key: str, bucket_name: str) -> bool:
     """Delete file a remote file hosted on s3."""
     try:
-        aws_s3.delete_object(Bucket=bucket_name, Key=key)
+        get_aws_s3().delete_object(Bucket=bucket_name, Key=key)
     except Exception:
         logger.exception(
             "Failed to delete S3 object for Computed File.",
@@ -207,6 +260,51 @@ def delete_output_file(key: str, bucket_name: str) -> bool:
     return True
 
 
+def _delete_output_files_chunk(keys: List[str], bucket_name: str) -> bool:
+    """Delete a chunk of at most DELETE_OBJECTS_MAX_KEYS remote files with one request."""
+    try:
+        response = get_aws_s3().delete_objects(
+            Bucket=bucket_name,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+    except Exception:
+        logger.exception(
+            "Failed to delete S3 objects for Computed Files.",
+            bucket=bucket_name,
+            s3_objects=keys,
+        )
+        return False
+
+    if errors := response.get("Errors", []):
+        logger.error(
+            "Failed to delete some S3 objects for Computed Files.",
+            bucket=bucket_name,
+            s3_objects=[error["Key"] for error in errors],
+        )
+        return False
+
+    return True
+
+
+def delete_output_files(keys: Iterable[str], bucket_name: str) -> bool:
+    """
+    Delete many remote files hosted on s3.
+    Keys are deleted in chunks with DeleteObjects requests which are sent concurrently.
+    Return True if all files were deleted.
+    """
+    if not (unique_keys := sorted(set(keys))):
+        return True
+
+    chunks = list(utils.get_chunk_list(unique_keys, DELETE_OBJECTS_MAX_KEYS))
+    max_workers = min(len(chunks), settings.AWS_S3_MAX_POOL_CONNECTIONS)
+    with ThreadPoolExecutor(max_workers=max_workers) as tasks:
+        results = list(
+            tasks.map(lambda chunk: _delete_output_files_chunk(chunk, bucket_name), chunks)
+        )
+
+    return all(results)
+
+
 def upload_output_file(key: str, bucket_name: str) -> bool:
     """Upload a computed file to S3 using the AWS CLI tool."""
 
@@ -224,8 +322,156 @@ def upload_output_file(key: str, bucket_name: str) -> bool:
     return True
 
 
+def copy_output_file(source_key: str, source_bucket_name: str, key: str, bucket_name: str) -> bool:
+    """
+    Copy a remote file hosted on s3 to another key, without downloading it.
+    Large files are copied in parts.
+    """
+    try:
+        get_aws_s3().copy({"Bucket": source_bucket_name, "Key": source_key}, bucket_name, key)
+    except Exception:
+        logger.exception(
+            "Failed to copy S3 object for Computed File.",
+            source_s3_object=source_key,
+            s3_object=key,
+        )
+        return False
+
+    return True
+
+
+def create_multipart_upload(key: str, bucket_name: str) -> str:
+    """Start a multipart upload of an output file and return its upload id."""
+    response = get_aws_s3().create_multipart_upload(Bucket=bucket_name, Key=key)
+    return response["UploadId"]
+
+
+def upload_part(key: str, bucket_name: str, upload_id: str, part_number: int, body: bytes) -> str:
+    """Upload a part of a multipart upload and return its ETag."""
+    response = get_aws_s3().upload_part(
+        Bucket=bucket_name, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+    )
+    return response["ETag"]
+
+
+def complete_multipart_upload(key: str, bucket_name: str, upload_id: str, parts: List[Dict]):
+    """Complete a multipart upload from its uploaded parts' numbers and ETags."""
+    get_aws_s3().complete_multipart_upload(
+        Bucket=bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+    )
+
+
+def list_multipart_upload_parts(key: str, bucket_name: str, upload_id: str) -> List[Dict] | None:
+    """
+    Return the numbers and ETags of a multipart upload's uploaded parts,
+    or None if the upload doesn't exist (e.g. it was completed or aborted).
+    """
+    parts = []
+    try:
+        for page in (
+            get_aws_s3()
+            .get_paginator("list_parts")
+            .paginate(Bucket=bucket_name, Key=key, UploadId=upload_id)
+        ):
+            parts.extend(
+                {"PartNumber": part["PartNumber"], "ETag": part["ETag"]}
+                for part in page.get("Parts", [])
+            )
+    except Exception:
+        logger.info("Multipart upload not found.", s3_object=key, upload_id=upload_id)
+        return None
+
+    return parts
+
+
+def abort_multipart_upload(key: str, bucket_name: str, upload_id: str) -> bool:
+    """Abort a multipart upload, deleting its uploaded parts."""
+    try:
+        get_aws_s3().abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
+    except Exception:
+        logger.exception("Failed to abort multipart upload.", s3_object=key, upload_id=upload_id)
+        return False
+
+    return True
+
+
+class MultipartUploadWriter:
+    """
+    Write-only, unseekable file object which uploads what is written to it
+    as the parts of an s3 multipart upload.
+    Writes are buffered and uploaded in parts of part_size bytes.
+    An upload can be resumed from the state returned by get_state,
+    which only contains bytes that were uploaded (see commit).
+    """
+
+    def __init__(
+        self,
+        key: str,
+        bucket_name: str,
+        *,
+        upload_id: str | None = None,
+        parts: List[Dict] | None = None,
+        offset: int = 0,
+        part_size: int | None = None,
+    ):
+        self.key = key
+        self.bucket_name = bucket_name
+        self.upload_id = upload_id or create_multipart_upload(key, bucket_name)
+        self.parts = list(parts or [])
+        self.offset = offset
+        self.part_size = max(
+            part_size or settings.AWS_S3_MULTIPART_UPLOAD_PART_SIZE, MULTIPART_UPLOAD_MIN_PART_SIZE
+        )
+        self.buffer = bytearray()
+
+    def write(self, data) -> int:
+        self.buffer.extend(data)
+        self.offset += len(data)
+
+        while len(self.buffer) >= self.part_size:
+            self.upload_part(self.part_size)
+
+        return len(data)
+
+    def tell(self) -> int:
+        return self.offset
+
+    def flush(self) -> None:
+        # Bytes are only uploaded in parts, see commit
+        pass
+
+    def upload_part(self, size: int) -> None:
+        part_number = len(self.parts) + 1
+        etag = upload_part(
+            self.key, self.bucket_name, self.upload_id, part_number, bytes(self.buffer[:size])
+        )
+        self.parts.append({"PartNumber": part_number, "ETag": etag})
+        del self.buffer[:size]
+
+    def commit(self) -> bool:
+        """
+        Uploads the buffered bytes, if there are enough for a part.
+        Returns whether everything written so far was uploaded.
+        """
+        if len(self.buffer) >= MULTIPART_UPLOAD_MIN_PART_SIZE:
+            self.upload_part(len(self.buffer))
+
+        return not self.buffer
+
+    def get_state(self) -> Dict:
+        """Returns the upload's state, to resume it from. Only valid after a successful commit."""
+        return {"upload_id": self.upload_id, "parts": list(self.parts), "offset": self.offset}
+
+    def complete(self) -> None:
+        """Uploads the remaining buffered bytes as the last part and completes the upload."""
+        if self.buffer or not self.parts:
+            self.upload_part(len(self.buffer))
+
+        complete_multipart_upload(self.key, self.bucket_name, self.upload_id, self.parts)
+
+
 def generate_pre_signed_link(filename: str, key: str, bucket_name: str) -> str:
-    return aws_s3.generate_presigned_url(
+    return get_aws_s3().generate_presigned_url(
         ClientMethod="get_object",
         Params={
             "Bucket": bucket_name,
@@ -1,4 +1,5 @@
-# from unittest.mock import patch
+import threading
+from unittest.mock import patch
 
 # from django.conf import settings
 from django.test import TestCase
@@ -7,9 +8,11 @@ from scpca_portal.enums import JobStates
 from scpca_portal.exceptions import (
     JobProcessorHandlerNotImplementedError,
     JobProcessorHandlerStepNotImplementedError,
+    JobProcessorStepDependencyNotImplementedError,
     JobProcessorStepNotImplementedError,
 )
 from scpca_portal.job_processors import JobProcessorABC
+from scpca_portal.models import JobStepMetric
 from scpca_portal.test.factories import JobFactory
 
 
@@ -77,6 +80,115 @@ class TestJobProcessorABC(TestCase):
         with self.assertRaises(JobProcessorHandlerStepNotImplementedError):
             TestProcessor(job)
 
+    def test_job_processor_step_dependency_not_implemented_error(self):
+        # Dependencies must be steps which are declared before the step
+        for step_dependencies in [
+            {"step_two": ["not_implemented"]},
+            {"step_one": ["step_two"]},
+            {"not_implemented": ["step_one"]},
+        ]:
+
+            class TestProcessor(JobProcessorABC):
+                steps = ["step_one", "step_two"]
+                exception_handlers = {}
+
+                def step_one(self):
+                    pass
+
+                def step_two(self):
+                    pass
+
+            TestProcessor.step_dependencies = step_dependencies
+            job = JobFactory(state=JobStates.PROCESSING)
+
+            with self.assertRaises(JobProcessorStepDependencyNotImplementedError):
+                TestProcessor(job)
+
+    def test_job_processor_concurrent_steps(self):
+        class TestProcessor(JobProcessorABC):
+            test_order = []
+
+            steps = ["step_one", "step_two", "step_three", "step_four"]
+            step_dependencies = {
+                "step_two": ["step_one"],
+                "step_three": ["step_one"],
+                "step_four": ["step_two", "step_three"],
+            }
+            exception_handlers = {}
+            max_concurrent_steps = 2
+
+            step_three_started = threading.Event()
+
+            def step_one(self):
+                self.test_order.append("step_one")
+
+            def step_two(self):
+                # Only returns if step_three runs at the same time
+                if not self.step_three_started.wait(timeout=10):
+                    raise TimeoutError
+                self.add_step_metrics(bytes_downloaded=10)
+                self.test_order.append("step_two")
+
+            def step_three(self):
+                self.step_three_started.set()
+                self.add_step_metrics(bytes_written=20)
+
+            def step_four(self):
+                self.test_order.append("step_four")
+
+        job = JobFactory(state=JobStates.PROCESSING)
+
+        processor = TestProcessor(job)
+        processor.run()
+
+        self.assertEqual(processor.test_order, ["step_one", "step_two", "step_four"])
+        self.assertEqual(processor.job.state, JobStates.SUCCEEDED)
+
+        # Counters are added to the metrics of the step which added them
+        step_metrics = {
+            step_metric.step: step_metric for step_metric in JobStepMetric.objects.filter(job=job)
+        }
+        self.assertEqual(step_metrics["step_two"].bytes_downloaded, 10)
+        self.assertEqual(step_metrics["step_two"].bytes_written, 0)
+        self.assertEqual(step_metrics["step_three"].bytes_written, 20)
+        self.assertEqual(step_metrics["step_three"].bytes_downloaded, 0)
+
+    def test_job_processor_concurrent_steps_caught_error(self):
+        class TestProcessor(JobProcessorABC):
+            steps = ["step_one", "step_two", "step_three"]
+            step_dependencies = {"step_two": [], "step_three": ["step_one", "step_two"]}
+            exception_handlers = {("step_two", KeyError): "handle_step_two_keyerror"}
+            max_concurrent_steps = 2
+
+            def step_one(self):
+                pass
+
+            def step_two(self):
+                raise KeyError
+
+            def step_three(self):
+                pass
+
+            def handle_step_two_keyerror(self, e: Exception):
+                self.job.apply_state(JobStates.FAILED, reason="Caught Error")
+                self.job.save()
+
+        job = JobFactory(state=JobStates.PROCESSING)
+
+        processor = TestProcessor(job)
+
+        with self.assertRaises(KeyError):
+            processor.run()
+
+        self.assertEqual(processor.job.state, JobStates.FAILED)
+        self.assertEqual(processor.job.failed_reason, "Caught Error")
+
+        # Steps which depend on a failed step aren't started
+        self.assertEqual(
+            set(JobStepMetric.objects.filter(job=job).values_list("step", "succeeded")),
+            {("step_one", True), ("step_two", False)},
+        )
+
     def test_job_processor_uncaught_error(self):
         # Assert that an uncaught error will bubble out of the processor
         # And the job is correctly marked as failed
@@ -124,3 +236,78 @@ class TestJobProcessorABC(TestCase):
 
         self.assertEqual(processor.job.state, JobStates.FAILED)
         self.assertEqual(processor.job.failed_reason, "Caught Error")
+
+    def test_job_processor_step_metrics(self):
+        class TestProcessor(JobProcessorABC):
+            steps = ["step_one", "step_two"]
+            exception_handlers = {}
+
+            def step_one(self):
+                self.add_step_metrics(bytes_downloaded=10, file_count=2)
+                self.add_step_metrics(bytes_downloaded=5)
+
+            def step_two(self):
+                self.add_step_metrics(bytes_uploaded=20)
+
+        job = JobFactory(state=JobStates.PROCESSING)
+        TestProcessor(job).run()
+
+        step_one, step_two = JobStepMetric.objects.filter(job=job)
+        self.assertEqual(step_one.step, "step_one")
+        self.assertTrue(step_one.succeeded)
+        self.assertEqual(step_one.bytes_downloaded, 15)
+        self.assertEqual(step_one.file_count, 2)
+        self.assertEqual(step_one.bytes_uploaded, 0)
+        self.assertGreaterEqual(step_one.duration, 0)
+        self.assertLessEqual(step_one.started_at, step_one.ended_at)
+        self.assertGreater(step_one.peak_rss_in_bytes, 0)
+        self.assertEqual(step_two.bytes_uploaded, 20)
+
+    # Memory usage is only sampled when steps start and end
+    @patch("scpca_portal.job_processors.base.RSS_SAMPLE_INTERVAL_SECONDS", 60)
+    @patch("scpca_portal.job_processors.base.get_current_rss_in_bytes")
+    def test_job_processor_step_metrics_peak_rss(self, mock_get_current_rss_in_bytes):
+        class TestProcessor(JobProcessorABC):
+            steps = ["step_one", "step_two"]
+            exception_handlers = {}
+
+            def step_one(self):
+                pass
+
+            def step_two(self):
+                pass
+
+        # Peaks are of the memory used while each step ran, rather than of the whole process
+        mock_get_current_rss_in_bytes.side_effect = [100, 200, 50, 60]
+
+        job = JobFactory(state=JobStates.PROCESSING)
+        TestProcessor(job).run()
+
+        step_one, step_two = JobStepMetric.objects.filter(job=job)
+        self.assertEqual(step_one.peak_rss_in_bytes, 200)
+        self.assertEqual(step_two.peak_rss_in_bytes, 60)
+
+    def test_job_processor_step_metrics_failure(self):
+        class TestProcessor(JobProcessorABC):
+            steps = ["step_one", "step_two", "step_three"]
+            exception_handlers = {}
+
+            def step_one(self):
+                pass
+
+            def step_two(self):
+                raise KeyError
+
+            def step_three(self):
+                pass
+
+        job = JobFactory(state=JobStates.PROCESSING)
+
+        with self.assertRaises(KeyError):
+            TestProcessor(job).run()
+
+        # Metrics are saved up to and including the failed step
+        self.assertEqual(
+            list(JobStepMetric.objects.filter(job=job).values_list("step", "succeeded")),
+            [("step_one", True), ("step_two", False)],
+        )
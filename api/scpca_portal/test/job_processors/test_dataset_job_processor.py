@@ -0,0 +1,160 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import TransactionTestCase, override_settings
+
+from scpca_portal.enums import JobStates, Modalities
+from scpca_portal.exceptions import DatasetLockedProjectError
+from scpca_portal.job_processors import DatasetJobProcessor
+from scpca_portal.models import CCDLDataset, ComputedFile, Job, JobStepMetric
+from scpca_portal.test.factories import CCDLDatasetFactory, JobFactory, LeafComputedFileFactory
+
+
+# Steps run in threads with their own db connections, which only see committed data
+@override_settings(DATASET_JOB_CHECKPOINTS=False)
+class TestDatasetJobProcessor(TransactionTestCase):
+    def setUp(self):
+        self.metadata_file_paths = {
+            ("SCPCP999990", Modalities.SINGLE_CELL): Path("MOCK_METADATA.tsv")
+        }
+
+        # Handle patching in setUp function
+        create_data_dirs_patch = patch("scpca_portal.utils.create_data_dirs")
+        get_locked_project_ids_patch = patch(
+            "scpca_portal.lockfile.get_locked_project_ids", return_value=[]
+        )
+        get_reusable_computed_file_patch = patch.object(
+            CCDLDataset, "get_reusable_computed_file", return_value=None
+        )
+        write_local_metadata_files_patch = patch.object(
+            ComputedFile, "write_local_metadata_files", return_value=self.metadata_file_paths
+        )
+        download_dataset_files_patch = patch.object(ComputedFile, "download_dataset_files")
+        get_dataset_file_patch = patch.object(ComputedFile, "get_dataset_file")
+        upload_output_file_patch = patch("scpca_portal.s3.upload_output_file", return_value=True)
+
+        # Start patches
+        create_data_dirs_patch.start()
+        get_locked_project_ids_patch.start()
+        self.mock_get_reusable_computed_file = get_reusable_computed_file_patch.start()
+        self.mock_write_local_metadata_files = write_local_metadata_files_patch.start()
+        self.mock_download_dataset_files = download_dataset_files_patch.start()
+        self.mock_get_dataset_file = get_dataset_file_patch.start()
+        self.mock_upload_output_file = upload_output_file_patch.start()
+
+        # Save patches so they can be stopped during tearDown
+        self.patches = [
+            create_data_dirs_patch,
+            get_locked_project_ids_patch,
+            get_reusable_computed_file_patch,
+            write_local_metadata_files_patch,
+            download_dataset_files_patch,
+            get_dataset_file_patch,
+            upload_output_file_patch,
+        ]
+
+        self.mock_get_dataset_file.side_effect = lambda *args, **kwargs: (
+            LeafComputedFileFactory.build(s3_key="MOCK_DATASET.zip")
+        )
+
+        self.job = JobFactory(
+            state=JobStates.PROCESSING, dataset=CCDLDatasetFactory(is_processing=True)
+        )
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def get_step_metrics(self):
+        return {metric.step: metric for metric in JobStepMetric.objects.filter(job=self.job)}
+
+    def test_run(self):
+        processor = DatasetJobProcessor(self.job)
+        processor.run()
+
+        self.assertEqual(self.job.state, JobStates.SUCCEEDED)
+        self.job.dataset.refresh_from_db()
+        self.assertIsNotNone(self.job.dataset.computed_file)
+        self.mock_download_dataset_files.assert_called_once()
+        self.mock_upload_output_file.assert_called_once()
+
+        # Steps only start once the steps they depend on have ended
+        step_metrics = self.get_step_metrics()
+        self.assertSetEqual(set(step_metrics), set(DatasetJobProcessor.steps))
+        for step, dependencies in processor._steps_dependencies.items():
+            for dependency in dependencies:
+                self.assertGreaterEqual(
+                    step_metrics[step].started_at, step_metrics[dependency].ended_at
+                )
+
+        # Reusable computed files are looked up once, before steps run concurrently
+        self.mock_get_reusable_computed_file.assert_called_once()
+
+        # Generated metadata files are copied into the archive rather than generated again
+        self.mock_get_dataset_file.assert_called_once()
+        self.assertDictEqual(
+            self.mock_get_dataset_file.call_args.kwargs["metadata_file_paths"],
+            self.metadata_file_paths,
+        )
+
+    @override_settings(DATASET_JOB_CHECKPOINTS=True)
+    def test_run_with_checkpoint(self):
+        # New uploads download original files before the archive is uploaded
+        DatasetJobProcessor(self.job).run()
+        self.mock_download_dataset_files.assert_called_once()
+        self.assertEqual(self.mock_get_dataset_file.call_args.kwargs["checkpoint"], {})
+
+        # Resumed uploads only download their remaining files when they're resumed
+        self.mock_download_dataset_files.reset_mock()
+        checkpoint = {"upload_id": "MOCK_UPLOAD_ID", "entries": [{"filename": "README.md"}]}
+        job = JobFactory(
+            state=JobStates.PROCESSING,
+            dataset=CCDLDatasetFactory(is_processing=True),
+            checkpoint=checkpoint,
+        )
+        DatasetJobProcessor(job).run()
+        self.mock_download_dataset_files.assert_not_called()
+        self.assertEqual(self.mock_get_dataset_file.call_args.kwargs["checkpoint"], checkpoint)
+
+        # Checkpoints are cleared once the archive is uploaded
+        job.refresh_from_db()
+        self.assertEqual(job.state, JobStates.SUCCEEDED)
+        self.assertDictEqual(job.checkpoint, {})
+        self.mock_upload_output_file.assert_not_called()
+
+    def test_run_caught_error(self):
+        self.mock_get_dataset_file.side_effect = DatasetLockedProjectError
+
+        with self.assertRaises(DatasetLockedProjectError):
+            DatasetJobProcessor(self.job).run()
+
+        # Jobs of locked datasets are retried, and no more steps are started
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.state, JobStates.FAILED)
+        self.assertEqual(self.job.failed_reason, "Dataset contains locked project.")
+        self.assertTrue(
+            Job.objects.filter(
+                dataset_object_id=self.job.dataset_object_id, state=JobStates.PENDING
+            ).exists()
+        )
+        self.mock_upload_output_file.assert_not_called()
+
+        step_metrics = self.get_step_metrics()
+        self.assertFalse(step_metrics["create_new_computed_file"].succeeded)
+        self.assertNotIn("upload_new_computed_file", step_metrics)
+
+    def test_run_uncaught_error(self):
+        self.mock_download_dataset_files.side_effect = Exception("MOCK_ERROR")
+
+        with self.assertRaises(Exception):
+            DatasetJobProcessor(self.job).run()
+
+        # Steps which run concurrently end, but steps which depend on the failed step don't start
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.state, JobStates.FAILED)
+        self.assertEqual(self.job.failed_reason, "Error occurred during download_original_files.")
+        self.mock_get_dataset_file.assert_not_called()
+
+        step_metrics = self.get_step_metrics()
+        self.assertFalse(step_metrics["download_original_files"].succeeded)
+        self.assertNotIn("create_new_computed_file", step_metrics)
@@ -148,3 +148,16 @@ class TestDispatchToBatch(TestCase):
         We plan on removing sample file generation in favor of Dataset downloads.
         """
         pass
+
+    @patch("scpca_portal.models.Job.bulk_submit")
+    def test_array(self, mock_bulk_submit):
+        ProjectFactory(computed_file=None)
+        mock_bulk_submit.return_value = [], []
+
+        self.dispatch_to_batch(array=True)
+
+        # Jobs are submitted together as array jobs instead of individually
+        self.mock_job_submit.assert_not_called()
+        mock_bulk_submit.assert_called_once()
+        self.assertTrue(mock_bulk_submit.call_args.kwargs["as_array"])
+        self.assertGreater(len(mock_bulk_submit.call_args.args[0]), 1)
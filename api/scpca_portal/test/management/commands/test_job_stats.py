@@ -0,0 +1,30 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import make_aware
+
+from scpca_portal.models import JobStepMetric
+from scpca_portal.test.factories import JobFactory
+
+
+class TestJobStats(TestCase):
+    @patch("scpca_portal.management.commands.job_stats.logger")
+    def test_job_stats(self, mock_logger):
+        call_command("job_stats")
+        self.assertIn("No job step metrics", mock_logger.info.call_args.args[0])
+
+        now = make_aware(datetime.now())
+        JobStepMetric.objects.create(
+            job=JobFactory(),
+            step="upload_new_computed_file",
+            started_at=now,
+            ended_at=now,
+            duration=2,
+        )
+        call_command("job_stats", "--days", "1")
+
+        report = mock_logger.info.call_args.args[0]
+        self.assertIn("upload_new_computed_file", report)
+        self.assertIn("N/A", report)
@@ -3,6 +3,7 @@ from unittest.mock import patch
 
 from django.conf import settings
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
 from scpca_portal import common
@@ -210,3 +211,16 @@ class TestLoadMetadata(TestCase):
         self.mock_load_projects_metadata.assert_called_once()
         self.mock_create_project.assert_called_once()
         self.mock_remove_nested_data_dirs.assert_not_called()
+
+    def test_create_project_error(self):
+        self.mock_load_projects_metadata.return_value = [
+            {"scpca_project_id": "SCPCP999990"},
+            {"scpca_project_id": "SCPCP999991"},
+        ]
+        self.mock_create_project.side_effect = [Exception("Invalid metadata"), self.project]
+
+        with self.assertRaisesMessage(CommandError, "SCPCP999990"):
+            self.load_metadata()
+
+        # A failed project doesn't prevent other projects from being loaded
+        self.assertEqual(self.mock_create_project.call_count, 2)
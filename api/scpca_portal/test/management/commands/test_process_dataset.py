@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from scpca_portal.enums import JobStates
+from scpca_portal.job_processors import DatasetJobProcessor
+from scpca_portal.models import CCDLDataset, Job
+from scpca_portal.test.factories import CCDLDatasetFactory, JobFactory
+
+
+class TestProcessDataset(TestCase):
+    def setUp(self):
+        self.jobs = [
+            JobFactory(state=JobStates.PENDING, dataset=CCDLDatasetFactory(is_processing=False))
+            for _ in range(3)
+        ]
+        # Sizes are computed on save, so they're set via update
+        CCDLDataset.objects.update(estimated_size_in_bytes=0)
+        self.processed_jobs = []
+
+    def mock_run(self, processor):
+        self.processed_jobs.append(processor.job)
+        if processor.job == self.jobs[0]:
+            raise Exception("MOCK_ERROR")
+
+    def test_job_ids(self):
+        with patch.object(DatasetJobProcessor, "run", autospec=True, side_effect=self.mock_run):
+            # Failed jobs don't stop the remaining jobs from being processed
+            with self.assertRaises(CommandError):
+                call_command("process_dataset", "--job-ids", f"{self.jobs[1].id},{self.jobs[0].id}")
+
+        self.assertListEqual(self.processed_jobs, [self.jobs[1], self.jobs[0]])
+
+    def test_job_ids_missing(self):
+        missing_job_id = Job.objects.order_by("id").last().id + 1
+        with patch.object(DatasetJobProcessor, "run", autospec=True, side_effect=self.mock_run):
+            # Missing jobs are skipped rather than stopping the rest of the pack
+            call_command("process_dataset", "--job-ids", f"{missing_job_id},{self.jobs[1].id}")
+
+        self.assertListEqual(self.processed_jobs, [self.jobs[1]])
+
+    def test_drain(self):
+        with patch.object(DatasetJobProcessor, "run", autospec=True, side_effect=self.mock_run):
+            with self.assertRaises(CommandError):
+                call_command("process_dataset", "--job-ids", str(self.jobs[1].id), "--drain")
+
+        # Passed jobs are processed first, then the remaining pending jobs are claimed
+        self.assertEqual(self.processed_jobs[0], self.jobs[1])
+        self.assertCountEqual(self.processed_jobs, self.jobs)
+        self.assertCountEqual(
+            Job.objects.filter(state=JobStates.PROCESSING), [self.jobs[0], self.jobs[2]]
+        )
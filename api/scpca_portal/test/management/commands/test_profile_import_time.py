@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from scpca_portal.management.commands.profile_import_time import Command, ImportTime
+
+IMPORT_TIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       144 |        144 |   _io
+import time:       310 |        454 | encodings
+import time:      2000 |       2000 |     botocore.compat
+import time:      5000 |       7000 |   boto3
+import time:       100 |       7100 | scpca_portal.s3
+"""
+
+
+class TestProfileImportTime(TestCase):
+    def test_parse_import_times(self):
+        import_times = Command.parse_import_times(IMPORT_TIME_OUTPUT)
+
+        self.assertEqual(len(import_times), 5)
+        self.assertEqual(import_times[0], ImportTime("_io", 1, 144, 144))
+        self.assertEqual(import_times[2], ImportTime("botocore.compat", 2, 2000, 2000))
+        self.assertEqual(import_times[4], ImportTime("scpca_portal.s3", 0, 100, 7100))
+
+    def test_format(self):
+        import_times = Command.parse_import_times(IMPORT_TIME_OUTPUT)
+
+        slowest_cumulative = Command.format(import_times, limit=1)
+        self.assertIn("scpca_portal.s3", slowest_cumulative)
+        self.assertNotIn("boto3", slowest_cumulative)
+
+        slowest_self = Command.format(import_times, limit=1, cumulative=False)
+        self.assertIn("boto3", slowest_self)
+
+    @patch("subprocess.run")
+    def test_profile_import_time(self, mock_run):
+        mock_run.return_value = MagicMock(stderr=IMPORT_TIME_OUTPUT)
+
+        call_command("profile_import_time", command="sync_batch_jobs")
+
+        command_inputs = mock_run.call_args.args[0]
+        self.assertIn("importtime", command_inputs)
+        self.assertIn("'sync_batch_jobs'", command_inputs[-1])
@@ -173,8 +173,9 @@ class TestCCDLDataset(TestCase):
         self.assertNotEqual(actual_old_data_attr, actual_new_data_attr)
 
     @patch("scpca_portal.models.computed_file.utils.get_today_string", return_value="2025-08-26")
-    @patch("scpca_portal.s3.aws_s3.generate_presigned_url")
-    def test_download_url_property(self, mock_generate_presigned_url, _):
+    @patch("scpca_portal.s3.get_aws_s3")
+    def test_download_url_property(self, mock_get_aws_s3, _):
+        mock_generate_presigned_url = mock_get_aws_s3.return_value.generate_presigned_url
         # ccdl project dataset
         dataset = CCDLDatasetFactory(
             ccdl_project_id="SCPCP999990", format=DatasetFormats.SINGLE_CELL_EXPERIMENT
@@ -1,17 +1,19 @@
 import random
 import sys
+from datetime import timedelta
 from pathlib import Path
 from unittest.mock import PropertyMock, patch
 
 from django.conf import settings
 from django.core.management import call_command
 from django.test import TestCase
+from django.utils.timezone import now
 
 from scpca_portal import loader, metadata_parser
 from scpca_portal.enums import CCDLDatasetNames, DatasetFormats, FileFormats, Modalities
 from scpca_portal.models import CCDLDataset, OriginalFile, Project, UserDataset
 from scpca_portal.test import expected_values as test_data
-from scpca_portal.test.factories import OriginalFileFactory
+from scpca_portal.test.factories import LeafComputedFileFactory, OriginalFileFactory
 
 
 class TestDatasetABC(TestCase):
@@ -691,3 +693,94 @@ class TestDatasetABC(TestCase):
         }
         dataset.save()
         self.assertFalse(dataset.get_includes_files_multiplexed())
+
+    def test_get_reusable_computed_file(self):
+        data = {
+            "SCPCP999990": {
+                "includes_bulk": False,
+                Modalities.SINGLE_CELL: ["SCPCS999990"],
+                Modalities.SPATIAL: [],
+            },
+        }
+        source_dataset = UserDataset(
+            data=data,
+            format=DatasetFormats.SINGLE_CELL_EXPERIMENT,
+            computed_file=LeafComputedFileFactory(),
+        )
+        source_dataset.save()
+
+        dataset = UserDataset(data=data, format=DatasetFormats.SINGLE_CELL_EXPERIMENT)
+        dataset.save()
+        self.assertEqual(dataset.combined_hash, source_dataset.combined_hash)
+
+        # Archives of datasets which haven't succeeded can't be reused
+        self.assertIsNone(dataset.get_reusable_computed_file())
+
+        source_dataset.is_succeeded = True
+        source_dataset.save()
+        self.assertEqual(dataset.get_reusable_computed_file(), source_dataset.computed_file)
+
+        # A dataset never reuses its own archive
+        self.assertIsNone(source_dataset.get_reusable_computed_file())
+
+        # Archives of expired datasets can't be reused
+        source_dataset.expires_at = now() - timedelta(days=1)
+        source_dataset.save()
+        self.assertIsNone(dataset.get_reusable_computed_file())
+
+        source_dataset.expires_at = now() + timedelta(days=1)
+        source_dataset.save()
+        self.assertEqual(dataset.get_reusable_computed_file(), source_dataset.computed_file)
+
+        source_dataset.is_expired = True
+        source_dataset.save()
+        self.assertIsNone(dataset.get_reusable_computed_file())
+
+        # Datasets with a different format have different archives
+        source_dataset.is_expired = False
+        source_dataset.save()
+        dataset = UserDataset(data=data, format=DatasetFormats.ANN_DATA)
+        dataset.save()
+        self.assertIsNone(dataset.get_reusable_computed_file())
+
+    def test_get_reusable_computed_files(self):
+        data = {
+            "SCPCP999990": {
+                "includes_bulk": False,
+                Modalities.SINGLE_CELL: ["SCPCS999990"],
+                Modalities.SPATIAL: [],
+            },
+        }
+        source_dataset = UserDataset(
+            data=data,
+            format=DatasetFormats.SINGLE_CELL_EXPERIMENT,
+            computed_file=LeafComputedFileFactory(),
+            is_succeeded=True,
+        )
+        source_dataset.save()
+        dataset = UserDataset(data=data, format=DatasetFormats.SINGLE_CELL_EXPERIMENT)
+        dataset.save()
+        other_format_dataset = UserDataset(data=data, format=DatasetFormats.ANN_DATA)
+        other_format_dataset.save()
+
+        # One query for each dataset model, rather than one for each dataset
+        with self.assertNumQueries(2):
+            reusable_computed_files = UserDataset.get_reusable_computed_files(
+                [source_dataset, dataset, other_format_dataset]
+            )
+        self.assertDictEqual(reusable_computed_files, {dataset.id: source_dataset.computed_file})
+
+    def test_original_file_count(self):
+        data = {
+            "SCPCP999990": {
+                "includes_bulk": False,
+                Modalities.SINGLE_CELL: ["SCPCS999990", "SCPCS999997"],
+                Modalities.SPATIAL: [],
+            },
+        }
+        dataset = UserDataset(data=data, format=DatasetFormats.SINGLE_CELL_EXPERIMENT)
+        dataset.save()
+
+        # The count is cached on save, so that jobs can be sized without querying files
+        self.assertEqual(dataset.original_file_count, dataset.original_files.count())
+        self.assertGreater(dataset.original_file_count, 0)
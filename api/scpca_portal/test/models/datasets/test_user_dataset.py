@@ -425,8 +425,9 @@ class TestUserDataset(TestCase):
             self.assertEqual(actual_titles[project_id], expected_titles[project_id])
 
     @patch("scpca_portal.models.computed_file.utils.get_today_string", return_value="2025-08-26")
-    @patch("scpca_portal.s3.aws_s3.generate_presigned_url")
-    def test_download_url_property(self, mock_generate_presigned_url, _):
+    @patch("scpca_portal.s3.get_aws_s3")
+    def test_download_url_property(self, mock_get_aws_s3, _):
+        mock_generate_presigned_url = mock_get_aws_s3.return_value.generate_presigned_url
         dataset = UserDatasetFactory(format=DatasetFormats.SINGLE_CELL_EXPERIMENT)
         dataset.computed_file = LeafComputedFileFactory(
             s3_key=ComputedFile.get_dataset_file_s3_key(dataset)
@@ -1,12 +1,14 @@
+from io import BytesIO
 from unittest.mock import patch
 from zipfile import ZipFile
 
 from django.conf import settings
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from scpca_portal import loader, metadata_parser, utils
 from scpca_portal.enums import CCDLDatasetNames
+from scpca_portal.exceptions import DatasetDownloadFailedError
 from scpca_portal.models import CCDLDataset, ComputedFile, UserDataset
 from scpca_portal.test import expected_values as test_data
 from scpca_portal.test.factories import LibraryFactory, ProjectFactory, SampleFactory
@@ -14,8 +16,9 @@ from scpca_portal.test.factories import LibraryFactory, ProjectFactory, SampleFa
 
 class TestComputedFile(TestCase):
     @patch("scpca_portal.models.computed_file.utils.get_today_string", return_value="2024-01-18")
-    @patch("scpca_portal.s3.aws_s3.generate_presigned_url")
-    def test_computed_file_create_download_url(self, s3_endpoint, _):
+    @patch("scpca_portal.s3.get_aws_s3")
+    def test_computed_file_create_download_url(self, mock_get_aws_s3, _):
+        s3_endpoint = mock_get_aws_s3.return_value.generate_presigned_url
         computed_file = ComputedFile(
             format=ComputedFile.OutputFileFormats.SINGLE_CELL_EXPERIMENT,
             modality=ComputedFile.OutputFileModalities.SINGLE_CELL,
@@ -131,3 +134,109 @@ class TestGetFile(TestCase):
                 sorted(project_zip.namelist()),
                 sorted(test_data.UserDatasetSingleCellExperiment.COMPUTED_FILE_LIST),
             )
+
+    def test_get_dataset_file_local_metadata_files(self):
+        utils.create_data_dirs()
+
+        dataset = UserDataset(
+            data=test_data.UserDatasetSingleCellExperiment.VALUES["data"],
+            format=test_data.UserDatasetSingleCellExperiment.VALUES["format"],
+        )
+        dataset.save()
+
+        # Metadata files are written locally with the same contents, and copied into the archive
+        metadata_file_paths = ComputedFile.write_local_metadata_files(dataset)
+        for project_id, modality, file_contents in dataset.get_metadata_file_contents():
+            local_path = metadata_file_paths[(project_id, modality)]
+            self.assertEqual(local_path.read_bytes().decode("utf-8"), file_contents)
+
+        ComputedFile.get_dataset_file(dataset, metadata_file_paths=metadata_file_paths)
+
+        with ZipFile(dataset.computed_file_local_path) as project_zip:
+            self.assertListEqual(
+                sorted(project_zip.namelist()),
+                sorted(test_data.UserDatasetSingleCellExperiment.COMPUTED_FILE_LIST),
+            )
+
+    @patch("scpca_portal.s3.download_files", return_value=False)
+    def test_get_dataset_file_failed_download(self, _):
+        dataset = UserDataset(
+            data=test_data.UserDatasetSingleCellExperiment.VALUES["data"],
+            format=test_data.UserDatasetSingleCellExperiment.VALUES["format"],
+        )
+        dataset.save()
+
+        with self.assertRaises(DatasetDownloadFailedError):
+            ComputedFile.get_dataset_file(dataset)
+
+    @override_settings(DATASET_JOB_CHECKPOINT_SECONDS=0)
+    @patch("scpca_portal.s3.MULTIPART_UPLOAD_MIN_PART_SIZE", 1)
+    def test_get_dataset_file_resume_from_checkpoint(self):
+        utils.create_data_dirs()
+
+        dataset = UserDataset(
+            data=test_data.UserDatasetSingleCellExperiment.VALUES["data"],
+            format=test_data.UserDatasetSingleCellExperiment.VALUES["format"],
+        )
+        dataset.save()
+
+        # Multipart uploads are kept in memory
+        uploaded_parts = {}
+
+        def upload_part(key, bucket_name, upload_id, part_number, body):
+            uploaded_parts[part_number] = body
+            return f"ETAG{part_number}"
+
+        def list_multipart_upload_parts(key, bucket_name, upload_id):
+            return [{"PartNumber": n, "ETag": f"ETAG{n}"} for n in sorted(uploaded_parts)]
+
+        def complete_multipart_upload(key, bucket_name, upload_id, parts):
+            uploaded_parts["object"] = b"".join(uploaded_parts[p["PartNumber"]] for p in parts)
+
+        # Interrupt after the readme, metadata files and the first original file are uploaded
+        uploaded_entry_count = len(list(dataset.get_metadata_file_libraries())) + 2
+        checkpoints = []
+
+        def interrupt_on_checkpoint(checkpoint):
+            checkpoints.append(checkpoint)
+            if len(checkpoints) == uploaded_entry_count:
+                raise RuntimeError("Interrupted")
+
+        with patch.multiple(
+            "scpca_portal.s3",
+            create_multipart_upload=lambda key, bucket_name: "UPLOAD_ID",
+            upload_part=upload_part,
+            list_multipart_upload_parts=list_multipart_upload_parts,
+            complete_multipart_upload=complete_multipart_upload,
+        ):
+            # New uploads don't download files, which are downloaded beforehand
+            ComputedFile.download_dataset_files(dataset, dataset.original_files)
+            with patch("scpca_portal.s3.download_files") as mock_download_files:
+                with self.assertRaises(RuntimeError):
+                    ComputedFile.get_dataset_file(
+                        dataset, checkpoint={}, on_checkpoint=interrupt_on_checkpoint
+                    )
+            mock_download_files.assert_not_called()
+
+            checkpoint = checkpoints[-1]
+            self.assertEqual(checkpoint["upload_id"], "UPLOAD_ID")
+            self.assertEqual(len(checkpoint["entries"]), uploaded_entry_count)
+
+            with patch("scpca_portal.s3.download_files") as mock_download_files:
+                computed_file = ComputedFile.get_dataset_file(dataset, checkpoint=checkpoint)
+
+            # Only files which weren't uploaded yet are downloaded again
+            downloaded_files = [
+                original_file
+                for call in mock_download_files.call_args_list
+                for original_file in call.args[0]
+            ]
+            self.assertEqual(len(downloaded_files), dataset.original_files.count() - 1)
+
+        with ZipFile(BytesIO(uploaded_parts["object"])) as project_zip:
+            self.assertIsNone(project_zip.testzip())
+            self.assertListEqual(
+                sorted(project_zip.namelist()),
+                sorted(test_data.UserDatasetSingleCellExperiment.COMPUTED_FILE_LIST),
+            )
+        self.assertEqual(computed_file.size_in_bytes, len(uploaded_parts["object"]))
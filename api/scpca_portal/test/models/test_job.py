@@ -1,13 +1,15 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import PropertyMock, patch
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import make_aware
 
 from scpca_portal import common
-from scpca_portal.enums import JobStates
+from scpca_portal.enums import JobExecutors, JobStates
 from scpca_portal.exceptions import (
     DatasetLockedProjectError,
     JobInvalidRetryStateError,
@@ -259,6 +261,43 @@ class TestJob(TestCase):
         self.assertListEqual(pending_jobs, [])
         self.assertListEqual(failed_jobs, [])
 
+    @patch("scpca_portal.batch.submit_job")
+    def test_submit_pending_claim(self, mock_batch_submit_job):
+        jobs = [
+            JobFactory(state=JobStates.PENDING, dataset=CCDLDatasetFactory(is_pending=True))
+            for _ in range(2)
+        ]
+
+        # Jobs are claimed as PROCESSING before they're submitted
+        def submit_job(job, **kwargs):
+            self.assertEqual(Job.objects.get(pk=job.pk).state, JobStates.PROCESSING)
+            return "MOCK_JOB_ID"
+
+        mock_batch_submit_job.side_effect = submit_job
+        submitted_jobs, _, _ = Job.submit_pending()
+        self.assertListEqual(submitted_jobs, jobs)
+
+        # Claimed jobs are released when submission raises
+        for job in jobs:
+            job.state = JobStates.PENDING
+            job.save()
+        mock_batch_submit_job.side_effect = Exception("MOCK_ERROR")
+        with self.assertRaises(Exception):
+            Job.submit_pending()
+        self.assertEqual(Job.objects.filter(state=JobStates.PENDING).count(), 2)
+
+    @override_settings(JOB_EXECUTOR=JobExecutors.LOCAL)
+    @patch("scpca_portal.batch.submit_job")
+    def test_submit_pending_local(self, mock_batch_submit_job):
+        for _ in range(2):
+            JobFactory(state=JobStates.PENDING, dataset=CCDLDatasetFactory(is_pending=True))
+
+        # Jobs are released for local workers to claim
+        submitted_jobs, _, _ = Job.submit_pending()
+        mock_batch_submit_job.assert_not_called()
+        self.assertEqual(len(submitted_jobs), 2)
+        self.assertEqual(Job.objects.filter(state=JobStates.PENDING).count(), 2)
+
     @patch("scpca_portal.batch.get_jobs")
     def test_sync_state(self, mock_batch_get_jobs):
         # Set up mock for get_jobs for AWS Batch 'PENDING' status
@@ -488,6 +527,74 @@ class TestJob(TestCase):
                 terminated_reason=terminated_job.terminated_reason,
             )
 
+    @override_settings(
+        AWS_BATCH_SYNC_INTERVAL_FRACTION=0.1,
+        AWS_BATCH_SYNC_MIN_INTERVAL_SECONDS=60,
+        AWS_BATCH_SYNC_MAX_INTERVAL_SECONDS=900,
+        AWS_BATCH_SYNC_BYTES_PER_SECOND=10**6,
+    )
+    def test_get_sync_interval(self):
+        now = make_aware(datetime.now())
+        job = JobFactory(
+            state=JobStates.PROCESSING,
+            processing_at=now,
+            dataset=CCDLDatasetFactory(is_processing=True),
+        )
+        job.dataset.estimated_size_in_bytes = 0
+
+        # Young and small jobs are synced at the min interval
+        self.assertEqual(job.get_sync_interval(), timedelta(seconds=60))
+
+        # Jobs with larger datasets are expected to take longer
+        job.dataset.estimated_size_in_bytes = 3000 * 10**6
+        self.assertAlmostEqual(job.get_sync_interval().total_seconds(), 300, delta=1)
+
+        # Long running jobs are synced less often, up to the max interval
+        job.dataset.estimated_size_in_bytes = 0
+        job.processing_at = now - timedelta(hours=1)
+        self.assertAlmostEqual(job.get_sync_interval().total_seconds(), 360, delta=1)
+        job.processing_at = now - timedelta(days=1)
+        self.assertEqual(job.get_sync_interval(), timedelta(seconds=900))
+
+        # Jobs are due once their interval has passed since they were last synced
+        self.assertTrue(job.is_sync_due(now))
+        job.batch_synced_at = now - timedelta(seconds=899)
+        self.assertFalse(job.is_sync_due(now))
+        job.batch_synced_at = now - timedelta(seconds=900)
+        self.assertTrue(job.is_sync_due(now))
+
+    @patch("scpca_portal.batch.get_jobs")
+    def test_bulk_sync_state_schedule(self, mock_batch_get_jobs):
+        now = make_aware(datetime.now())
+        due_job, recently_synced_job = [
+            JobFactory(
+                state=JobStates.PROCESSING,
+                processing_at=now,
+                batch_synced_at=batch_synced_at,
+                dataset=CCDLDatasetFactory(is_processing=True),
+            )
+            for batch_synced_at in [None, now]
+        ]
+        mock_batch_get_jobs.return_value = [
+            {"jobId": job.batch_job_id, "status": "RUNNING"}
+            for job in [due_job, recently_synced_job]
+        ]
+
+        # Only jobs whose sync interval has passed are fetched
+        self.assertFalse(Job.bulk_sync_state())
+        self.assertEqual(mock_batch_get_jobs.call_args.args[0], [due_job])
+
+        # Fetched jobs are synced again after their interval
+        due_job.refresh_from_db()
+        self.assertIsInstance(due_job.batch_synced_at, datetime)
+        mock_batch_get_jobs.reset_mock()
+        self.assertFalse(Job.bulk_sync_state())
+        mock_batch_get_jobs.assert_not_called()
+
+        # The schedule can be ignored to sync all jobs
+        self.assertFalse(Job.bulk_sync_state(ignore_schedule=True))
+        self.assertCountEqual(mock_batch_get_jobs.call_args.args[0], [due_job, recently_synced_job])
+
     @patch("scpca_portal.batch.get_jobs")
     def test_bulk_sync_state_no_matching_batch_job_found(self, mock_batch_get_jobs):
         # Set up mock for get_jobs with no matched AWS job found
@@ -644,6 +751,59 @@ class TestJob(TestCase):
         mock_batch_terminate_job.assert_not_called()
         self.assertEqual(response, [])  # No termination with no error
 
+    @patch("scpca_portal.batch.terminate_job")
+    def test_terminate_shared_batch_job(self, mock_batch_terminate_job):
+        mock_batch_terminate_job.return_value = True
+        packed_jobs = [
+            JobFactory(
+                state=JobStates.PROCESSING,
+                batch_job_id="MOCK_PACK_JOB_ID",
+                dataset=CCDLDatasetFactory(is_processing=True),
+            )
+            for _ in range(2)
+        ]
+
+        # Jobs which share the batch job are terminated with it
+        packed_jobs[0].terminate()
+        mock_batch_terminate_job.assert_called_once()
+        for saved_job in Job.objects.all():
+            self.assertEqual(saved_job.state, JobStates.TERMINATED)
+            self.assertDatasetState(
+                saved_job.dataset,
+                is_processing=False,
+                is_terminated=True,
+                terminated_reason=saved_job.terminated_reason,
+            )
+
+        # Jobs of local workers aren't terminated on Batch
+        mock_batch_terminate_job.reset_mock()
+        worker_job = JobFactory(
+            state=JobStates.PROCESSING,
+            batch_job_id=None,
+            worker_id="MOCK_WORKER_ID",
+            dataset=CCDLDatasetFactory(is_processing=True),
+        )
+        worker_job.terminate()
+        mock_batch_terminate_job.assert_not_called()
+        self.assertEqual(Job.objects.get(pk=worker_job.pk).state, JobStates.TERMINATED)
+
+    @patch("scpca_portal.batch.terminate_job")
+    def test_terminate_processing_shared_batch_jobs(self, mock_batch_terminate_job):
+        mock_batch_terminate_job.return_value = True
+        for batch_job_id in ["MOCK_PACK_JOB_ID", "MOCK_PACK_JOB_ID", "MOCK_JOB_ID", None]:
+            JobFactory(
+                state=JobStates.PROCESSING,
+                batch_job_id=batch_job_id,
+                worker_id=None if batch_job_id else "MOCK_WORKER_ID",
+                dataset=CCDLDatasetFactory(is_processing=True),
+            )
+
+        # Each batch job is terminated once, and local workers' jobs aren't terminated on Batch
+        terminated_jobs = Job.terminate_processing()
+        self.assertEqual(mock_batch_terminate_job.call_count, 2)
+        self.assertEqual(len(terminated_jobs), 4)
+        self.assertFalse(Job.objects.exclude(state=JobStates.TERMINATED).exists())
+
     def test_create_retry_job(self):
         # Set up a non-terminated job
         job = JobFactory(
@@ -720,12 +880,15 @@ class TestJob(TestCase):
         mock_batch_job_id = "MOCK_JOB_ID"  # The job id returned via AWS Batch response
         mock_batch_submit_job.return_value = mock_batch_job_id
 
+        # The largest tier that fits fargate's storage
+        max_fargate_size_in_bytes = 100 * common.GB_IN_BYTES
+
         dataset = CCDLDatasetFactory()
         with patch.object(
             CCDLDataset, "estimated_size_in_bytes", new_callable=PropertyMock
         ) as mock_size:
             # job size is below threshold
-            mock_size.return_value = Job.MAX_FARGATE_SIZE_IN_BYTES - 1000
+            mock_size.return_value = max_fargate_size_in_bytes - 1000
             dataset_job = Job.get_dataset_job(dataset)
             dataset_job.submit()
             self.assertEqual(dataset_job.batch_job_queue, settings.AWS_BATCH_FARGATE_JOB_QUEUE_NAME)
@@ -734,7 +897,7 @@ class TestJob(TestCase):
             )
 
             # job size is at threshold
-            mock_size.return_value = Job.MAX_FARGATE_SIZE_IN_BYTES
+            mock_size.return_value = max_fargate_size_in_bytes
             dataset_job = Job.get_dataset_job(dataset)
             dataset_job.submit()
             self.assertEqual(dataset_job.batch_job_queue, settings.AWS_BATCH_FARGATE_JOB_QUEUE_NAME)
@@ -743,7 +906,7 @@ class TestJob(TestCase):
             )
 
             # job size is above threshold
-            mock_size.return_value = Job.MAX_FARGATE_SIZE_IN_BYTES + 1000
+            mock_size.return_value = max_fargate_size_in_bytes + 1000
             dataset_job = Job.get_dataset_job(dataset)
             dataset_job.submit()
             self.assertEqual(dataset_job.batch_job_queue, settings.AWS_BATCH_EC2_JOB_QUEUE_NAME)
@@ -751,6 +914,35 @@ class TestJob(TestCase):
                 dataset_job.batch_job_definition, settings.AWS_BATCH_EC2_JOB_DEFINITION_NAME
             )
 
+    @patch("scpca_portal.batch.submit_job")
+    def test_dataset_job_resource_requirements(self, mock_batch_submit_job):
+        mock_batch_submit_job.return_value = "MOCK_JOB_ID"
+
+        dataset = CCDLDatasetFactory()
+        with patch.object(
+            CCDLDataset, "estimated_size_in_bytes", new_callable=PropertyMock
+        ) as mock_size:
+            mock_size.return_value = 1000
+            small_job = Job.get_dataset_job(dataset)
+            small_job.submit()
+
+            mock_size.return_value = 50 * common.GB_IN_BYTES
+            large_job = Job.get_dataset_job(dataset)
+            large_job.submit()
+
+        # Resources are sent along with the command
+        saved_small_job = Job.objects.get(pk=small_job.pk)
+        saved_large_job = Job.objects.get(pk=large_job.pk)
+        self.assertEqual(
+            saved_small_job.batch_container_overrides["resourceRequirements"],
+            [{"type": "VCPU", "value": "1"}, {"type": "MEMORY", "value": "2048"}],
+        )
+        self.assertEqual(
+            saved_large_job.batch_container_overrides["resourceRequirements"],
+            [{"type": "VCPU", "value": "4"}, {"type": "MEMORY", "value": "8192"}],
+        )
+        self.assertIn("--job-id", saved_small_job.batch_container_overrides["command"])
+
     def test_increment_attempt_or_fail(self):
         job = JobFactory(state=JobStates.PENDING, dataset=CCDLDatasetFactory(is_processing=False))
 
@@ -759,3 +951,235 @@ class TestJob(TestCase):
             job.increment_attempt_or_fail()
 
         self.assertEqual(job.state, JobStates.FAILED)
+
+    @patch("scpca_portal.lockfile.get_locked_project_ids")
+    @patch("scpca_portal.batch.submit_job")
+    def test_bulk_submit(self, mock_batch_submit_job, mock_get_locked_project_ids):
+        locked_dataset = CCDLDatasetFactory(is_processing=False)
+        mock_get_locked_project_ids.return_value = list(locked_dataset.data.keys())
+        mock_batch_submit_job.side_effect = lambda job, **kwargs: (
+            None if job.batch_job_name == "FAILED" else f"MOCK_JOB_ID_{job.id}"
+        )
+
+        saved_job = JobFactory(state=JobStates.PENDING, dataset=None)
+        new_job = Job.get_dataset_job(CCDLDatasetFactory(data={}, is_processing=False))
+        failed_job = JobFactory(state=JobStates.PENDING, batch_job_name="FAILED", dataset=None)
+        locked_job = Job.get_dataset_job(locked_dataset)
+        jobs = [saved_job, new_job, failed_job, locked_job]
+
+        submitted_jobs, unsubmitted_jobs = Job.bulk_submit(jobs)
+
+        # The lockfile is only fetched once, and locked jobs aren't submitted or saved
+        mock_get_locked_project_ids.assert_called_once()
+        self.assertEqual(mock_batch_submit_job.call_count, 3)
+        self.assertListEqual(submitted_jobs, [saved_job, new_job])
+        self.assertListEqual(unsubmitted_jobs, [failed_job, locked_job])
+        self.assertIsNone(locked_job.id)
+
+        # New jobs are created before submission, so their command references the saved job
+        new_job.refresh_from_db()
+        self.assertEqual(new_job.state, JobStates.PROCESSING)
+        self.assertEqual(new_job.batch_job_id, f"MOCK_JOB_ID_{new_job.id}")
+        self.assertIn(str(new_job.id), new_job.batch_container_overrides["command"])
+        new_job.dataset.refresh_from_db()
+        self.assertTrue(new_job.dataset.is_processing)
+
+        failed_job.refresh_from_db()
+        self.assertEqual(failed_job.state, JobStates.PENDING)
+
+    @patch("scpca_portal.lockfile.get_locked_project_ids")
+    @patch("scpca_portal.batch.submit_job")
+    def test_submit_ccdl_datasets(self, mock_batch_submit_job, mock_get_locked_project_ids):
+        mock_get_locked_project_ids.return_value = []
+        mock_batch_submit_job.side_effect = ["MOCK_JOB_ID", None]
+        datasets = [CCDLDatasetFactory(is_processing=False) for _ in range(2)]
+
+        with override_settings(AWS_BATCH_SUBMIT_MAX_WORKERS=1):
+            submitted_jobs, failed_jobs = Job.submit_ccdl_datasets(datasets)
+
+        self.assertEqual([job.dataset for job in submitted_jobs], datasets[:1])
+        # Failed jobs are returned so that they can be retried
+        self.assertEqual([job.dataset for job in failed_jobs], datasets[1:])
+        self.assertTrue(all(isinstance(job, Job) for job in failed_jobs))
+        self.assertTrue(failed_jobs[0].increment_attempt_or_fail())
+        self.assertEqual(Job.objects.filter(state=JobStates.PENDING).count(), 1)
+
+    @patch("scpca_portal.lockfile.get_locked_project_ids")
+    @patch("scpca_portal.batch.submit_job")
+    def test_submit_pending_constant_queries(
+        self, mock_batch_submit_job, mock_get_locked_project_ids
+    ):
+        mock_get_locked_project_ids.return_value = []
+        mock_batch_submit_job.side_effect = lambda job, **kwargs: f"MOCK_JOB_ID_{job.id}"
+
+        def submit_pending_jobs(count) -> int:
+            for _ in range(count):
+                for dataset_factory in [CCDLDatasetFactory, UserDatasetFactory]:
+                    JobFactory(
+                        state=JobStates.PENDING, dataset=dataset_factory(is_processing=False)
+                    )
+
+            with CaptureQueriesContext(connection) as queries:
+                submitted_jobs, _, _ = Job.submit_pending()
+            self.assertEqual(len(submitted_jobs), count * 2)
+
+            return len(queries)
+
+        # Locked projects and reusable computed files are fetched for all jobs at once,
+        # and file counts are cached on the datasets
+        self.assertEqual(submit_pending_jobs(1), submit_pending_jobs(10))
+
+    @patch("scpca_portal.batch.get_jobs")
+    def test_bulk_sync_state_constant_queries(self, mock_batch_get_jobs):
+        def create_processing_jobs(count):
+            jobs = [
+                JobFactory(
+                    state=JobStates.PROCESSING,
+                    dataset=dataset_factory(is_processing=True),
+                )
+                for _ in range(count)
+                for dataset_factory in [CCDLDatasetFactory, UserDatasetFactory]
+            ]
+            mock_batch_get_jobs.return_value = [
+                {"jobId": job.batch_job_id, "status": "SUCCEEDED"} for job in jobs
+            ]
+
+        # One select and one bulk update each for jobs, ccdl datasets and user datasets
+        create_processing_jobs(1)
+        with self.assertNumQueries(QUERY_COUNT := 6):
+            self.assertTrue(Job.bulk_sync_state())
+
+        create_processing_jobs(10)
+        with self.assertNumQueries(QUERY_COUNT):
+            self.assertTrue(Job.bulk_sync_state())
+
+        for job in Job.objects.all():
+            self.assertEqual(job.state, JobStates.SUCCEEDED)
+            self.assertDatasetState(job.dataset, is_succeeded=True)
+
+    def test_with_datasets(self):
+        for dataset_factory in [CCDLDatasetFactory, UserDatasetFactory]:
+            for _ in range(3):
+                JobFactory(dataset=dataset_factory())
+        JobFactory(dataset=None)
+
+        # One query for jobs, and one for each dataset model
+        with self.assertNumQueries(3):
+            datasets = [job.dataset for job in Job.objects.with_datasets()]
+
+        self.assertEqual(len([dataset for dataset in datasets if dataset]), 6)
+
+    @patch("scpca_portal.batch.get_jobs")
+    @patch("scpca_portal.lockfile.get_locked_project_ids")
+    @patch("scpca_portal.batch.submit_job")
+    def test_bulk_submit_as_array(
+        self, mock_batch_submit_job, mock_get_locked_project_ids, mock_batch_get_jobs
+    ):
+        mock_get_locked_project_ids.return_value = []
+        mock_batch_submit_job.return_value = "MOCK_ARRAY_JOB_ID"
+        datasets = [CCDLDatasetFactory(is_processing=False) for _ in range(3)]
+
+        submitted_jobs, failed_jobs = Job.submit_ccdl_datasets(datasets, as_array=True)
+
+        # A single array job is submitted for all jobs on the same queue
+        mock_batch_submit_job.assert_called_once()
+        array_job = mock_batch_submit_job.call_args.args[0]
+        self.assertEqual(mock_batch_submit_job.call_args.kwargs["array_size"], 3)
+        self.assertEqual(
+            array_job.batch_container_overrides["command"],
+            ["python", "manage.py", "process_dataset", "--array-name", array_job.batch_job_name],
+        )
+        self.assertEqual(len(submitted_jobs), 3)
+        self.assertListEqual(failed_jobs, [])
+
+        # Children are resolved from their array index
+        for index, job in enumerate(submitted_jobs):
+            self.assertEqual(job.batch_job_id, f"MOCK_ARRAY_JOB_ID:{index}")
+            with patch.dict("os.environ", {"AWS_BATCH_JOB_ARRAY_INDEX": str(index)}):
+                self.assertEqual(Job.get_array_job(array_job.batch_job_name), job)
+
+        # Children are synced with AWS Batch like other jobs
+        mock_batch_get_jobs.return_value = [
+            {"jobId": job.batch_job_id, "status": "SUCCEEDED"} for job in submitted_jobs[:2]
+        ]
+        self.assertTrue(Job.bulk_sync_state())
+        self.assertEqual(Job.objects.filter(state=JobStates.SUCCEEDED).count(), 2)
+        self.assertEqual(Job.objects.filter(state=JobStates.PROCESSING).count(), 1)
+
+    @patch("scpca_portal.lockfile.get_locked_project_ids")
+    @patch("scpca_portal.batch.submit_job")
+    def test_bulk_submit_as_array_failure(self, mock_batch_submit_job, mock_get_locked_project_ids):
+        mock_get_locked_project_ids.return_value = []
+        mock_batch_submit_job.return_value = None
+        datasets = [CCDLDatasetFactory(is_processing=False) for _ in range(2)]
+
+        submitted_jobs, failed_jobs = Job.submit_ccdl_datasets(datasets, as_array=True)
+
+        self.assertListEqual(submitted_jobs, [])
+        self.assertEqual(len(failed_jobs), 2)
+        # Failed jobs are no longer part of the array, and are retried individually
+        self.assertFalse(
+            Job.objects.filter(
+                batch_array_name__isnull=False, batch_array_index__isnull=False
+            ).exists()
+        )
+
+    @override_settings(AWS_BATCH_PACK_MAX_SIZE_IN_BYTES=100, AWS_BATCH_PACK_MAX_JOBS=2)
+    @patch("scpca_portal.lockfile.get_locked_project_ids")
+    @patch("scpca_portal.batch.submit_job")
+    def test_submit_pending_pack(self, mock_batch_submit_job, mock_get_locked_project_ids):
+        mock_get_locked_project_ids.return_value = []
+        mock_batch_submit_job.side_effect = lambda job, **kwargs: f"MOCK_{job.batch_job_name}"
+        jobs = [
+            JobFactory(state=JobStates.PENDING, dataset=CCDLDatasetFactory(is_processing=False))
+            for _ in range(4)
+        ]
+        # Sizes are computed on save, so they're set via update
+        CCDLDataset.objects.update(estimated_size_in_bytes=100)
+        CCDLDataset.objects.filter(pk=jobs[3].dataset.pk).update(estimated_size_in_bytes=101)
+
+        submitted_jobs, pending_jobs, failed_jobs = Job.submit_pending(pack=True)
+
+        # Small jobs are packed in pairs, and the large job is submitted alone
+        self.assertEqual(mock_batch_submit_job.call_count, 3)
+        self.assertListEqual(submitted_jobs, jobs)
+        pack_job = next(
+            call.args[0]
+            for call in mock_batch_submit_job.call_args_list
+            if call.args[0].batch_job_name.startswith("pack-")
+        )
+        self.assertEqual(
+            pack_job.batch_container_overrides["command"][3:],
+            ["--job-ids", f"{jobs[0].id},{jobs[1].id}"],
+        )
+        self.assertEqual(submitted_jobs[0].batch_job_id, f"MOCK_{pack_job.batch_job_name}")
+        self.assertEqual(submitted_jobs[1].batch_job_id, f"MOCK_{pack_job.batch_job_name}")
+        self.assertEqual(submitted_jobs[3].batch_job_id, f"MOCK_{jobs[3].batch_job_name}")
+        self.assertEqual(Job.objects.filter(state=JobStates.PROCESSING).count(), 4)
+
+    def test_claim_pending(self):
+        small_job = JobFactory(
+            state=JobStates.PENDING, dataset=CCDLDatasetFactory(is_processing=False)
+        )
+        large_job = JobFactory(
+            state=JobStates.PENDING, dataset=UserDatasetFactory(is_processing=False)
+        )
+        # Sizes are computed on save, so they're set via update
+        CCDLDataset.objects.update(estimated_size_in_bytes=100)
+        UserDataset.objects.update(estimated_size_in_bytes=101)
+
+        # Jobs of excluded datasets aren't claimed
+        self.assertIsNone(Job.claim_pending(100, exclude_dataset_ids=[small_job.dataset.pk]))
+
+        claimed_job = Job.claim_pending(100, "MOCK_JOB_ID")
+        self.assertEqual(claimed_job, small_job)
+        claimed_job.refresh_from_db()
+        self.assertEqual(claimed_job.state, JobStates.PROCESSING)
+        self.assertEqual(claimed_job.batch_job_id, "MOCK_JOB_ID")
+        self.assertIn(str(claimed_job.id), claimed_job.batch_container_overrides["command"])
+        claimed_job.dataset.refresh_from_db()
+        self.assertTrue(claimed_job.dataset.is_processing)
+
+        # Only jobs with small datasets are claimed
+        self.assertIsNone(Job.claim_pending(100))
+        self.assertEqual(Job.claim_pending(101), large_job)
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.utils.timezone import make_aware
+
+from scpca_portal import common
+from scpca_portal.models import JobStepMetric
+from scpca_portal.test.factories import JobFactory
+
+
+class TestJobStepMetric(TestCase):
+    def setUp(self):
+        self.job = JobFactory()
+        self.now = make_aware(datetime.now())
+
+    def create_metric(self, step: str, duration: float, **kwargs) -> JobStepMetric:
+        return JobStepMetric.objects.create(
+            job=self.job,
+            step=step,
+            started_at=kwargs.pop("started_at", self.now),
+            ended_at=self.now,
+            duration=duration,
+            **kwargs,
+        )
+
+    def test_get_stats(self):
+        small_size = 10 * common.MB_IN_BYTES
+        for duration in range(1, 11):
+            self.create_metric(
+                "upload", duration, bytes_uploaded=duration * 1000, dataset_size_in_bytes=small_size
+            )
+        self.create_metric("upload", 100, dataset_size_in_bytes=2 * common.GB_IN_BYTES)
+        self.create_metric("upload", 100, dataset_size_in_bytes=200 * common.GB_IN_BYTES)
+        self.create_metric("upload", 100)
+        # Failed steps are excluded
+        self.create_metric("upload", 1000, succeeded=False, dataset_size_in_bytes=small_size)
+
+        stats = JobStepMetric.get_stats()
+
+        # Size buckets are ordered from smallest to largest
+        self.assertEqual(
+            [stat["size_bucket"] for stat in stats], ["<100MB", "1GB-10GB", ">100GB", "N/A"]
+        )
+
+        small_stats = stats[0]
+        self.assertEqual(small_stats["count"], 10)
+        self.assertAlmostEqual(small_stats["duration_p50"], 5.5)
+        self.assertAlmostEqual(small_stats["duration_p95"], 9.55)
+        # Each step uploaded 1000 bytes per second
+        self.assertAlmostEqual(small_stats["throughput_p50"], 1000)
+        self.assertAlmostEqual(small_stats["throughput_p95"], 1000)
+
+    def test_get_stats_since(self):
+        self.create_metric("download", 1)
+        self.create_metric("download", 1, started_at=self.now - timedelta(days=10))
+
+        stats = JobStepMetric.get_stats(since=self.now - timedelta(days=1))
+
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["count"], 1)
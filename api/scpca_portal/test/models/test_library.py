@@ -0,0 +1,150 @@
+from django.test import TestCase
+
+from scpca_portal.enums import FileFormats, Modalities
+from scpca_portal.models import Library, OriginalFile
+from scpca_portal.test.factories import (
+    LeafProjectFactory,
+    LibraryFactory,
+    OriginalFileFactory,
+    SampleFactory,
+)
+
+
+class TestGetLibrariesSamplesMetadata(TestCase):
+    def setUp(self):
+        for _ in range(2):
+            project = LeafProjectFactory()
+            samples = [SampleFactory(project=project) for _ in range(2)]
+
+            for sample in samples:
+                sample.libraries.add(*[LibraryFactory(project=project) for _ in range(2)])
+
+            multiplexed_library = LibraryFactory(project=project, is_multiplexed=True)
+            multiplexed_library.metadata["sample_cell_estimates"] = {
+                sample.scpca_id: 100 for sample in samples
+            }
+            multiplexed_library.save()
+            multiplexed_library.samples.add(*samples)
+
+    def test_get_libraries_samples_metadata_matches_combined_library_metadata(self):
+        libraries = Library.objects.order_by("scpca_id")
+        expected_libraries_metadata = [
+            lib_md for library in libraries for lib_md in library.get_combined_library_metadata()
+        ]
+
+        libraries_metadata = [
+            lib_md for _, _, lib_md in Library.get_libraries_samples_metadata(libraries)
+        ]
+
+        self.assertEqual(len(libraries_metadata), 12)
+        self.assertEqual(libraries_metadata, expected_libraries_metadata)
+
+    def test_get_libraries_samples_metadata_constant_queries(self):
+        # One query each for libraries, projects and samples
+        with self.assertNumQueries(3):
+            Library.get_libraries_samples_metadata(Library.objects.all())
+
+        LibraryFactory().samples.add(SampleFactory())
+        with self.assertNumQueries(3):
+            Library.get_libraries_samples_metadata(Library.objects.all())
+
+
+class TestGetFromDict(TestCase):
+    def setUp(self):
+        self.project = LeafProjectFactory(scpca_id="SCPCP999999")
+        OriginalFileFactory(
+            project_id=self.project.scpca_id,
+            library_id="SCPCL999990",
+            is_single_cell=True,
+            is_single_cell_experiment=True,
+        )
+        OriginalFileFactory(
+            project_id=self.project.scpca_id,
+            library_id="SCPCL999990",
+            is_single_cell=True,
+            is_anndata=True,
+            is_cite_seq=True,
+        )
+        OriginalFileFactory(
+            project_id=self.project.scpca_id,
+            library_id="SCPCL999991",
+            is_spatial=True,
+            is_spatial_spaceranger=True,
+        )
+        # Files which can't be downloaded are ignored
+        OriginalFileFactory(
+            project_id=self.project.scpca_id,
+            library_id="SCPCL999991",
+            is_single_cell=True,
+            is_downloadable=False,
+        )
+
+    def get_library_data(self, library_id: str):
+        return {"scpca_library_id": library_id, "workflow_version": "development"}
+
+    def test_get_library_file_flags(self):
+        with self.assertNumQueries(1):
+            library_file_flags = OriginalFile.get_library_file_flags(
+                project_id=self.project.scpca_id
+            )
+
+        self.assertEqual(set(library_file_flags), {"SCPCL999990", "SCPCL999991"})
+        self.assertTrue(library_file_flags["SCPCL999990"]["is_anndata"])
+        self.assertTrue(library_file_flags["SCPCL999990"]["is_cite_seq"])
+        self.assertFalse(library_file_flags["SCPCL999990"]["is_spatial"])
+        self.assertFalse(library_file_flags["SCPCL999991"]["is_single_cell"])
+
+    def test_get_from_dict(self):
+        library_file_flags = OriginalFile.get_library_file_flags(project_id=self.project.scpca_id)
+
+        with self.assertNumQueries(0):
+            single_cell_library = Library.get_from_dict(
+                self.get_library_data("SCPCL999990"),
+                self.project,
+                library_file_flags["SCPCL999990"],
+            )
+        self.assertEqual(single_cell_library.modality, Modalities.SINGLE_CELL)
+        self.assertEqual(
+            single_cell_library.formats,
+            [FileFormats.ANN_DATA, FileFormats.SINGLE_CELL_EXPERIMENT],
+        )
+        self.assertTrue(single_cell_library.has_cite_seq_data)
+
+        # Flags are queried when they aren't passed
+        spatial_library = Library.get_from_dict(self.get_library_data("SCPCL999991"), self.project)
+        self.assertEqual(spatial_library.modality, Modalities.SPATIAL)
+        self.assertEqual(spatial_library.formats, [FileFormats.SPATIAL_SPACERANGER])
+        self.assertFalse(spatial_library.has_cite_seq_data)
+
+
+class TestBulkCreateFromDicts(TestCase):
+    def get_library_json(self, library_id: str):
+        return {"scpca_library_id": library_id, "workflow_version": "development"}
+
+    def test_bulk_create_from_dicts(self):
+        project = LeafProjectFactory()
+        samples = [SampleFactory(project=project) for _ in range(3)]
+        existing_library = LibraryFactory(project=project)
+        samples[0].libraries.add(existing_library)
+
+        multiplexed_library_json = self.get_library_json("SCPCL999990")
+        library_jsons_samples = [
+            (multiplexed_library_json, samples[0]),
+            (multiplexed_library_json, samples[1]),
+            (self.get_library_json("SCPCL999991"), samples[2]),
+            # Already created and associated libraries are left as is
+            (self.get_library_json(existing_library.scpca_id), samples[0]),
+            (self.get_library_json(existing_library.scpca_id), samples[1]),
+        ]
+
+        # Existing libraries, file flags, libraries insert, associations insert
+        with self.assertNumQueries(4):
+            Library.bulk_create_from_dicts(library_jsons_samples, project)
+
+        self.assertEqual(Library.objects.count(), 3)
+        multiplexed_library = Library.objects.get(scpca_id="SCPCL999990")
+        self.assertEqual(set(multiplexed_library.samples.all()), set(samples[:2]))
+        self.assertEqual(set(existing_library.samples.all()), set(samples[:2]))
+        self.assertEqual(
+            list(Library.objects.get(scpca_id="SCPCL999991").samples.all()), [samples[2]]
+        )
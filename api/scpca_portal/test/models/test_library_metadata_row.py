@@ -0,0 +1,76 @@
+from django.test import TestCase
+
+from scpca_portal import metadata_file
+from scpca_portal.models import Library, LibraryMetadataRow
+from scpca_portal.test.factories import LeafProjectFactory, LibraryFactory, SampleFactory
+
+
+class TestLibraryMetadataRow(TestCase):
+    def setUp(self):
+        self.project = LeafProjectFactory()
+        self.samples = [
+            SampleFactory(project=self.project, metadata={"scpca_sample_id": f"SCPCS99999{i}"})
+            for i in range(2)
+        ]
+        self.libraries = []
+        for sample in reversed(self.samples):
+            library = LibraryFactory(project=self.project)
+            library.metadata["technology"] = ["10Xv3", "CITEseq_10Xv3"]
+            library.save()
+            sample.libraries.add(library)
+            self.libraries.append(library)
+
+    def test_refresh_project_rows(self):
+        LibraryMetadataRow.refresh_project_rows(self.project)
+
+        self.assertEqual(LibraryMetadataRow.objects.count(), 2)
+        expected_libraries_metadata = sorted(
+            (
+                metadata_file.format_metadata_dict(lib_md)
+                for _, _, lib_md in Library.get_libraries_samples_metadata(
+                    self.project.libraries.all()
+                )
+            ),
+            key=lambda lib_md: lib_md["scpca_sample_id"],
+        )
+        self.assertEqual(
+            list(LibraryMetadataRow.get_sorted_libraries_metadata(self.project.libraries.all())),
+            expected_libraries_metadata,
+        )
+
+    def test_refresh_project_rows_only_changed_rows(self):
+        LibraryMetadataRow.refresh_project_rows(self.project)
+        unchanged_row, changed_row = [
+            LibraryMetadataRow.objects.get(library=library) for library in self.libraries
+        ]
+
+        self.libraries[1].metadata["technology"] = "10Xv2"
+        self.libraries[1].save()
+        LibraryMetadataRow.refresh_project_rows(self.project)
+
+        # Rows are updated in place
+        self.assertEqual(
+            LibraryMetadataRow.objects.get(pk=unchanged_row.pk).updated_at, unchanged_row.updated_at
+        )
+        changed_row.refresh_from_db()
+        self.assertEqual(changed_row.metadata["technology"], "10Xv2")
+        self.assertNotEqual(changed_row.digest, unchanged_row.digest)
+
+        # Rows of removed library and sample pairs are deleted
+        self.samples[0].libraries.clear()
+        LibraryMetadataRow.refresh_project_rows(self.project)
+        self.assertEqual(LibraryMetadataRow.objects.count(), 1)
+
+    def test_get_fingerprint(self):
+        LibraryMetadataRow.refresh_project_rows(self.project)
+        libraries = self.project.libraries.all()
+        fingerprint = LibraryMetadataRow.get_fingerprint(libraries)
+
+        self.assertEqual(len(fingerprint), 32)
+        self.assertEqual(LibraryMetadataRow.get_fingerprint(libraries), fingerprint)
+        self.assertNotEqual(LibraryMetadataRow.get_fingerprint(self.libraries[:1]), fingerprint)
+
+        self.libraries[0].metadata["technology"] = "10Xv2"
+        self.libraries[0].save()
+        LibraryMetadataRow.refresh_project_rows(self.project)
+        self.assertNotEqual(LibraryMetadataRow.get_fingerprint(libraries), fingerprint)
@@ -1,9 +1,23 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.db import transaction
 from django.test import TestCase, tag
+from django.utils.timezone import make_aware
 
 from scpca_portal import common
 from scpca_portal.enums import Modalities
-from scpca_portal.models import Project
-from scpca_portal.test.factories import LibraryFactory, ProjectFactory
+from scpca_portal.models import ComputedFile, Library, Project, Sample
+from scpca_portal.test.factories import (
+    LeafProjectFactory,
+    LibraryFactory,
+    OriginalFileFactory,
+    ProjectComputedFileFactory,
+    ProjectFactory,
+    ProjectSummaryFactory,
+    SampleComputedFileFactory,
+    SampleFactory,
+)
 
 
 class TestProject(TestCase):
@@ -102,3 +116,290 @@ class TestProject(TestCase):
 
         for project in Project.objects.filter(scpca_id__in=project_ids):
             self.assertTrue(project.is_locked)
+
+    @tag("purge")
+    @patch("scpca_portal.s3.delete_output_files")
+    def test_purge(self, mock_delete_output_files):
+        sample = SampleFactory(project=self.project)
+        ProjectComputedFileFactory(project=self.project, s3_key="SCPCP000000_merged.zip")
+        other_project = ProjectFactory()
+        project_pk = self.project.pk
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.purge(delete_from_s3=True)
+
+        self.assertFalse(Project.objects.filter(pk=project_pk).exists())
+        self.assertFalse(Sample.objects.filter(pk=sample.pk).exists())
+        self.assertFalse(Library.objects.filter(project__pk=project_pk).exists())
+        self.assertFalse(ComputedFile.objects.filter(sample__project__pk=project_pk).exists())
+        self.assertEqual(ComputedFile.objects.count(), 2)  # other_project and its sample
+        self.assertTrue(Project.objects.filter(pk=other_project.pk).exists())
+
+        # All of the project's keys are deleted from S3 in a single call per bucket
+        mock_delete_output_files.assert_called_once()
+        s3_keys, s3_bucket = mock_delete_output_files.call_args.args
+        self.assertEqual(s3_bucket, "scpca-portal-local")
+        self.assertEqual(s3_keys, {"SCPCP000000_merged.zip", "SCPCR000126/filtered.rds"})
+
+    @tag("purge")
+    @patch("scpca_portal.s3.delete_output_files")
+    def test_purge_rolled_back(self, mock_delete_output_files):
+        ProjectComputedFileFactory(project=self.project, s3_key="SCPCP000000_merged.zip")
+
+        # Objects are kept in S3 when the purge's transaction fails
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    self.project.purge(delete_from_s3=True)
+                    raise ValueError
+
+        mock_delete_output_files.assert_not_called()
+        self.assertTrue(Project.objects.filter(pk=self.project.pk).exists())
+
+
+class TestUpdateProjectAggregateProperties(TestCase):
+    def setUp(self):
+        self.project = LeafProjectFactory(has_multiplexed_data=False)
+        self.samples = [
+            SampleFactory(
+                project=self.project,
+                diagnosis=diagnosis,
+                disease_timing=disease_timing,
+                has_bulk_rna_seq=False,
+                has_cite_seq_data=False,
+                has_single_cell_data=True,
+                has_spatial_data=False,
+                is_cell_line=index == 0,
+                is_xenograft=False,
+            )
+            for index, (diagnosis, disease_timing) in enumerate(
+                [("AML", "primary diagnosis"), ("AML", common.NA), ("ALL", "relapse")]
+            )
+        ]
+        self.samples[0].metadata["organism"] = "Homo sapiens"
+        self.samples[0].save()
+
+        for sample in self.samples:
+            sample.libraries.add(LibraryFactory(project=self.project))
+        spatial_library = LibraryFactory(project=self.project, modality=Modalities.SPATIAL)
+        # Values are stripped of all surrounding whitespace, as str.strip() would
+        spatial_library.metadata["seq_unit"] = " spot\n"
+        spatial_library.metadata["technology"] = "\tvisium "
+        spatial_library.save()
+        self.samples[0].libraries.add(spatial_library)
+        self.samples[2].has_spatial_data = True
+        self.samples[2].save()
+
+        bulk_library = LibraryFactory(project=self.project, modality=Modalities.BULK_RNA_SEQ)
+        bulk_library.metadata["seq_unit"] = "bulk"
+        bulk_library.save()
+        self.samples[1].libraries.add(bulk_library)
+
+    def test_update_project_modality_properties(self):
+        with self.assertNumQueries(2):
+            self.project.update_project_modality_properties()
+
+        self.project.refresh_from_db()
+        self.assertTrue(self.project.has_single_cell_data)
+        self.assertTrue(self.project.has_spatial_data)
+        self.assertTrue(self.project.includes_cell_lines)
+        self.assertFalse(self.project.has_bulk_rna_seq)
+        self.assertFalse(self.project.includes_xenografts)
+
+    def test_update_project_aggregate_properties(self):
+        # Samples, metadata keys, diagnoses, libraries, save
+        with self.assertNumQueries(5):
+            self.project.update_project_aggregate_properties()
+
+        self.project.refresh_from_db()
+        self.assertIn("organism", self.project.additional_metadata_keys)
+        self.assertNotIn("diagnosis", self.project.additional_metadata_keys)
+        self.assertEqual(self.project.diagnoses_counts, {"AML": 2, "ALL": 1})
+        self.assertEqual(sorted(self.project.disease_timings), ["primary diagnosis", "relapse"])
+        self.assertEqual(self.project.modalities, [Modalities.SINGLE_CELL, Modalities.SPATIAL])
+        self.assertEqual(self.project.organisms, ["Homo sapiens"])
+        self.assertEqual(self.project.seq_units, ["cell", "spot"])
+        self.assertEqual(self.project.technologies, ["10Xv3", "visium"])
+
+    def test_update_project_summaries_aggregate_properties(self):
+        ProjectSummaryFactory(project=self.project, diagnosis="stale")
+
+        # Summaries, delete, insert
+        with self.assertNumQueries(3):
+            self.project.update_project_summaries_aggregate_properties()
+
+        summaries = {
+            (summary.diagnosis, summary.seq_unit, summary.technology): summary.sample_count
+            for summary in self.project.summaries.all()
+        }
+        self.assertEqual(
+            summaries,
+            {
+                ("AML", "cell", "10Xv3"): 2,
+                ("AML", "spot", "visium"): 1,
+                ("ALL", "cell", "10Xv3"): 1,
+            },
+        )
+
+
+class TestUpdateMetadata(TestCase):
+    def setUp(self):
+        self.project = LeafProjectFactory(has_bulk_rna_seq=False)
+        self.samples_metadata = [
+            {
+                "age": "4",
+                "age_timing": "diagnosis",
+                "diagnosis": "pilocytic astrocytoma",
+                "disease_timing": "primary diagnosis",
+                "scpca_sample_id": f"SCPCS99999{index}",
+                "sex": "M",
+                "subdiagnosis": "NA",
+                "tissue_location": "posterior fossa",
+            }
+            for index in range(3)
+        ]
+        self.libraries_metadata = [
+            {
+                "scpca_library_id": f"SCPCL99999{index}",
+                "scpca_sample_id": f"SCPCS99999{index}",
+                "seq_unit": "cell",
+                "technology": "10Xv3",
+                "workflow_version": "development",
+            }
+            for index in range(3)
+        ]
+
+        load_samples_metadata_patch = patch(
+            "scpca_portal.metadata_parser.load_samples_metadata",
+            side_effect=lambda project_id: self.samples_metadata,
+        )
+        get_library_jsons_samples_patch = patch(
+            "scpca_portal.models.library.Library.get_library_jsons_samples",
+            side_effect=self.get_library_jsons_samples,
+        )
+        self.patches = [load_samples_metadata_patch, get_library_jsons_samples_patch]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def get_library_jsons_samples(self, project):
+        samples = {sample.scpca_id: sample for sample in project.samples.all()}
+        return [
+            (library_metadata, sample)
+            for library_metadata in self.libraries_metadata
+            if (sample := samples.get(library_metadata["scpca_sample_id"]))
+        ]
+
+    def test_update_metadata(self):
+        self.project.update_metadata()
+        self.assertEqual(self.project.samples.count(), 3)
+        self.assertEqual(self.project.libraries.count(), 3)
+        self.assertEqual(self.project.diagnoses_counts, {"pilocytic astrocytoma": 3})
+
+        changed_library_sample, changed_sample, removed_sample = self.project.samples.order_by(
+            "scpca_id"
+        )
+        changed_library_computed_file = SampleComputedFileFactory(sample=changed_library_sample)
+        changed_computed_file = SampleComputedFileFactory(sample=changed_sample)
+        project_computed_file = ProjectComputedFileFactory(project=self.project)
+
+        # Nothing is purged or recreated when nothing changed
+        self.project.update_metadata()
+        self.assertTrue(Sample.objects.filter(pk=changed_sample.pk).exists())
+        self.assertTrue(ComputedFile.objects.filter(pk=changed_computed_file.pk).exists())
+        self.assertTrue(ComputedFile.objects.filter(pk=project_computed_file.pk).exists())
+
+        self.samples_metadata[1]["diagnosis"] = "medulloblastoma"
+        self.samples_metadata.pop()
+        self.libraries_metadata[0]["workflow_version"] = "v1.0.0"
+        self.project.update_metadata()
+
+        # Existing samples and libraries are updated rather than recreated
+        self.assertEqual(self.project.samples.count(), 2)
+        self.assertTrue(Sample.objects.filter(pk=changed_library_sample.pk).exists())
+        changed_sample.refresh_from_db()
+        self.assertEqual(changed_sample.diagnosis, "medulloblastoma")
+        self.assertFalse(Sample.objects.filter(pk=removed_sample.pk).exists())
+        self.assertEqual(
+            set(self.project.libraries.values_list("scpca_id", flat=True)),
+            {"SCPCL999990", "SCPCL999991"},
+        )
+        self.assertEqual(Library.objects.get(scpca_id="SCPCL999990").workflow_version, "v1.0.0")
+        self.project.refresh_from_db()
+        self.assertEqual(
+            self.project.diagnoses_counts, {"pilocytic astrocytoma": 1, "medulloblastoma": 1}
+        )
+
+        # Computed files of changed samples and of the project are purged
+        self.assertFalse(ComputedFile.objects.filter(pk=changed_library_computed_file.pk).exists())
+        self.assertFalse(ComputedFile.objects.filter(pk=changed_computed_file.pk).exists())
+        self.assertFalse(ComputedFile.objects.filter(pk=project_computed_file.pk).exists())
+
+    def test_update_metadata_unchanged_sample(self):
+        self.project.update_metadata()
+        unchanged_sample = self.project.samples.get(scpca_id="SCPCS999990")
+        unchanged_computed_file = SampleComputedFileFactory(sample=unchanged_sample)
+
+        self.samples_metadata[1]["diagnosis"] = "medulloblastoma"
+        self.project.update_metadata()
+
+        self.assertTrue(ComputedFile.objects.filter(pk=unchanged_computed_file.pk).exists())
+        self.assertEqual(self.project.samples.get(scpca_id="SCPCS999990"), unchanged_sample)
+
+    def test_get_outdated_computed_files(self):
+        self.project.update_metadata()
+        sample, other_sample, _ = self.project.samples.order_by("scpca_id")
+        computed_file = SampleComputedFileFactory(sample=sample)
+        other_computed_file = SampleComputedFileFactory(sample=other_sample)
+        project_computed_file = ProjectComputedFileFactory(project=self.project)
+
+        # The first sample's library file changed after its computed files were created
+        OriginalFileFactory(
+            project_id=self.project.scpca_id,
+            library_id="SCPCL999990",
+            hash_change_at=make_aware(datetime.now() + timedelta(days=1)),
+        )
+        OriginalFileFactory(
+            project_id=self.project.scpca_id,
+            library_id="SCPCL999991",
+            hash_change_at=make_aware(datetime.now() - timedelta(days=1)),
+        )
+
+        self.assertEqual(
+            set(self.project.get_outdated_computed_files()), {computed_file, project_computed_file}
+        )
+        self.assertNotIn(other_computed_file, self.project.get_outdated_computed_files())
+
+
+class TestGetMetadataHash(TestCase):
+    def setUp(self):
+        self.project_metadata = {"scpca_project_id": "SCPCP999999", "title": "Project"}
+        self.metadata_file = OriginalFileFactory(
+            project_id="SCPCP999999", is_metadata=True, s3_key="SCPCP999999/samples_metadata.csv"
+        )
+        self.data_file = OriginalFileFactory(project_id="SCPCP999999")
+
+    def test_get_metadata_hash(self):
+        metadata_hash = Project.get_metadata_hash(self.project_metadata)
+        self.assertEqual(Project.get_metadata_hash(dict(self.project_metadata)), metadata_hash)
+
+        # Replaced data files change the hash
+        self.data_file.hash = "changed"
+        self.data_file.save()
+        changed_metadata_hash = Project.get_metadata_hash(self.project_metadata)
+        self.assertNotEqual(changed_metadata_hash, metadata_hash)
+
+        # So do metadata file contents, new input files and project metadata
+        self.metadata_file.hash = "changed"
+        self.metadata_file.save()
+        self.assertNotEqual(Project.get_metadata_hash(self.project_metadata), changed_metadata_hash)
+        changed_metadata_hash = Project.get_metadata_hash(self.project_metadata)
+
+        OriginalFileFactory(project_id="SCPCP999999")
+        self.assertNotEqual(Project.get_metadata_hash(self.project_metadata), changed_metadata_hash)
+
+        self.project_metadata["title"] = "Changed project"
+        self.assertNotEqual(Project.get_metadata_hash(self.project_metadata), changed_metadata_hash)
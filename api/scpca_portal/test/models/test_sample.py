@@ -2,7 +2,8 @@ from django.test import TestCase
 
 from scpca_portal import common
 from scpca_portal.enums import FileFormats, Modalities
-from scpca_portal.test.factories import LibraryFactory, SampleFactory
+from scpca_portal.models import Sample
+from scpca_portal.test.factories import LeafProjectFactory, LibraryFactory, SampleFactory
 
 
 class TestGetLibraries(TestCase):
@@ -55,3 +56,82 @@ class TestGetLibraries(TestCase):
         result = self.sample.get_libraries()
         for library in self.library_list:
             self.assertIn(library, result)
+
+
+class TestUpdateAggregateProperties(TestCase):
+    def setUp(self):
+        self.project = LeafProjectFactory(has_bulk_rna_seq=False)
+        self.samples = [
+            SampleFactory(
+                project=self.project,
+                has_cite_seq_data=False,
+                multiplexed_with=[],
+                seq_units=[],
+                technologies=[],
+            )
+            for _ in range(4)
+        ]
+
+    def create_library(self, samples, **kwargs):
+        library = LibraryFactory(project=self.project, **kwargs)
+        library.metadata["filtered_cell_count"] = 100
+        library.save()
+        library.samples.add(*samples)
+        return library
+
+    def test_update_aggregate_properties(self):
+        single_cell_sample, multiplexed_sample, other_multiplexed_sample, no_library_sample = (
+            self.samples
+        )
+        self.create_library([single_cell_sample], has_cite_seq_data=True)
+        library = self.create_library(
+            [single_cell_sample], formats=[FileFormats.SINGLE_CELL_EXPERIMENT, FileFormats.ANN_DATA]
+        )
+        library.metadata["seq_unit"] = " nucleus "
+        library.save()
+        self.create_library(
+            [single_cell_sample],
+            modality=Modalities.SPATIAL,
+            formats=[FileFormats.SPATIAL_SPACERANGER],
+        )
+        for cell_estimate in [10, 20]:
+            library = self.create_library(
+                [multiplexed_sample, other_multiplexed_sample], is_multiplexed=True
+            )
+            library.metadata["sample_cell_estimates"] = {
+                multiplexed_sample.scpca_id: cell_estimate,
+            }
+            library.save()
+
+        # Aggregated samples, bulk update
+        with self.assertNumQueries(2):
+            Sample.update_aggregate_properties(self.project)
+
+        single_cell_sample.refresh_from_db()
+        self.assertEqual(single_cell_sample.seq_units, ["cell", "nucleus"])
+        self.assertEqual(single_cell_sample.technologies, ["10Xv3"])
+        self.assertEqual(single_cell_sample.multiplexed_with, [])
+        # Spatial libraries aren't counted
+        self.assertEqual(single_cell_sample.sample_cell_count_estimate, 200)
+        self.assertTrue(single_cell_sample.has_cite_seq_data)
+        self.assertFalse(single_cell_sample.has_multiplexed_data)
+        self.assertTrue(single_cell_sample.has_single_cell_data)
+        self.assertTrue(single_cell_sample.has_spatial_data)
+        self.assertTrue(single_cell_sample.includes_anndata)
+
+        multiplexed_sample.refresh_from_db()
+        self.assertEqual(multiplexed_sample.multiplexed_with, [other_multiplexed_sample.scpca_id])
+        self.assertEqual(multiplexed_sample.demux_cell_count_estimate_sum, 30)
+        self.assertTrue(multiplexed_sample.has_multiplexed_data)
+        self.assertFalse(multiplexed_sample.has_spatial_data)
+        self.assertFalse(multiplexed_sample.includes_anndata)
+
+        other_multiplexed_sample.refresh_from_db()
+        self.assertEqual(other_multiplexed_sample.multiplexed_with, [multiplexed_sample.scpca_id])
+        self.assertEqual(other_multiplexed_sample.demux_cell_count_estimate_sum, 0)
+
+        no_library_sample.refresh_from_db()
+        self.assertEqual(no_library_sample.seq_units, [])
+        self.assertEqual(no_library_sample.technologies, [])
+        self.assertEqual(no_library_sample.sample_cell_count_estimate, 0)
+        self.assertFalse(no_library_sample.has_single_cell_data)
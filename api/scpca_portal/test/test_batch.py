@@ -0,0 +1,125 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+
+from botocore.exceptions import ClientError
+
+from scpca_portal import batch
+
+
+class TestTokenBucket(TestCase):
+    @patch("scpca_portal.batch.time")
+    def test_acquire(self, mock_time):
+        mock_time.monotonic.return_value = 0
+
+        # Advance the clock when waiting so that tokens are refilled
+        def sleep(seconds):
+            mock_time.monotonic.return_value += seconds
+
+        mock_time.sleep.side_effect = sleep
+
+        rate_limiter = batch.TokenBucket(rate=2)
+        for _ in range(2):
+            rate_limiter.acquire()
+        mock_time.sleep.assert_not_called()
+
+        # Once the bucket is empty, acquire waits until a token is refilled
+        rate_limiter.acquire()
+        mock_time.sleep.assert_called_once_with(0.5)
+
+
+@override_settings(AWS_BATCH_SUBMIT_MAX_ATTEMPTS=3)
+class TestSubmitJob(TestCase):
+    def get_error(self, code):
+        return ClientError({"Error": {"Code": code, "Message": code}}, "SubmitJob")
+
+    @patch("scpca_portal.batch.time.sleep")
+    @patch("scpca_portal.batch.get_aws_batch")
+    def test_submit_job_throttled(self, mock_get_aws_batch, mock_sleep):
+        mock_submit_job = mock_get_aws_batch.return_value.submit_job
+        mock_submit_job.side_effect = [
+            self.get_error("TooManyRequestsException"),
+            self.get_error("ThrottlingException"),
+            {"jobId": "MOCK_JOB_ID"},
+        ]
+
+        self.assertEqual(batch.submit_job(MagicMock()), "MOCK_JOB_ID")
+        self.assertEqual(mock_submit_job.call_count, 3)
+
+        # Delays increase exponentially between attempts
+        first_delay, second_delay = [call.args[0] for call in mock_sleep.call_args_list]
+        self.assertLess(first_delay, second_delay)
+
+    @patch("scpca_portal.batch.time.sleep")
+    @patch("scpca_portal.batch.get_aws_batch")
+    def test_submit_job_failure(self, mock_get_aws_batch, mock_sleep):
+        mock_submit_job = mock_get_aws_batch.return_value.submit_job
+
+        # Other errors aren't retried
+        mock_submit_job.side_effect = self.get_error("ClientException")
+        self.assertIsNone(batch.submit_job(MagicMock()))
+        self.assertEqual(mock_submit_job.call_count, 1)
+
+        # Throttled requests are retried up to the max attempts
+        mock_submit_job.reset_mock()
+        mock_submit_job.side_effect = self.get_error("ThrottlingException")
+        self.assertIsNone(batch.submit_job(MagicMock()))
+        self.assertEqual(mock_submit_job.call_count, 3)
+
+    @patch("scpca_portal.batch.submit_job")
+    def test_submit_jobs(self, mock_submit_job):
+        mock_submit_job.side_effect = lambda job, **kwargs: job.batch_job_id
+        jobs = [MagicMock(batch_job_id=f"MOCK_JOB_ID_{index}") for index in range(10)]
+        jobs[5].batch_job_id = None
+
+        batch_job_ids = batch.submit_jobs(jobs)
+
+        self.assertEqual(batch_job_ids, [job.batch_job_id for job in jobs])
+        self.assertEqual(batch.submit_jobs([]), [])
+
+
+class TestGetJobs(TestCase):
+    @patch("scpca_portal.batch.get_aws_batch")
+    def test_get_jobs(self, mock_get_aws_batch):
+        mock_describe_jobs = mock_get_aws_batch.return_value.describe_jobs
+        mock_describe_jobs.side_effect = lambda jobs: {
+            "jobs": [{"jobId": batch_job_id} for batch_job_id in jobs]
+        }
+        jobs = [MagicMock(batch_job_id=f"MOCK_JOB_ID_{index}") for index in range(250)]
+        # Packed jobs share a batch job
+        jobs.append(MagicMock(batch_job_id="MOCK_JOB_ID_0"))
+
+        fetched_jobs = batch.get_jobs(jobs)
+
+        # Jobs are fetched in chunks of 100
+        self.assertEqual(mock_describe_jobs.call_count, 3)
+        self.assertEqual(
+            sorted(job["jobId"] for job in fetched_jobs),
+            sorted(f"MOCK_JOB_ID_{index}" for index in range(250)),
+        )
+        self.assertEqual(batch.get_jobs([]), [])
+
+    @patch("scpca_portal.batch.get_aws_batch")
+    def test_get_jobs_failure(self, mock_get_aws_batch):
+        jobs = [MagicMock(batch_job_id=f"MOCK_JOB_ID_{index}") for index in range(250)]
+
+        def describe_jobs(jobs):
+            if "MOCK_JOB_ID_100" in jobs:
+                raise ClientError({"Error": {"Code": "ServerException"}}, "DescribeJobs")
+            return {"jobs": [{"jobId": batch_job_id} for batch_job_id in jobs]}
+
+        mock_describe_jobs = mock_get_aws_batch.return_value.describe_jobs
+        mock_describe_jobs.side_effect = describe_jobs
+
+        # Jobs of a failed chunk are left out, without affecting other chunks
+        fetched_job_ids = {job["jobId"] for job in batch.get_jobs(jobs)}
+        self.assertEqual(len(fetched_job_ids), 150)
+        self.assertNotIn("MOCK_JOB_ID_100", fetched_job_ids)
+        self.assertIn("MOCK_JOB_ID_200", fetched_job_ids)
+
+        # Raises when every chunk failed
+        mock_describe_jobs.side_effect = ClientError(
+            {"Error": {"Code": "ServerException"}}, "DescribeJobs"
+        )
+        with self.assertRaises(Exception):
+            batch.get_jobs(jobs)
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from scpca_portal import batch_sizing
+
+GB = 10**9
+
+
+class TestBatchSizing(TestCase):
+    def get_tier(self, queue="FARGATE", max_size_in_bytes=None, max_file_count=None, vcpus=1):
+        return {
+            "queue": queue,
+            "max_size_in_bytes": max_size_in_bytes,
+            "max_file_count": max_file_count,
+            "vcpus": vcpus,
+            "memory_in_mib": 2048 * vcpus,
+        }
+
+    def test_configured_sizing_tiers(self):
+        # Must not raise
+        batch_sizing.validate_sizing_tiers(
+            settings.AWS_BATCH_SIZING_TIERS, settings.AWS_BATCH_SIZING_MEMORY_MULTIPLIERS
+        )
+
+    def test_validate_sizing_tiers(self):
+        with self.assertRaises(ImproperlyConfigured):
+            batch_sizing.validate_sizing_tiers([])
+
+        # Unknown queue
+        with self.assertRaises(ImproperlyConfigured):
+            batch_sizing.validate_sizing_tiers([self.get_tier(queue="SPOT")])
+
+        # Last tier must be unbounded on EC2
+        with self.assertRaises(ImproperlyConfigured):
+            batch_sizing.validate_sizing_tiers([self.get_tier()])
+        with self.assertRaises(ImproperlyConfigured):
+            batch_sizing.validate_sizing_tiers([self.get_tier(queue="EC2", max_size_in_bytes=GB)])
+
+        # Limits must not decrease
+        with self.assertRaises(ImproperlyConfigured):
+            batch_sizing.validate_sizing_tiers(
+                [
+                    self.get_tier(max_size_in_bytes=10 * GB),
+                    self.get_tier(max_size_in_bytes=GB),
+                    self.get_tier(queue="EC2"),
+                ]
+            )
+        with self.assertRaises(ImproperlyConfigured):
+            batch_sizing.validate_sizing_tiers(
+                [
+                    self.get_tier(max_size_in_bytes=GB),
+                    self.get_tier(max_size_in_bytes=10 * GB, max_file_count=10),
+                    self.get_tier(queue="EC2"),
+                ]
+            )
+
+        # Fargate doesn't support 3 vCPUs
+        with self.assertRaises(ImproperlyConfigured):
+            batch_sizing.validate_sizing_tiers(
+                [self.get_tier(max_size_in_bytes=GB, vcpus=3), self.get_tier(queue="EC2")]
+            )
+
+        # Fargate supports at most 8192 MiB with 1 vCPU, which a multiplier of 8 exceeds
+        tiers = [self.get_tier(max_size_in_bytes=GB), self.get_tier(queue="EC2")]
+        batch_sizing.validate_sizing_tiers(tiers, {"merged": 2, "spatial": 2})
+        with self.assertRaises(ImproperlyConfigured):
+            batch_sizing.validate_sizing_tiers(tiers, {"merged": 4, "spatial": 2})
+
+    def test_get_job_sizing(self):
+        with self.settings(
+            AWS_BATCH_SIZING_TIERS=[
+                self.get_tier(max_size_in_bytes=GB, max_file_count=10),
+                self.get_tier(max_size_in_bytes=100 * GB, vcpus=2),
+                self.get_tier(queue="EC2", vcpus=4),
+            ],
+            AWS_BATCH_SIZING_MEMORY_MULTIPLIERS={"merged": 2, "spatial": 1.5},
+            AWS_BATCH_SIZING_STORAGE_MULTIPLIER=2,
+            AWS_BATCH_FARGATE_STORAGE_IN_BYTES=100 * GB,
+        ):
+            sizing = batch_sizing.get_job_sizing(
+                GB, 10, includes_merged=False, includes_spatial=False
+            )
+            self.assertEqual(sizing.queue, "FARGATE")
+            self.assertEqual(sizing.batch_job_queue, settings.AWS_BATCH_FARGATE_JOB_QUEUE_NAME)
+            self.assertEqual(
+                sizing.batch_job_definition, settings.AWS_BATCH_FARGATE_JOB_DEFINITION_NAME
+            )
+            self.assertEqual(sizing.storage_in_bytes, 2 * GB)
+            self.assertEqual(
+                sizing.resource_requirements,
+                [{"type": "VCPU", "value": "1"}, {"type": "MEMORY", "value": "2048"}],
+            )
+
+            # Too many files for the first tier
+            sizing = batch_sizing.get_job_sizing(
+                GB, 11, includes_merged=False, includes_spatial=False
+            )
+            self.assertEqual(sizing.vcpus, 2)
+
+            # Memory is multiplied for merged and spatial datasets
+            sizing = batch_sizing.get_job_sizing(
+                GB, 10, includes_merged=True, includes_spatial=True
+            )
+            self.assertEqual(sizing.vcpus, 1)
+            self.assertEqual(sizing.memory_in_mib, 6144)
+
+            # Fits the second tier's size, but not fargate's storage
+            sizing = batch_sizing.get_job_sizing(
+                51 * GB, 10, includes_merged=False, includes_spatial=False
+            )
+            self.assertEqual(sizing.queue, "EC2")
+            self.assertEqual(sizing.batch_job_queue, settings.AWS_BATCH_EC2_JOB_QUEUE_NAME)
+            self.assertEqual(
+                sizing.batch_job_definition, settings.AWS_BATCH_EC2_JOB_DEFINITION_NAME
+            )
+            self.assertEqual(sizing.vcpus, 4)
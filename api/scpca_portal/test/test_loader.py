@@ -8,11 +8,13 @@ from zipfile import ZipFile
 
 from django.conf import settings
 from django.core.management import call_command
-from django.test import TransactionTestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 
 from scpca_portal import loader, metadata_parser, utils
-from scpca_portal.models import ComputedFile, Project
+from scpca_portal.enums import ProjectLoadStates
+from scpca_portal.models import ComputedFile, Contact, Project, Publication
 from scpca_portal.test import expected_values as test_data
+from scpca_portal.test.factories import LeafProjectFactory
 
 
 class TestLoader(TransactionTestCase):
@@ -260,6 +262,24 @@ class TestLoader(TransactionTestCase):
         self.assertIsNotNone(publication)
         self.assertObjectProperties(publication, test_data.Project_SCPCP999990.Publication2.VALUES)
 
+    def test_create_project_from_s3(self):
+        # Input files are wiped so that any read of a local copy fails
+        utils.create_data_dirs(wipe_input_dir=True)
+
+        with override_settings(LOAD_METADATA_FROM_S3=True):
+            project_metadata = metadata_parser.load_projects_metadata(
+                [test_data.Project_SCPCP999990.SCPCA_ID]
+            )[0]
+            project = self.create_project(project_metadata)
+
+        # Bulk RNA-seq samples are read from the bulk metadata file on s3
+        self.assertTrue(project.has_bulk_rna_seq)
+        sample = project.samples.get(
+            scpca_id=test_data.Project_SCPCP999990.Sample_SCPCS999994.SCPCA_ID
+        )
+        self.assertTrue(sample.has_bulk_rna_seq)
+        self.assertFalse(any(settings.INPUT_DATA_PATH.iterdir()))
+
     def test_create_project_SCPCP999991(self):
         utils.create_data_dirs()
 
@@ -1103,3 +1123,108 @@ class TestLoader(TransactionTestCase):
             self.assertObjectProperties(
                 computed_file, test_data.Computed_File_Sample.MULTIPLEXED_SINGLE_CELL_SCE.VALUES
             )
+
+
+class TestLoadProject(TestCase):
+    def setUp(self):
+        self.project_metadata = {"scpca_project_id": "SCPCP999999", "title": "Project"}
+        self.load_project = partial(
+            loader.load_project,
+            submitter_whitelist={"scpca"},
+            input_bucket_name=settings.AWS_S3_INPUT_BUCKET_NAME,
+            update_s3=False,
+            clean_up_input_data=False,
+            skip_unchanged=True,
+        )
+
+    def create_project(self, project_metadata, *args):
+        project = LeafProjectFactory(scpca_id=project_metadata["scpca_project_id"])
+        project.metadata_hash = Project.get_metadata_hash(project_metadata)
+        project.save()
+        return project
+
+    @patch("scpca_portal.loader.create_project")
+    def test_load_project(self, mock_create_project):
+        mock_create_project.side_effect = self.create_project
+
+        result = self.load_project(dict(self.project_metadata), reload_existing=False)
+        self.assertEqual(result.project_id, "SCPCP999999")
+        self.assertEqual(result.state, ProjectLoadStates.LOADED)
+
+        # Projects with unchanged metadata aren't reloaded
+        result = self.load_project(dict(self.project_metadata), reload_existing=True)
+        self.assertEqual(result.state, ProjectLoadStates.UNCHANGED)
+        mock_create_project.assert_called_once()
+
+        mock_create_project.side_effect = lambda *args: Project.objects.first()
+        self.project_metadata["title"] = "Changed project"
+        result = self.load_project(dict(self.project_metadata), reload_existing=True)
+        self.assertEqual(result.state, ProjectLoadStates.RELOADED)
+
+        mock_create_project.side_effect = lambda *args: None
+        result = self.load_project(dict(self.project_metadata), reload_existing=False)
+        self.assertEqual(result.state, ProjectLoadStates.SKIPPED)
+
+    @patch("scpca_portal.loader.create_project")
+    def test_load_project_failure(self, mock_create_project):
+        mock_create_project.side_effect = Exception("Invalid metadata")
+
+        result = self.load_project(self.project_metadata, reload_existing=False)
+        self.assertEqual(result.state, ProjectLoadStates.FAILED)
+        self.assertEqual(result.error, "Invalid metadata")
+        self.assertFalse(Project.objects.exists())
+
+
+class TestBulkCreateFromProjectData(TestCase):
+    def test_bulk_create_from_project_data(self):
+        Contact.objects.create(name="PI", email="pi@example.com", pi_name="PI")
+        Publication.objects.create(doi="10.1000/existing", citation="Existing", pi_name="PI")
+        project = LeafProjectFactory()
+        project_data = {
+            "email": "PI@example.com;new@example.com;new@example.com",
+            "name": "PI;New;New",
+            "doi": "10.1000/existing;10.1000/new",
+            "citation": "Existing;<New>",
+        }
+
+        # Contacts and publications shared with other projects are reused rather than inserted
+        Contact.bulk_create_from_project_data(project_data, project)
+        Publication.bulk_create_from_project_data(project_data, project)
+
+        self.assertEqual(Contact.objects.count(), 2)
+        self.assertEqual(
+            set(project.contacts.values_list("email", flat=True)),
+            {"pi@example.com", "new@example.com"},
+        )
+        self.assertEqual(Publication.objects.count(), 2)
+        self.assertEqual(
+            set(project.publications.values_list("doi", "citation")),
+            {("10.1000/existing", "Existing"), ("10.1000/new", "New")},
+        )
+
+    def test_bulk_create_from_project_data_sorted(self):
+        project = LeafProjectFactory()
+        project_data = {
+            "email": "b@example.com;a@example.com",
+            "name": "B;A",
+            "doi": "10.1000/b;10.1000/a",
+            "citation": "B;A",
+        }
+
+        # Rows are inserted in unique key order, so that concurrent loads can't deadlock
+        with patch.object(
+            Contact.objects, "bulk_create", wraps=Contact.objects.bulk_create
+        ) as mock_contacts_bulk_create, patch.object(
+            Publication.objects, "bulk_create", wraps=Publication.objects.bulk_create
+        ) as mock_publications_bulk_create:
+            Contact.bulk_create_from_project_data(project_data, project)
+            Publication.bulk_create_from_project_data(project_data, project)
+
+        self.assertListEqual(
+            [contact.email for contact in mock_contacts_bulk_create.call_args.args[0]],
+            ["a@example.com", "b@example.com"],
+        )
+        self.assertListEqual(
+            [publication.doi for publication in mock_publications_bulk_create.call_args.args[0]],
+            ["10.1000/a", "10.1000/b"],
+        )
@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import signal
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import make_aware
+
+from scpca_portal import local_worker
+from scpca_portal.enums import JobExecutors, JobStates
+from scpca_portal.job_processors import DatasetJobProcessor
+from scpca_portal.models import Job
+from scpca_portal.test.factories import CCDLDatasetFactory, JobFactory
+
+
+@override_settings(JOB_EXECUTOR=JobExecutors.LOCAL, LOCAL_WORKER_HEARTBEAT_SECONDS=60)
+class TestLocalWorker(TestCase):
+    def mock_run(self, processor):
+        if processor.job.dataset == self.failing_dataset:
+            processor.job.apply_state(JobStates.FAILED, "MOCK_ERROR")
+            processor.job.save()
+            raise Exception("MOCK_ERROR")
+
+        processor.job.apply_state(JobStates.SUCCEEDED)
+        processor.job.save()
+
+    @patch("scpca_portal.batch.submit_job")
+    @patch("scpca_portal.lockfile.get_locked_project_ids")
+    def test_run_worker(self, mock_get_locked_project_ids, mock_batch_submit_job):
+        mock_get_locked_project_ids.return_value = []
+        datasets = [CCDLDatasetFactory(is_processing=False) for _ in range(3)]
+        self.failing_dataset = datasets[0]
+
+        # Jobs are saved as PENDING instead of being submitted to AWS Batch
+        submitted_jobs, _ = Job.submit_ccdl_datasets(datasets)
+        mock_batch_submit_job.assert_not_called()
+        self.assertEqual(len(submitted_jobs), 3)
+        self.assertEqual(Job.objects.filter(state=JobStates.PENDING).count(), 3)
+
+        with patch.object(DatasetJobProcessor, "run", autospec=True, side_effect=self.mock_run):
+            processed_count = local_worker.run_worker(poll_seconds=0, until_empty=True)
+
+        # Failed jobs don't stop the worker
+        self.assertEqual(processed_count, 3)
+        self.assertEqual(Job.objects.filter(state=JobStates.SUCCEEDED).count(), 2)
+        self.assertEqual(Job.objects.filter(state=JobStates.FAILED).count(), 1)
+        self.assertFalse(Job.objects.filter(worker_id__isnull=True).exists())
+
+    @patch("scpca_portal.local_worker.connections")
+    @patch.object(Job, "recover_stale")
+    def test_run_workers_replaces_killed_worker(self, mock_recover_stale, _):
+        started_count = multiprocessing.get_context("fork").Value("i", 0)
+
+        def mock_run_worker(poll_seconds, until_empty):
+            with started_count.get_lock():
+                is_first_worker = started_count.value == 0
+                started_count.value += 1
+
+            # The first worker is killed mid job, e.g. by the OOM killer
+            if is_first_worker:
+                os.kill(os.getpid(), signal.SIGKILL)
+            return 1
+
+        with patch("scpca_portal.local_worker.run_worker", side_effect=mock_run_worker):
+            processed_count = local_worker.run_workers(
+                processes=2, poll_seconds=0, until_empty=True
+            )
+
+        # The killed worker is replaced, and the other workers' counts are still returned
+        self.assertEqual(started_count.value, 3)
+        self.assertEqual(processed_count, 2)
+
+        # The killed worker's jobs are recovered without waiting for its heartbeat to go stale
+        dead_worker_ids = [
+            worker_id
+            for call in mock_recover_stale.call_args_list
+            for worker_id in (call.args[1] if len(call.args) > 1 else [])
+        ]
+        self.assertEqual(len(dead_worker_ids), 1)
+
+    def test_recover_stale_dead_workers(self):
+        job = JobFactory(
+            state=JobStates.PROCESSING,
+            dataset=CCDLDatasetFactory(is_processing=True),
+            worker_id="MOCK_WORKER_ID",
+            heartbeat_at=make_aware(datetime.now()),
+        )
+
+        retry_jobs = Job.recover_stale(stale_after_seconds=60, dead_worker_ids=["MOCK_WORKER_ID"])
+
+        self.assertEqual(len(retry_jobs), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.state, JobStates.FAILED)
+
+    def test_recover_stale(self):
+        heartbeat_at = make_aware(datetime.now() - timedelta(seconds=120))
+        stale_job = JobFactory(
+            state=JobStates.PROCESSING,
+            dataset=CCDLDatasetFactory(is_processing=True),
+            worker_id="MOCK_WORKER_ID",
+            heartbeat_at=heartbeat_at,
+        )
+        # Jobs of live workers and AWS Batch jobs aren't recovered
+        JobFactory(
+            state=JobStates.PROCESSING,
+            dataset=CCDLDatasetFactory(is_processing=True),
+            worker_id="MOCK_WORKER_ID",
+            heartbeat_at=make_aware(datetime.now()),
+        )
+        JobFactory(state=JobStates.PROCESSING, dataset=CCDLDatasetFactory(is_processing=True))
+
+        retry_jobs = Job.recover_stale(stale_after_seconds=60)
+
+        self.assertEqual(len(retry_jobs), 1)
+        self.assertEqual(retry_jobs[0].dataset, stale_job.dataset)
+        self.assertEqual(retry_jobs[0].state, JobStates.PENDING)
+        stale_job.refresh_from_db()
+        self.assertEqual(stale_job.state, JobStates.FAILED)
+        self.assertEqual(Job.objects.filter(state=JobStates.PROCESSING).count(), 2)
+
+    def test_bulk_sync_state(self):
+        JobFactory(state=JobStates.PROCESSING, dataset=CCDLDatasetFactory(is_processing=True))
+
+        # Local workers save their jobs' states themselves
+        with patch("scpca_portal.batch.get_jobs") as mock_batch_get_jobs:
+            self.assertFalse(Job.bulk_sync_state())
+            mock_batch_get_jobs.assert_not_called()
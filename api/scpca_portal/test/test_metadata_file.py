@@ -1,10 +1,13 @@
 import csv
 import io
 from typing import Dict, List
+from zipfile import ZipFile
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from scpca_portal import common, metadata_file
+from scpca_portal.enums import DatasetFormats
+from scpca_portal.models import Library, LibraryMetadataRow, UserDataset
 from scpca_portal.test.factories import LibraryFactory, SampleFactory
 
 
@@ -69,3 +72,95 @@ class TestGetFileContents(TestCase):
             output_list_of_dicts = list(csv.DictReader(output_buffer, delimiter=common.TAB))
             for library, output_dict in zip(self.libraries, output_list_of_dicts):
                 self.assertEqual(library.scpca_id, output_dict["scpca_library_id"])
+
+
+class TestWriteFileContents(TestCase):
+    def setUp(self):
+        self.libraries = [LibraryFactory() for _ in range(3)]
+        for library in self.libraries:
+            library.samples.add(SampleFactory(project=library.project))
+
+        self.libraries[0].metadata["technology"] = ["first", "second", "third"]
+        self.libraries[0].metadata.pop("workflow_version")
+        self.libraries[0].save()
+
+        for library in self.libraries:
+            LibraryMetadataRow.refresh_project_rows(library.project)
+
+    def write_file_contents(self, libraries_metadata, fieldnames: List[str]) -> str:
+        zip_buffer = io.BytesIO()
+        with ZipFile(zip_buffer, "w") as zip_file:
+            with zip_file.open("metadata.tsv", "w") as zip_entry:
+                metadata_file.write_file_contents(zip_entry, libraries_metadata, fieldnames)
+
+        with ZipFile(zip_buffer) as zip_file:
+            return zip_file.read("metadata.tsv").decode()
+
+    def test_write_file_contents_matches_get_file_contents(self):
+        libraries = Library.objects.filter(pk__in=[library.pk for library in self.libraries])
+        expected_file_contents = metadata_file.get_file_contents(
+            [lib_md for _, _, lib_md in Library.get_libraries_samples_metadata(reversed(libraries))]
+        )
+
+        fieldnames = metadata_file.get_field_names(
+            LibraryMetadataRow.get_sorted_libraries_metadata(libraries)
+        )
+        output_file_contents = self.write_file_contents(
+            LibraryMetadataRow.get_sorted_libraries_metadata(libraries), fieldnames
+        )
+
+        self.assertEqual(output_file_contents, expected_file_contents)
+        self.assertIn("first;second;third", output_file_contents)
+
+
+class TestCachedFileContents(TestCase):
+    def setUp(self):
+        metadata_file.file_contents_cache.clear()
+
+    def test_cache_file_contents(self):
+        self.assertIsNone(metadata_file.get_cached_file_contents("fingerprint"))
+
+        metadata_file.cache_file_contents("fingerprint", "file contents")
+        self.assertEqual(metadata_file.get_cached_file_contents("fingerprint"), "file contents")
+
+    @override_settings(METADATA_FILE_CACHE_MAX_SIZE_IN_BYTES=4)
+    def test_cache_file_contents_too_large(self):
+        metadata_file.cache_file_contents("fingerprint", "file contents")
+        self.assertIsNone(metadata_file.get_cached_file_contents("fingerprint"))
+
+    @override_settings(METADATA_FILE_CACHE_MAX_SIZE_IN_BYTES=4)
+    def test_cache_file_contents_size_in_bytes(self):
+        # Sizes are measured in encoded bytes, not characters
+        metadata_file.cache_file_contents("fingerprint", "ééé")
+        self.assertIsNone(metadata_file.get_cached_file_contents("fingerprint"))
+
+    @override_settings(METADATA_FILE_CACHE_MEMORY_IN_BYTES=10)
+    def test_cache_file_contents_evicts_least_recently_used(self):
+        metadata_file.cache_file_contents("first", "1234")
+        metadata_file.cache_file_contents("second", "1234")
+        # Reading a file makes it the most recently used
+        metadata_file.get_cached_file_contents("first")
+
+        metadata_file.cache_file_contents("third", "1234")
+        self.assertEqual(metadata_file.get_cached_file_contents("first"), "1234")
+        self.assertIsNone(metadata_file.get_cached_file_contents("second"))
+        self.assertEqual(metadata_file.get_cached_file_contents("third"), "1234")
+        self.assertEqual(metadata_file.file_contents_cache.size_in_bytes, 8)
+
+    def test_get_metadata_file_content_cached(self):
+        library = LibraryFactory()
+        library.samples.add(SampleFactory(project=library.project))
+        LibraryMetadataRow.refresh_project_rows(library.project)
+
+        dataset = UserDataset(format=DatasetFormats.SINGLE_CELL_EXPERIMENT)
+        libraries = Library.objects.all()
+        file_contents = dataset.get_metadata_file_content(libraries)
+
+        # Only the fingerprint is queried once contents are cached
+        with self.assertNumQueries(1):
+            self.assertEqual(dataset.get_metadata_file_content(libraries), file_contents)
+
+        library.metadata["technology"] = "10Xv2"
+        library.save()
+        LibraryMetadataRow.refresh_project_rows(library.project)
+        self.assertNotEqual(dataset.get_metadata_file_content(libraries), file_contents)
@@ -2,7 +2,7 @@ from typing import Set
 
 from django.conf import settings
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from scpca_portal import loader, metadata_parser
 from scpca_portal.test.factories import ProjectFactory
@@ -112,3 +112,24 @@ class TestMetadataParser(TestCase):
         expected_keys = {"scpca_project_id", "scpca_sample_id", "scpca_library_id"}
         actual_keys = bulk_libraries_metadata[0].keys()
         self.assertTransformedKeys(expected_keys, actual_keys)
+
+    def test_load_metadata_from_s3(self):
+        PROJECT_ID = "SCPCP999990"
+
+        loader.download_projects_metadata()
+        loader.download_projects_related_metadata([PROJECT_ID])
+        downloaded_samples_metadata = metadata_parser.load_samples_metadata(PROJECT_ID)
+        downloaded_libraries_metadata = metadata_parser.load_libraries_metadata(PROJECT_ID)
+
+        # Metadata read directly from s3 matches the downloaded metadata
+        with override_settings(LOAD_METADATA_FROM_S3=True):
+            self.assertEqual(
+                metadata_parser.get_projects_metadata_ids(),
+                ["SCPCP999990", "SCPCP999991", "SCPCP999992", "SCPCP999993"],
+            )
+            self.assertEqual(
+                metadata_parser.load_samples_metadata(PROJECT_ID), downloaded_samples_metadata
+            )
+            self.assertEqual(
+                metadata_parser.load_libraries_metadata(PROJECT_ID), downloaded_libraries_metadata
+            )
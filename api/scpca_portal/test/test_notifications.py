@@ -10,10 +10,10 @@ from scpca_portal.test.factories import CCDLDatasetFactory, JobFactory
 
 class TestNotifications(TestCase):
 
-    @patch("boto3.client")
-    def test_send_dataset_job_success_email(self, mock_boto_client):
+    @patch("scpca_portal.notifications.get_aws_ses")
+    def test_send_dataset_job_success_email(self, mock_get_aws_ses):
         mock_ses_client = MagicMock()
-        mock_boto_client.return_value = mock_ses_client
+        mock_get_aws_ses.return_value = mock_ses_client
         mock_ses_client.send_email.return_value = {"MessageId": "mocked-message-id"}
 
         dataset_id = "b369f67f-69c8-46a9-8fcf-746f35fc7e74"
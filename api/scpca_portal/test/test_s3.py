@@ -1,3 +1,4 @@
+from io import BytesIO
 from unittest.mock import patch
 
 from django.conf import settings
@@ -5,6 +6,7 @@ from django.core.management import call_command
 from django.test import TestCase, tag
 
 from scpca_portal import s3
+from scpca_portal.test.factories import OriginalFileFactory
 
 
 class TestS3(TestCase):
@@ -156,3 +158,83 @@ class TestS3(TestCase):
 
         # assert no dirs
         self.assertFalse(any(True for obj in actual_objects if obj["s3_key"].endswith("/")))
+
+    @tag("read_files")
+    @patch("scpca_portal.s3.get_aws_s3")
+    def test_read_files(self, mock_get_aws_s3):
+        mock_get_object = mock_get_aws_s3.return_value.get_object
+        mock_get_object.side_effect = lambda Bucket, Key: {
+            "Body": BytesIO(f"{Bucket}:{Key}".encode())
+        }
+
+        original_files = [
+            OriginalFileFactory(s3_bucket="scpca-portal-public-test-inputs/2025-08-26"),
+            OriginalFileFactory(s3_bucket="input-bucket"),
+        ]
+        contents = s3.read_files(original_files)
+
+        # Contents are returned in order, with bucket prefixes moved to the key
+        self.assertEqual(
+            contents,
+            [
+                f"scpca-portal-public-test-inputs:2025-08-26/{original_files[0].s3_key}".encode(),
+                f"input-bucket:{original_files[1].s3_key}".encode(),
+            ],
+        )
+        # Public buckets are read without signing requests
+        mock_get_aws_s3.assert_any_call(signed=False)
+        mock_get_aws_s3.assert_any_call(signed=True)
+
+    @tag("multipart_upload")
+    @patch("scpca_portal.s3.MULTIPART_UPLOAD_MIN_PART_SIZE", 2)
+    @patch("scpca_portal.s3.get_aws_s3")
+    def test_multipart_upload_writer(self, mock_get_aws_s3):
+        mock_s3 = mock_get_aws_s3.return_value
+        mock_s3.create_multipart_upload.return_value = {"UploadId": "UPLOAD_ID"}
+        mock_s3.upload_part.side_effect = lambda **kwargs: {"ETag": f"ETAG{kwargs['PartNumber']}"}
+
+        writer = s3.MultipartUploadWriter("dataset.zip", "output-bucket", part_size=4)
+        writer.write(b"abcdef")
+        # Parts are uploaded once a part's worth of bytes was written
+        self.assertEqual(writer.parts, [{"PartNumber": 1, "ETag": "ETAG1"}])
+        self.assertEqual(writer.tell(), 6)
+
+        # The remaining bytes are uploaded when committing, if there are enough for a part
+        writer.write(b"g")
+        self.assertEqual(writer.tell(), 7)
+        self.assertTrue(writer.commit())
+        state = writer.get_state()
+        self.assertEqual(
+            state,
+            {
+                "upload_id": "UPLOAD_ID",
+                "parts": [{"PartNumber": 1, "ETag": "ETAG1"}, {"PartNumber": 2, "ETag": "ETAG2"}],
+                "offset": 7,
+            },
+        )
+
+        writer.write(b"h")
+        self.assertFalse(writer.commit())
+
+        # A resumed upload continues with the next part after the committed state
+        resumed_writer = s3.MultipartUploadWriter(
+            "dataset.zip", "output-bucket", part_size=4, **state
+        )
+        resumed_writer.write(b"h")
+        resumed_writer.complete()
+
+        mock_s3.create_multipart_upload.assert_called_once()
+        uploaded_bodies = [call.kwargs["Body"] for call in mock_s3.upload_part.call_args_list]
+        self.assertEqual(uploaded_bodies, [b"abcd", b"efg", b"h"])
+        mock_s3.complete_multipart_upload.assert_called_once_with(
+            Bucket="output-bucket",
+            Key="dataset.zip",
+            UploadId="UPLOAD_ID",
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": 1, "ETag": "ETAG1"},
+                    {"PartNumber": 2, "ETag": "ETAG2"},
+                    {"PartNumber": 3, "ETag": "ETAG3"},
+                ]
+            },
+        )
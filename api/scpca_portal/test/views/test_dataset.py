@@ -2,12 +2,13 @@ from unittest.mock import PropertyMock, patch
 
 from django.conf import settings
 from django.core.management import call_command
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from scpca_portal.enums import DatasetFormats
-from scpca_portal.models import UserDataset
+from scpca_portal.enums import DatasetFormats, JobExecutors, JobStates
+from scpca_portal.models import Job, UserDataset
 from scpca_portal.test.expected_values import UserDatasetSingleCellExperiment
 from scpca_portal.test.factories import (
     APITokenFactory,
@@ -200,6 +201,25 @@ class DatasetsTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         mock_submit_job.assert_called_once()
 
+    @override_settings(JOB_EXECUTOR=JobExecutors.LOCAL)
+    @patch("scpca_portal.batch.submit_job")
+    def test_create_submit_job_local(self, mock_batch_submit_job):
+        url = reverse("datasets-list", args=[])
+        data = {
+            "data": UserDatasetSingleCellExperiment.VALUES.get("data"),
+            "email": UserDatasetSingleCellExperiment.VALUES.get("email"),
+            "format": UserDatasetSingleCellExperiment.VALUES.get("format"),
+            "start": True,
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Jobs are saved as PENDING for local workers to claim, rather than submitted to AWS Batch
+        mock_batch_submit_job.assert_not_called()
+        job = Job.objects.get(dataset_object_id=response.json()["id"])
+        self.assertEqual(job.state, JobStates.PENDING)
+        self.assertIsNone(job.batch_job_id)
+
     @patch("scpca_portal.models.Job.submit")
     def test_update_submit_job(self, mock_submit_job):
         # Assert that job cannot be started when it's already processing
@@ -8,6 +8,7 @@ from collections import namedtuple
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, Dict, Generator, Iterable, List, Set, Tuple
+from zipfile import ZipInfo
 
 from django.conf import settings
 
@@ -283,3 +284,46 @@ def hash_values(values: List[str]) -> str:
         md5_hasher.update(value.encode("utf-8"))
 
     return md5_hasher.hexdigest()
+
+
+# ZipInfo attributes which are written to a zip file's central directory
+ZIP_INFO_ATTRS = [
+    "filename",
+    "compress_type",
+    "create_system",
+    "create_version",
+    "extract_version",
+    "reserved",
+    "flag_bits",
+    "volume",
+    "internal_attr",
+    "external_attr",
+    "header_offset",
+    "CRC",
+    "compress_size",
+    "file_size",
+]
+ZIP_INFO_BYTES_ATTRS = ["comment", "extra"]
+
+
+def get_zip_info_dict(zip_info: ZipInfo) -> Dict[str, Any]:
+    """
+    Return a JSON serializable dict of a written zip entry's info,
+    from which the entry can be added to the central directory of a resumed zip file.
+    """
+    return {
+        **{attr: getattr(zip_info, attr) for attr in ZIP_INFO_ATTRS},
+        **{attr: getattr(zip_info, attr).hex() for attr in ZIP_INFO_BYTES_ATTRS},
+        "date_time": list(zip_info.date_time),
+    }
+
+
+def get_zip_info(zip_info_dict: Dict[str, Any]) -> ZipInfo:
+    """Return the zip entry info serialized by get_zip_info_dict."""
+    zip_info = ZipInfo(zip_info_dict["filename"], tuple(zip_info_dict["date_time"]))
+    for attr in ZIP_INFO_ATTRS:
+        setattr(zip_info, attr, zip_info_dict[attr])
+    for attr in ZIP_INFO_BYTES_ATTRS:
+        setattr(zip_info, attr, bytes.fromhex(zip_info_dict[attr]))
+
+    return zip_info